@@ -0,0 +1,96 @@
+"""
+Times the im2col convolution engine of `Conv` against the original
+sliding-window loops for each batch size. tests/test_conv.py checks that both agree.
+
+Usage: python benchmarks/conv_benchmark.py
+"""
+import time
+
+import numpy as np
+
+from mini_keras.activations import relu
+from mini_keras.layers.conv2D import Conv
+
+
+def loop_forward(layer, a_prev):
+    batch_size = a_prev.shape[0]
+    a_prev_padded = Conv.zero_pad(a_prev, layer.pad)
+    out = np.zeros((batch_size, layer.n_h, layer.n_w, layer.n_c), dtype=a_prev.dtype)
+
+    for i in range(layer.n_h):
+        v_start = i * layer.stride
+        v_end = v_start + layer.kernel_size
+
+        for j in range(layer.n_w):
+            h_start = j * layer.stride
+            h_end = h_start + layer.kernel_size
+
+            out[:, i, j, :] = np.sum(
+                a_prev_padded[:, v_start:v_end, h_start:h_end, :, np.newaxis] * layer.w[np.newaxis, :, :, :],
+                axis=(1, 2, 3),
+            )
+
+    return out + layer.b
+
+
+def loop_backward(layer, a_prev, dz):
+    batch_size = a_prev.shape[0]
+    a_prev_pad = Conv.zero_pad(a_prev, layer.pad)
+    da_prev_pad = np.zeros(a_prev_pad.shape, dtype=a_prev.dtype)
+    dw = np.zeros(layer.w.shape, dtype=a_prev.dtype)
+
+    for i in range(layer.n_h):
+        v_start = layer.stride * i
+        v_end = v_start + layer.kernel_size
+
+        for j in range(layer.n_w):
+            h_start = layer.stride * j
+            h_end = h_start + layer.kernel_size
+
+            da_prev_pad[:, v_start:v_end, h_start:h_end, :] += np.sum(
+                layer.w[np.newaxis, :, :, :, :] * dz[:, i: i + 1, j: j + 1, np.newaxis, :],
+                axis=4,
+            )
+            dw += np.sum(
+                a_prev_pad[:, v_start:v_end, h_start:h_end, :, np.newaxis] * dz[:, i: i + 1, j: j + 1, np.newaxis, :],
+                axis=0,
+            )
+
+    h_end, w_end = da_prev_pad.shape[1] - layer.pad, da_prev_pad.shape[2] - layer.pad
+    return da_prev_pad[:, layer.pad:h_end, layer.pad:w_end, :], dw / batch_size
+
+
+def timeit(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    # The first layer of the MNIST CNN from examples/mnist_nn.py
+    layer = Conv(5, 1, 32, activation=relu)
+    layer.init((28, 28, 1))
+
+    print(f"{'batch':>6} {'loops (s)':>10} {'im2col (s)':>11} {'speedup':>8}")
+    for batch_size in (1, 16, 64, 256):
+        a_prev = np.random.rand(batch_size, 28, 28, 1).astype("float32")
+        dz = np.random.randn(batch_size, layer.n_h, layer.n_w, layer.n_c).astype("float32")
+
+        def engine():
+            layer.forward(a_prev, training=True)
+            layer.backward(dz)
+
+        def loops():
+            loop_forward(layer, a_prev)
+            loop_backward(layer, a_prev, dz)
+
+        t_loops, t_engine = timeit(loops, repeat=1), timeit(engine)
+        print(f"{batch_size:>6} {t_loops:>10.4f} {t_engine:>11.4f} {t_loops / t_engine:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
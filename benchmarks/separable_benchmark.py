@@ -0,0 +1,103 @@
+"""
+Compares depthwise, depthwise separable and grouped convolutions against the dense `Conv`
+computing the same mapping: the dense layer's weights are zeroed outside of the channels each
+output channel is connected to, and both layers must agree. Times the forward and backward
+passes of each pair and reports their multiply-adds and parameters.
+
+Usage: python benchmarks/separable_benchmark.py
+"""
+import time
+
+import numpy as np
+
+from mini_keras.layers.conv2D import Conv
+from mini_keras.layers.depthwise_conv import DepthwiseConv
+from mini_keras.layers.separable_conv import SeparableConv
+
+SIZE, KERNEL_SIZE, BATCH_SIZE = 32, 3, 32
+
+
+def dense_depthwise(layer):
+    """Dense `Conv` weights equivalent to a depthwise kernel, zero across channels."""
+    n_c_prev, depth_multiplier = layer.n_c_prev, layer.depth_multiplier
+    w = np.zeros((KERNEL_SIZE, KERNEL_SIZE, n_c_prev, layer.n_c), dtype=layer.w.dtype)
+    depthwise = layer.depthwise_weights(layer.w)
+    for c in range(n_c_prev):
+        w[:, :, c, c * depth_multiplier: (c + 1) * depth_multiplier] = depthwise[:, :, c, :]
+    return w
+
+
+def dense_grouped(layer):
+    """Dense `Conv` weights equivalent to a grouped kernel, zero across groups."""
+    n_c_prev, n_c, groups = layer.n_c_prev, layer.n_c, layer.groups
+    w = np.zeros((KERNEL_SIZE, KERNEL_SIZE, n_c_prev, n_c), dtype=layer.w.dtype)
+    group_in, group_out = n_c_prev // groups, n_c // groups
+    for g in range(groups):
+        w[:, :, g * group_in: (g + 1) * group_in, g * group_out: (g + 1) * group_out] = \
+            layer.w[:, :, :, g * group_out: (g + 1) * group_out]
+    return w
+
+
+def dense_separable(layer):
+    """Dense `Conv` weights equivalent to a depthwise convolution followed by a pointwise one."""
+    depthwise, pointwise = layer.split_weights(layer.w)
+    n_c_prev, depth_multiplier = layer.n_c_prev, layer.depth_multiplier
+    depthwise = depthwise.reshape(KERNEL_SIZE, KERNEL_SIZE, n_c_prev, depth_multiplier)
+    pointwise = pointwise.reshape(n_c_prev, depth_multiplier, layer.n_c)
+    return np.einsum("ijcm,cmd->ijcd", depthwise, pointwise)
+
+
+def time_layer(layer, x, repeat):
+    layer.forward(x, True)
+    da = np.ones((x.shape[0], *layer.get_output_dim()), dtype=x.dtype)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        layer.forward(x, True)
+    forward = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        layer.backward(da)
+    backward = (time.perf_counter() - start) / repeat
+
+    return forward, backward
+
+
+def multiply_adds(layer):
+    if isinstance(layer, SeparableConv):
+        n_c_depthwise = layer.n_c_prev * layer.depth_multiplier
+        return layer.n_h * layer.n_w * (KERNEL_SIZE ** 2 * n_c_depthwise + n_c_depthwise * layer.n_c)
+    return layer.n_h * layer.n_w * layer.n_c * KERNEL_SIZE ** 2 * layer.n_c_prev // layer.groups
+
+
+def main(repeat=5):
+    np.random.seed(0)
+    cases = [
+        ("DepthwiseConv(x1)", DepthwiseConv(KERNEL_SIZE, 1, padding="same"), 32, dense_depthwise),
+        ("DepthwiseConv(x2)", DepthwiseConv(KERNEL_SIZE, 1, depth_multiplier=2, padding="same"), 32, dense_depthwise),
+        ("SeparableConv", SeparableConv(KERNEL_SIZE, 1, 64, padding="same"), 32, dense_separable),
+        ("Conv(groups=4)", Conv(KERNEL_SIZE, 1, 64, padding="same", algorithm="im2col", groups=4), 32, dense_grouped),
+    ]
+
+    print(f"{'layer':<20} {'MACs':>10} {'params':>8} {'forward (ms)':>13} {'backward (ms)':>14}")
+    for name, layer, n_c_prev, to_dense in cases:
+        x = np.random.randn(BATCH_SIZE, SIZE, SIZE, n_c_prev).astype(np.float32)
+        layer.init((SIZE, SIZE, n_c_prev))
+        dense = Conv(KERNEL_SIZE, 1, layer.n_c, padding="same", algorithm="im2col")
+        dense.init((SIZE, SIZE, n_c_prev))
+        dense.w[...] = to_dense(layer)
+
+        expected, actual = dense.forward(x, False), layer.forward(x, False)
+        assert np.allclose(actual, expected, rtol=1e-3, atol=1e-3), f"{name} disagrees with its dense equivalent"
+
+        for label, benchmarked in ((name, layer), ("  dense Conv", dense)):
+            forward, backward = time_layer(benchmarked, x, repeat)
+            print(
+                f"{label:<20} {multiply_adds(benchmarked):>10} {benchmarked.w.size:>8} "
+                f"{forward * 1e3:>13.2f} {backward * 1e3:>14.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
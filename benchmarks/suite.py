@@ -0,0 +1,249 @@
+"""
+Times the layers, activations, losses, optimizers and a full training step of the
+MNIST CNN from examples/mnist_nn.py over a grid of sizes, on synthetic data, and records
+the peak memory each case allocates. Results are written as JSON, to be kept as baselines
+that later runs are compared against.
+
+Usage:
+    python benchmarks/suite.py run [--quick] [--repeat N] [--filter TEXT] [--output results.json]
+    python benchmarks/suite.py compare baseline.json results.json [--threshold 0.1]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from itertools import product
+
+import numpy as np
+
+import mini_keras
+from mini_keras.activations import identity, relu, sigmoid, softmax
+from mini_keras.layers.conv2D import Conv
+from mini_keras.layers.dense import Dense
+from mini_keras.layers.flatten import Flatten
+from mini_keras.layers.pool import Pool
+from mini_keras.loss import sigmoid_cross_entropy, softmax_cross_entropy
+from mini_keras.models.sequential import Sequential
+from mini_keras.optimizer import Adam, GradientDescent, RMSProp, adam
+
+GRID = {"batch_size": (16, 64, 128), "channels": (1, 8, 32), "kernel_size": (3, 5)}
+QUICK_GRID = {"batch_size": (16,), "channels": (8,), "kernel_size": (3,)}
+
+
+def random(*shape):
+    return np.random.rand(*shape).astype(mini_keras.floatx())
+
+
+def layer_cases(layer, in_dim, batch_size):
+    """
+    Forward and backward pass cases of a layer, on a random batch.
+    """
+    layer.init(in_dim)
+    a_prev = random(batch_size, *np.atleast_1d(in_dim))
+    da = random(*layer.forward(a_prev, training=True).shape)
+
+    return [
+        ("forward", lambda: layer.forward(a_prev, training=True)),
+        ("backward", lambda: layer.backward(da)),
+    ]
+
+
+def mnist_model(optimizer=adam):
+    return Sequential(
+        input_dim=(28, 28, 1),
+        layers=[
+            Conv(5, 1, 32, activation=relu),
+            Pool(2, 2, "max"),
+            Flatten(),
+            Dense(64, relu),
+            Dense(10, softmax),
+        ],
+        cost_function=softmax_cross_entropy,
+        optimizer=optimizer,
+    )
+
+
+def cases(grid):
+    """
+    Yields the name, parameters and function of every benchmark case.
+    """
+    batch_sizes, channels, kernel_sizes = grid["batch_size"], grid["channels"], grid["kernel_size"]
+
+    for batch_size, n_c, kernel_size in product(batch_sizes, channels, kernel_sizes):
+        params = {"batch_size": batch_size, "channels": n_c, "kernel_size": kernel_size}
+        layer = Conv(kernel_size, 1, n_c, padding="same", activation=relu)
+        for name, fn in layer_cases(layer, (16, 16, n_c), batch_size):
+            yield f"conv.{name}", params, fn
+
+    for batch_size, n_c, mode in product(batch_sizes, channels, ("max", "average", "global_max")):
+        for pool_size, stride in ((2, 2), (3, 2)):
+            if mode.startswith("global") and (pool_size, stride) != (2, 2):
+                continue
+
+            params = {"batch_size": batch_size, "channels": n_c, "mode": mode, "pool_size": pool_size, "stride": stride}
+            for name, fn in layer_cases(Pool(pool_size, stride, mode), (16, 16, n_c), batch_size):
+                yield f"pool.{name}", params, fn
+
+    for batch_size, n_c in product(batch_sizes, channels):
+        params = {"batch_size": batch_size, "channels": n_c}
+        for name, fn in layer_cases(Flatten(), (16, 16, n_c), batch_size):
+            yield f"flatten.{name}", params, fn
+
+    for batch_size, size in product(batch_sizes, (64, 512)):
+        params = {"batch_size": batch_size, "size": size}
+        for name, fn in layer_cases(Dense(size, relu), 784, batch_size):
+            yield f"dense.{name}", params, fn
+
+    for batch_size in batch_sizes:
+        params = {"batch_size": batch_size}
+        x = random(batch_size, 1024) - 0.5
+        for activation in (identity, relu, sigmoid, softmax):
+            activation_name = type(activation).__name__.lower()
+            yield f"activation.{activation_name}.f", params, lambda a=activation: a.f(x)
+            if activation is not softmax:
+                yield f"activation.{activation_name}.df", params, lambda a=activation: a.df(x)
+
+        y = np.eye(10, dtype=mini_keras.floatx())[np.random.randint(0, 10, batch_size)]
+        z = random(batch_size, 10) - 0.5
+        for cost_function, activation in ((softmax_cross_entropy, softmax), (sigmoid_cross_entropy, sigmoid)):
+            cost_name = type(cost_function).__name__.lower()
+            a = activation.f(z)
+            yield f"loss.{cost_name}.f", params, lambda c=cost_function, a=a: c.f(a, y)
+            yield f"loss.{cost_name}.grad", params, lambda c=cost_function, a=a: c.grad(a, y)
+            yield f"loss.{cost_name}.f_logits", params, lambda c=cost_function: c.f_logits(z, y)
+
+    model = mnist_model()
+    for optimizer_class in (GradientDescent, RMSProp, Adam):
+        optimizer = optimizer_class(model.trainable_layers, arena=model.arena)
+        optimizer.initialize()
+        model.arena.grads[...] = random(model.arena.size) * 1e-3
+        params = {"num_params": model.arena.size}
+        yield f"optimizer.{optimizer_class.__name__.lower()}.update", params, lambda o=optimizer: o.update(
+            1e-4, model.w_grads, model.b_grads, 1
+        )
+
+    for batch_size in batch_sizes:
+        x = random(batch_size, 28, 28, 1)
+        y = np.eye(10, dtype=mini_keras.floatx())[np.random.randint(0, 10, batch_size)]
+        yield "sequential.train_step", {"batch_size": batch_size, "model": "mnist_nn"}, lambda x=x, y=y: model.train_step(
+            x, y, 1e-4, 1
+        )
+
+
+def measure(fn, repeat):
+    """
+    Times a function and measures the peak memory it allocates.
+    Returns
+    -------
+    dict
+        Best and median wall times in seconds, and peak memory in bytes.
+    """
+    fn()  # Warm up buffers and caches
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    # Tracing slows the function down, memory is measured in a separate run
+    tracemalloc.start()
+    start_bytes = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak_memory = tracemalloc.get_traced_memory()[1] - start_bytes
+    tracemalloc.stop()
+
+    return {"time_best": min(times), "time_median": float(np.median(times)), "peak_memory": peak_memory}
+
+
+def case_key(name, params):
+    return name + "[" + ",".join(f"{key}={value}" for key, value in sorted(params.items())) + "]"
+
+
+def run(args):
+    np.random.seed(0)
+    results = {}
+    for name, params, fn in cases(QUICK_GRID if args.quick else GRID):
+        key = case_key(name, params)
+        if args.filter and args.filter not in key:
+            continue
+
+        results[key] = {"name": name, "params": params, **measure(fn, args.repeat)}
+        result = results[key]
+        print(f"{key:<90} {result['time_best'] * 1e3:>10.3f} ms {result['peak_memory'] / 2 ** 20:>9.2f} MB")
+
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "floatx": mini_keras.floatx(),
+            "num_threads": mini_keras.num_threads(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.results) as f:
+        results = json.load(f)["results"]
+
+    regressions = []
+    print(f"{'case':<90} {'time':>8} {'memory':>8}")
+    for key in sorted(baseline.keys() & results.keys()):
+        old, new = baseline[key], results[key]
+        time_ratio = new["time_best"] / max(old["time_best"], 1e-12)
+        memory_ratio = (new["peak_memory"] + 1) / (old["peak_memory"] + 1)
+        flags = [
+            metric for metric, ratio in (("time", time_ratio), ("memory", memory_ratio)) if ratio > 1 + args.threshold
+        ]
+        if flags:
+            regressions.append((key, flags))
+        print(f"{key:<90} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x {'REGRESSION' if flags else ''}")
+
+    for key in sorted(baseline.keys() - results.keys()):
+        print(f"{key:<90} missing from the results")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for key, flags in regressions:
+            print(f"  {key} ({', '.join(flags)})")
+        return 1
+
+    print(f"No regression beyond {args.threshold:.0%}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="mini_keras benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks and write the results as JSON")
+    run_parser.add_argument("--output", default="benchmark_results.json", help="Path of the JSON results")
+    run_parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case, the best one is kept")
+    run_parser.add_argument("--quick", action="store_true", help="Run a reduced grid")
+    run_parser.add_argument("--filter", help="Only run the cases whose key contains this text")
+
+    compare_parser = commands.add_parser("compare", help="Flag the regressions of results against a baseline")
+    compare_parser.add_argument("baseline", help="Path of the baseline JSON results")
+    compare_parser.add_argument("results", help="Path of the JSON results to check")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="Tolerated relative slowdown")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return run(args)
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
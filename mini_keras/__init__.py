@@ -1,12 +1,19 @@
 import typing as t
 
 from .activations import identity, relu, sigmoid, softmax
+from .backend import floatx, num_threads, set_floatx, set_num_threads
+from .kernels import available_kernel_backends, kernel_backend, set_kernel_backend
+from .layers.batch_norm import BatchNorm
 from .layers.conv2D import Conv
 from .layers.dense import Dense
+from .layers.depthwise_conv import DepthwiseConv
+from .layers.dropout import Dropout
 from .layers.flatten import Flatten
+from .layers.separable_conv import SeparableConv
 from .loss import sigmoid_cross_entropy, softmax_cross_entropy
 from .models.sequential import Sequential
 from .optimizer import adam, gradient_descent, rmsprop
+from .profiler import profile
 from .utils.encoder import one_hot_encoder
 
 __author__ = "Deep alchemy team"
@@ -25,8 +32,19 @@ __all__: t.Tuple[str, ...] = (
     "relu",
     "sigmoid",
     "softmax",
+    "floatx",
+    "set_floatx",
+    "num_threads",
+    "set_num_threads",
+    "available_kernel_backends",
+    "kernel_backend",
+    "set_kernel_backend",
+    "BatchNorm",
     "Conv",
     "Dense",
+    "DepthwiseConv",
+    "Dropout",
+    "SeparableConv",
     "Flatten",
     "softmax_cross_entropy",
     "sigmoid_cross_entropy",
@@ -34,5 +52,6 @@ __all__: t.Tuple[str, ...] = (
     "adam",
     "gradient_descent",
     "rmsprop",
+    "profile",
     "one_hot_encoder",
 )
@@ -4,38 +4,84 @@ from .base import BaseActivation
 
 
 class Identity(BaseActivation):
-    def f(self, x):
+    def f(self, x, out=None):
+        if out is not None and out is not x:
+            np.copyto(out, x)
+            return out
         return x
 
-    def df(self, x, cached_y=None):
-        return np.full(x.shape, 1)
+    def df(self, x, cached_y=None, out=None):
+        if out is not None:
+            out.fill(1)
+            return out
+        return np.ones_like(x)
+
+    def backward(self, da, cache, out=None):
+        # dz is da itself, the layers only read it
+        return da
 
 
 class Sigmoid(BaseActivation):
-    def f(self, x):
-        return np.where(x >= 0, 1 / (1 + np.exp(-x)), np.exp(x) / (1 + np.exp(x)))
+    def f(self, x, out=None):
+        # sigmoid(x) = (1 + tanh(x / 2)) / 2, which is stable and can be computed in place
+        out = np.multiply(x, 0.5, out=out)
+        np.tanh(out, out=out)
+        out += 1
+        out *= 0.5
+        return out
 
-    def df(self, x, cached_y=None):
+    def df(self, x, cached_y=None, out=None):
         y = cached_y if cached_y is not None else self.f(x)
+        if out is not None:
+            np.subtract(1, y, out=out)
+            out *= y
+            return out
         return y * (1 - y)
 
+    def backward(self, da, cache, out=None):
+        # Only the activations are needed, dz = da * a * (1 - a)
+        a = cache["a"]
+        out = np.subtract(1, a, out=out)
+        out *= a
+        out *= da
+        return out
+
 
 class ReLU(BaseActivation):
-    def f(self, x):
-        return np.maximum(0, x)
+    def f(self, x, out=None):
+        return np.maximum(0, x, out=out)
 
-    def df(self, x, cached_y=None):
-        return np.where(x <= 0, 0, 1)
+    def df(self, x, cached_y=None, out=None):
+        # A boolean mask keeps the dtype of the gradient it multiplies
+        return np.greater(x, 0, out=out)
+
+    def backward(self, da, cache, out=None):
+        # The cached pre-activation output may already be the mask of its signs
+        z = cache["z"]
+        return np.multiply(da, z if z.dtype == bool else z > 0, out=out)
 
 
 class SoftMax(BaseActivation):
-    def f(self, x):
+    def f(self, x, out=None):
+        if out is not None:
+            np.subtract(x, np.max(x, axis=1, keepdims=True), out=out)
+            np.exp(out, out=out)
+            out /= np.sum(out, axis=1, keepdims=True)
+            return out
         y = np.exp(x - np.max(x, axis=1, keepdims=True))
         return y / np.sum(y, axis=1, keepdims=True)
 
-    def df(self, x, cached_y=None):
+    def df(self, x, cached_y=None, out=None):
         raise NotImplementedError
 
+    def backward(self, da, cache, out=None):
+        # Product with the Jacobian, dz = a * (da - sum(da * a)), without building it
+        a = cache["a"]
+        dot = np.einsum("ij,ij->i", da, a)[:, np.newaxis]
+        out = np.subtract(da, dot, out=out)
+        out *= a
+        return out
+
 
 # -- Assign to the short forms --
 identity = Identity()
@@ -0,0 +1,110 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+_FLOATX = "float32"
+_NUM_THREADS = 1
+_EXECUTOR = None
+
+
+def floatx() -> str:
+    """
+    Returns the default float type used by layers, activations, losses and optimizers.
+    Returns
+    -------
+    str
+        The default float type, e.g. 'float32'.
+    """
+    return _FLOATX
+
+
+def set_floatx(value: str) -> None:
+    """
+    Sets the default float type.
+    Parameters
+    ----------
+    value : str
+        One of 'float16', 'float32' or 'float64'.
+    """
+    global _FLOATX
+
+    if value not in ("float16", "float32", "float64"):
+        raise ValueError(f"Unknown floatx type: '{value}'")
+
+    _FLOATX = str(value)
+
+
+def cast_to_floatx(x) -> np.ndarray:
+    """
+    Casts an array to the default float type.
+    No copy is made when the array already has that type.
+    """
+    return np.asarray(x, dtype=_FLOATX)
+
+
+def num_threads() -> int:
+    """
+    Returns the number of threads conv and pool layers split their batch across.
+    """
+    return _NUM_THREADS
+
+
+def set_num_threads(value: int) -> None:
+    """
+    Sets the number of threads conv and pool layers split their batch across.
+    NumPy releases the GIL in its kernels, so the shards run in parallel.
+    Parameters
+    ----------
+    value : int
+        Number of threads, 1 (the default) disables intra-op parallelism.
+    """
+    global _NUM_THREADS
+
+    if value < 1:
+        raise ValueError(f"The number of threads must be at least 1, got {value}")
+
+    _NUM_THREADS = int(value)
+    _shutdown_executor()
+
+
+def parallel_for(size: int, fn) -> list:
+    """
+    Splits range(size) in contiguous shards and calls fn(start, stop) on each of them,
+    using the persistent intra-op thread pool when more than one thread is set.
+    Returns
+    -------
+    list
+        The result of each call, in the order of the shards.
+    """
+    global _EXECUTOR
+
+    num_shards = min(_NUM_THREADS, size)
+    if num_shards <= 1:
+        return [fn(0, size)]
+
+    if _EXECUTOR is None:
+        _EXECUTOR = ThreadPoolExecutor(_NUM_THREADS, thread_name_prefix="mini_keras")
+
+    bounds = np.linspace(0, size, num_shards + 1).astype(int)
+    futures = [_EXECUTOR.submit(fn, start, stop) for start, stop in zip(bounds, bounds[1:])]
+    return [future.result() for future in futures]
+
+
+def _shutdown_executor() -> None:
+    global _EXECUTOR
+
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown()
+        _EXECUTOR = None
+
+
+def _forget_executor() -> None:
+    # The pool's threads do not survive a fork, the child creates its own
+    global _EXECUTOR
+
+    _EXECUTOR = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_executor)
@@ -2,10 +2,15 @@ import typing as t
 
 import numpy as np
 
+from .utils.arena import ParameterArena
+
 
 class BaseCostFunction:
     __slots__ = ()
 
+    # Output activation this cost can be fused with, to work on the logits directly
+    activation = None
+
     @classmethod
     def __subclasshook__(
         cls, subclass: "BaseCostFunction"
@@ -24,6 +29,25 @@ class BaseCostFunction:
     def grad(self, y_pred, y: t.Union[t.List, np.ndarray]) -> None:
         raise NotImplementedError
 
+    def f_logits(self, z_last, y: t.Union[t.List, np.ndarray]) -> None:
+        """
+        z_last : numpy.ndarray
+            Last layer's pre-activation output.
+        y : numpy.ndarray
+            Target labels.
+        """
+        raise NotImplementedError
+
+    def grad_logits(self, a_last, y: t.Union[t.List, np.ndarray]) -> None:
+        """
+        Gradient wrt the cost of the last layer's pre-activation output.
+        a_last : numpy.ndarray
+            Last layer's activations.
+        y : numpy.ndarray
+            Target labels.
+        """
+        raise NotImplementedError
+
 
 class BaseActivation:
     __slots__ = ()
@@ -40,18 +64,54 @@ class BaseActivation:
             or type(NotImplemented)  # noqa: W503
         )
 
-    def f(self, x: t.Union[t.List, np.ndarray]) -> None:
+    def f(self, x: t.Union[t.List, np.ndarray], out: t.Optional[np.ndarray] = None) -> None:
+        """
+        x : numpy.ndarray
+            Input.
+        out : numpy.ndarray, optional
+            Buffer to write the activations into, which may be `x` itself.
+        """
         raise NotImplementedError
 
-    def df(self, x: t.Union[t.List, np.ndarray], cached_y=None) -> None:
+    def df(self, x: t.Union[t.List, np.ndarray], cached_y=None, out: t.Optional[np.ndarray] = None) -> None:
         raise NotImplementedError
 
+    def forward_inplace(self, z: np.ndarray, bias: np.ndarray, out: t.Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Adds the biases to the pre-activation output in place, then applies the activation.
+        z : numpy.ndarray
+            Pre-activation output, without the biases.
+        bias : numpy.ndarray
+            Biases, broadcast along the last axis.
+        out : numpy.ndarray, optional
+            Buffer to write the activations into, which may be `z` itself.
+        """
+        z += bias
+        return self.f(z, out=out)
+
+    def backward(self, da: np.ndarray, cache: dict, out: t.Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Calculates the gradient of the cost wrt the pre-activation output, dz, from the one wrt the activations.
+        Activations override it to only read what they need and skip the derivative's full size tensor.
+        da : numpy.ndarray
+            Gradient of the cost wrt the activations.
+        cache : dict
+            The pre-activation output "z" and the activations "a", decompressed. Only the ones
+            the activation needs are required.
+        out : numpy.ndarray, optional
+            Buffer to write dz into. dz may also be `da` itself, which must then not be modified.
+        """
+        out = self.df(cache["z"], cached_y=cache.get("a"), out=out)
+        out *= da
+        return out
+
 
 class BaseOptimizer:
-    __slots__ = ("trainable_layers",)
+    __slots__ = ("trainable_layers", "arena")
 
-    def __init__(self, trainable_layers) -> None:
+    def __init__(self, trainable_layers, arena: t.Optional[ParameterArena] = None) -> None:
         self.trainable_layers = trainable_layers
+        self.arena = arena
 
     @classmethod
     def __subclasshook__(
@@ -66,11 +126,66 @@ class BaseOptimizer:
         )
 
     def initialize(self) -> None:
-        raise NotImplementedError
+        # Optimizers used outside of a model get their own contiguous parameters storage
+        if self.arena is None:
+            self.arena = ParameterArena(self.trainable_layers)
 
     def update(self, learning_rate, w_grads, b_grads, step) -> None:
         raise NotImplementedError
 
+    def get_config(self) -> dict:
+        """
+        Returns the optimizer's hyperparameters.
+        """
+        return {}
+
+    def get_state(self) -> dict:
+        """
+        Returns the optimizer's flat state buffers, laid out like the arena's parameters.
+        """
+        return {}
+
+    def set_state(self, state: dict) -> None:
+        """
+        Copies saved state buffers, as returned by `get_state`, into the optimizer's own.
+        """
+        for name, buffer in self.get_state().items():
+            buffer[...] = state[name]
+
+
+class BaseCallback:
+    __slots__ = ("model", "params")
+
+    # Hooks called by `Sequential.train`, each does nothing unless overridden
+    def __init__(self) -> None:
+        self.model = None
+        self.params = {}
+
+    def set_model(self, model) -> None:
+        self.model = model
+
+    def set_params(self, params: dict) -> None:
+        """
+        params : dict
+            Training settings: batch_size, num_batches per epoch, num_epochs and learning_rate.
+        """
+        self.params = params
+
+    def on_train_begin(self) -> None:
+        pass
+
+    def on_epoch_begin(self, epoch) -> None:
+        pass
+
+    def on_batch_end(self, step, cost) -> None:
+        pass
+
+    def on_epoch_end(self, epoch, logs) -> None:
+        pass
+
+    def on_train_end(self) -> None:
+        pass
+
 
 class BaseLayer:
     __slots__ = ()
@@ -120,6 +235,14 @@ class BaseLayer:
         """
         raise NotImplementedError
 
+    def backward_dz(self, dz: np.ndarray) -> None:
+        """
+        Backward pass starting after the activation, used when it is fused with the cost function.
+        dz : numpy.ndarray
+            The gradients wrt the cost of this layer pre-activation output
+        """
+        raise NotImplementedError
+
     def update_params(self, dw: np.ndarray, db: np.ndarray) -> None:
         """
         dw : numpy.ndarray
@@ -134,3 +257,51 @@ class BaseLayer:
 
     def get_output_dim(self) -> None:
         raise NotImplementedError
+
+    def recompute(self, a_prev: np.ndarray) -> np.ndarray:
+        """
+        Performs the training forward pass again to rebuild the cache, when gradient checkpointing dropped it.
+        Layers whose forward pass has side effects, or is random, must replay the first pass exactly.
+        a_prev : numpy.ndarray
+            The input to this layer, the same as in the first forward pass.
+        """
+        return self.forward(a_prev, True)
+
+    def get_state(self) -> dict:
+        """
+        Returns the arrays, other than the parameters, a saved model needs to restore the layer, by name.
+        """
+        return {}
+
+    def set_state(self, state: dict) -> None:
+        """
+        Restores the arrays returned by `get_state`.
+        """
+
+    def clear_cache(self) -> None:
+        """
+        Drops the state kept for the backward pass.
+        """
+        cache = getattr(self, "cache", None)
+        if cache:
+            cache.clear()
+
+    def get_config(self) -> dict:
+        """
+        Returns the arguments the layer was built with, to rebuild it when loading a saved model.
+        """
+        raise NotImplementedError
+
+    def freeze(self, batch_size: int) -> t.Callable:
+        """
+        Returns the inference forward pass of the layer for batches of up to `batch_size` samples,
+        writing into buffers allocated once. Layers without one fall back to `forward`.
+        """
+        return lambda a_prev: self.forward(a_prev, False)
+
+    def get_workspace_size(self) -> int:
+        """
+        Number of temporary elements, per sample, the inference forward pass needs
+        besides its input and output. Used to estimate memory usage.
+        """
+        return 0
@@ -0,0 +1,262 @@
+import os
+import queue
+import sys
+import threading
+import time
+import warnings
+from collections import deque
+
+import numpy as np
+
+from .base import BaseCallback
+from .models.saving import get_state, write
+
+
+class ModelCheckpoint(BaseCallback):
+    """Saves the model periodically during training, on a background thread.
+    Parameters and optimizer state are copied into one of two staging buffers, the only work done
+    by the training loop, while the other buffer can still be serialized and fsynced. Training only
+    waits on the disk when a checkpoint is requested before the one preceding it was written.
+    Attributes
+    ----------
+    file_path : str
+        Path of the checkpoints, formatted with the `epoch` and `step` of each one, e.g. 'model-{epoch}.mk'.
+    every_n_steps : int
+        Number of training steps between checkpoints. Checkpoints are made every epoch if None.
+    keep : int
+        Number of most recent checkpoint files to keep, older ones are removed. Keeps them all if None.
+    """
+
+    def __init__(self, file_path, every_n_steps=None, keep=None):
+        super().__init__()
+        self.file_path = file_path
+        self.every_n_steps = every_n_steps
+        self.keep = keep
+        self.saved = deque()
+        self.staging = [{}, {}]
+        self.written = [threading.Event(), threading.Event()]
+        self.slot = 0
+        self.queue = None
+        self.thread = None
+        self.error = None
+
+    def on_train_begin(self):
+        for event in self.written:
+            event.set()
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run_writer, daemon=True)
+        self.thread.start()
+
+    def on_batch_end(self, step, cost):
+        if self.every_n_steps is not None and step % self.every_n_steps == 0:
+            self.checkpoint()
+
+    def on_epoch_end(self, epoch, logs):
+        if self.every_n_steps is None:
+            self.checkpoint()
+
+    def on_train_end(self):
+        # Pending checkpoints are written before training returns
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+        if sys.exc_info()[1] is not None and self.error is not None:
+            # Training itself failed, its exception is the one to propagate
+            error, self.error = self.error, None
+            warnings.warn(f"Writing a checkpoint failed: {error!r}", RuntimeWarning)
+        self.raise_error()
+
+    def checkpoint(self):
+        """
+        Snapshots the model into a staging buffer and queues it to be written.
+        """
+        self.raise_error()
+        staging, written = self.staging[self.slot], self.written[self.slot]
+        # Wait for the previous write out of this buffer, if still in flight
+        written.wait()
+
+        header, arrays = get_state(self.model)
+        for name, array in arrays.items():
+            if name not in staging or staging[name].shape != array.shape or staging[name].dtype != array.dtype:
+                staging[name] = np.empty_like(array)
+            np.copyto(staging[name], array)
+
+        written.clear()
+        file_path = self.file_path.format(epoch=self.model.epoch, step=self.model.step)
+        self.queue.put((file_path, header, staging, written))
+        self.slot = 1 - self.slot
+
+    def run_writer(self):
+        """
+        Writer thread loop, writing queued checkpoints until it gets None.
+        """
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            file_path, header, staging, written = item
+            try:
+                if self.error is None:
+                    write(file_path, header, staging)
+                    self.rotate(file_path)
+            except Exception as e:
+                self.error = e
+            finally:
+                written.set()
+
+    def rotate(self, file_path):
+        """
+        Records a new checkpoint file and removes the oldest ones beyond `keep`.
+        """
+        if file_path in self.saved:
+            self.saved.remove(file_path)
+        self.saved.append(file_path)
+
+        while self.keep is not None and len(self.saved) > self.keep:
+            old_path = self.saved.popleft()
+            if os.path.exists(old_path):
+                os.remove(old_path)
+
+    def raise_error(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError("Writing a checkpoint failed") from error
+
+
+class ProgressLogger(BaseCallback):
+    """Reports the training progress, at most once per `interval` seconds within an epoch.
+    Each report is a whole line, no carriage returns, so logs stay readable once collected.
+    Attributes
+    ----------
+    interval : float
+        Minimum number of seconds between two progress reports within an epoch.
+        Only the end of each epoch is reported if None.
+    file : file object
+        Stream to write to, the standard output by default.
+    """
+
+    def __init__(self, interval=10.0, file=None):
+        super().__init__()
+        self.interval = interval
+        self.file = file
+        self.epoch = 0
+        self.batch = 0
+        self.last_report = 0.0
+
+    def log(self, message):
+        print(message, file=self.file or sys.stdout, flush=True)
+
+    def on_train_begin(self):
+        self.log(
+            f"Started training (batch_size={self.params['batch_size']}, learning_rate={self.params['learning_rate']})"
+        )
+
+    def on_epoch_begin(self, epoch):
+        self.epoch, self.batch = epoch, 0
+        self.last_report = time.perf_counter()
+
+    def on_batch_end(self, step, cost):
+        self.batch += 1
+        if self.interval is None:
+            return
+
+        # A clock read per batch, the stream is only written once per interval
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.log(
+                f"Epoch {self.epoch} / {self.params['num_epochs']}: "
+                f"{self.batch / self.params['num_batches']:.1%} - cost {float(cost):.6f}"
+            )
+
+    def on_epoch_end(self, epoch, logs):
+        message = f"Epoch {epoch} / {self.params['num_epochs']}: cost {float(logs['loss']):.6f}"
+        if "val_accuracy" in logs:
+            message += f" - validation accuracy {logs['val_accuracy']:.4f}"
+        self.log(message)
+
+    def on_train_end(self):
+        self.log("Finished training")
+
+
+class EarlyStopping(BaseCallback):
+    """Stops the training once a monitored value has stopped improving.
+    Attributes
+    ----------
+    monitor : str
+        Value to monitor, 'val_accuracy' or 'loss'. Epochs without it, e.g. when validation is skipped, are ignored.
+    patience : int
+        Number of checks without improvement after which the training is stopped.
+    min_delta : float
+        Minimum change of the monitored value counting as an improvement.
+    mode : str
+        'max' if the monitored value should increase, 'min' if it should decrease.
+        Inferred from the name of the monitored value by default.
+    restore_best_weights : bool
+        Whether to restore the parameters of the best epoch when the training ends, along with the state
+        of the trainable layers, e.g. the running statistics of `BatchNorm`.
+    best : float
+        Best monitored value.
+    best_epoch : int
+        Epoch of the best monitored value.
+    """
+
+    def __init__(self, monitor="val_accuracy", patience=3, min_delta=0.0, mode=None, restore_best_weights=True):
+        super().__init__()
+        if mode is None:
+            mode = "max" if "accuracy" in monitor else "min"
+        if mode not in ("max", "min"):
+            raise ValueError(f"Invalid mode '{mode}', expected 'max' or 'min'")
+
+        self.monitor = monitor
+        self.patience = patience
+        self.min_delta = min_delta
+        self.mode = mode
+        self.restore_best_weights = restore_best_weights
+        self.best = None
+        self.best_epoch = None
+        self.best_params = None
+        self.best_states = None
+        self.wait = 0
+
+    def on_train_begin(self):
+        self.best, self.best_epoch, self.wait = None, None, 0
+
+    def on_epoch_end(self, epoch, logs):
+        if self.monitor not in logs:
+            return
+
+        value = float(logs[self.monitor])
+        if self.best is None:
+            # The first value is always the best so far
+            improvement = float("inf")
+        else:
+            improvement = value - self.best if self.mode == "max" else self.best - value
+
+        if improvement > self.min_delta:
+            self.best, self.best_epoch, self.wait = value, epoch, 0
+            if self.restore_best_weights:
+                # The parameters are contiguous, a snapshot is a single copy
+                params = self.model.arena.params
+                if self.best_params is None or self.best_params.shape != params.shape:
+                    self.best_params = np.empty_like(params)
+                np.copyto(self.best_params, params)
+                self.best_states = [
+                    {name: np.copy(buffer) for name, buffer in layer.get_state().items()}
+                    for layer in self.model.trainable_layers
+                ]
+            return
+
+        self.wait += 1
+        if self.wait >= self.patience:
+            self.model.stop_training = True
+
+    def on_train_end(self):
+        if self.restore_best_weights and self.best_epoch is not None and self.best_epoch != self.model.epoch:
+            self.model.arena.params[...] = self.best_params
+            for layer, state in zip(self.model.trainable_layers, self.best_states):
+                if state:
+                    layer.set_state(state)
@@ -1,16 +1,45 @@
 import numpy as np
 
-from ..utils.data_utils import get_file
+from ..backend import floatx
+from ..utils.data_utils import get_file, get_memmap_dataset
+from ..utils.encoder import one_hot_encoder
 
 
-def load_data() -> tuple:
+def load_data(mmap=False) -> tuple:
+    """
+    Loads the MNIST dataset.
+    Parameters
+    ----------
+    mmap : bool
+        Whether to return read-only memory mapped arrays instead of loading them in memory.
+        The archive is converted to the memory mapped dataset format on the first call only.
+    Returns
+    -------
+    tuple
+        (x_train, y_train), (x_test, y_test) with raw uint8 images and integer labels.
+    """
     file_path = get_file(
         "https://storage.googleapis.com/tensorflow/tf-keras-datasets/mnist.npz",
         "mnist.npz",
     )
 
-    with np.load(file_path, allow_pickle=True) as f:
+    if mmap:
+        f = get_memmap_dataset(file_path)
+        return (f["x_train"], f["y_train"]), (f["x_test"], f["y_test"])
+
+    with np.load(file_path) as f:
         x_train, y_train = f["x_train"], f["y_train"]
         x_test, y_test = f["x_test"], f["y_test"]
 
         return (x_train, y_train), (x_test, y_test)
+
+
+def preprocess(x, y):
+    """
+    Turns a batch of raw samples into model inputs and one hot encoded targets.
+    Meant to be used as a `DataLoader` transform on memory mapped data.
+    """
+    x = x.reshape(x.shape[0], 28, 28, 1).astype(floatx())
+    x /= 255
+    y = one_hot_encoder(y.reshape(y.shape[0], 1), num_classes=10)
+    return x, y
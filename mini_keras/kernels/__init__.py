@@ -0,0 +1,75 @@
+"""
+Pluggable compute kernels used by the layers: direct convolution, max pooling with argmax
+tracking and fused bias and activation.
+
+The NumPy backend is always available. The Numba backend compiles fused loops that make no
+temporaries, and caches them on disk. By default, Numba is used when it is installed and NumPy
+otherwise; the MINI_KERAS_KERNELS environment variable or `set_kernel_backend` can force either.
+Selecting Numba makes it prefer its OpenMP threading layer unless one is configured, see `numba_kernels.activate`.
+Numba's threads do not survive a fork, forked processes switch to the NumPy kernels.
+"""
+import importlib
+import os
+
+_BACKENDS = ("numpy", "numba")
+_KERNELS = None
+
+
+def available_kernel_backends() -> list:
+    """
+    Returns the names of the kernel backends that can be used.
+    """
+    return [name for name in _BACKENDS if _load(name) is not None]
+
+
+def kernel_backend():
+    """
+    Returns the module of the kernel backend in use, selecting one the first time.
+    """
+    if _KERNELS is None:
+        set_kernel_backend(os.environ.get("MINI_KERAS_KERNELS", "auto"))
+
+    return _KERNELS
+
+
+def set_kernel_backend(name: str) -> None:
+    """
+    Sets the kernel backend.
+    Parameters
+    ----------
+    name : str
+        'numpy', 'numba', or 'auto' to use Numba when it is installed and NumPy otherwise.
+    """
+    global _KERNELS
+
+    if name not in ("auto", *_BACKENDS):
+        raise ValueError(f"Unknown kernel backend: '{name}'")
+
+    if name == "auto":
+        kernels = _load("numba") or _load("numpy")
+    else:
+        kernels = _load(name)
+        if kernels is None:
+            raise ImportError(f"The '{name}' kernel backend is unavailable, is {name} installed?")
+
+    kernels.activate()
+    _KERNELS = kernels
+
+
+def _load(name):
+    try:
+        return importlib.import_module(f".{name}_kernels", __name__)
+    except ImportError:
+        return None
+
+
+def _use_numpy_in_child() -> None:
+    # Numba's parallel kernels are not fork safe, the child runs the NumPy ones
+    global _KERNELS
+
+    if _KERNELS is not None and _KERNELS.name != "numpy":
+        _KERNELS = _load("numpy")
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_use_numpy_in_child)
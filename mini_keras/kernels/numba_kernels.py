@@ -0,0 +1,137 @@
+"""
+Kernels compiled with Numba. Loops are fused, so no temporary is made, and parallelized over the batch.
+Compiled kernels are cached on disk, next to this module, to keep later startups fast.
+
+Kernels are parallel themselves and must not be called from several Python threads at once, which Numba's
+workqueue threading layer aborts on and the others oversubscribe the cores with.
+"""
+import numpy as np
+from numba import config, njit, prange
+
+from . import numpy_kernels
+from ..activations import Identity, ReLU, Sigmoid
+
+name = "numba"
+
+# Convolutions loop over the windows directly
+unrolls_windows = False
+
+# Kernels split the batch across Numba's threads, callers must not split it across the intra-op thread pool too
+parallel = True
+
+IDENTITY, RELU, SIGMOID = 0, 1, 2
+ACTIVATIONS = {Identity: IDENTITY, ReLU: RELU, Sigmoid: SIGMOID}
+
+
+def activate():
+    """
+    Called when the backend is selected. Unless a threading layer is configured, e.g. with the NUMBA_THREADING_LAYER
+    environment variable, Numba is set to prefer OpenMP over TBB: a process that forked after launching TBB's threads,
+    e.g. for `DataParallel`, hangs at exit. Forked children use the NumPy kernels instead.
+    This setting is global to the process, and only applies if no parallel Numba code ran yet.
+    """
+    if config.THREADING_LAYER == "default" and hasattr(config, "THREADING_LAYER_PRIORITY"):
+        config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+
+@njit(parallel=True, cache=True)
+def _conv2d(x, w, stride, out):
+    batch_size, n_h, n_w, n_c = out.shape
+    kernel_size, n_c_prev = w.shape[0], w.shape[2]
+
+    for n in prange(batch_size):
+        # Each output pixel is accumulated in a local buffer, then written once
+        acc = np.empty(n_c, dtype=out.dtype)
+        for i in range(n_h):
+            for j in range(n_w):
+                acc[:] = 0
+
+                for di in range(kernel_size):
+                    for dj in range(kernel_size):
+                        for c_prev in range(n_c_prev):
+                            value = x[n, i * stride + di, j * stride + dj, c_prev]
+                            for c in range(n_c):
+                                acc[c] += value * w[di, dj, c_prev, c]
+
+                out[n, i, j, :] = acc
+
+
+@njit(parallel=True, cache=True)
+def _bias_activation(z, b, kind, out):
+    for r in prange(z.shape[0]):
+        for c in range(z.shape[1]):
+            value = z[r, c] + b[c]
+            z[r, c] = value
+
+            if kind == RELU:
+                value = max(value, 0)
+            elif kind == SIGMOID:
+                if value >= 0:
+                    value = 1 / (1 + np.exp(-value))
+                else:
+                    e = np.exp(value)
+                    value = e / (1 + e)
+
+            out[r, c] = value
+
+
+@njit(parallel=True, cache=True)
+def _max_pool(x, pool_size, stride, out, idx, track):
+    batch_size, n_h, n_w, n_c = out.shape
+
+    for n in prange(batch_size):
+        for i in range(n_h):
+            for j in range(n_w):
+                for c in range(n_c):
+                    best = x[n, i * stride, j * stride, c]
+                    position = 0
+
+                    for di in range(pool_size):
+                        for dj in range(pool_size):
+                            value = x[n, i * stride + di, j * stride + dj, c]
+                            # Strictly greater keeps the first maximum, like np.argmax
+                            if value > best:
+                                best = value
+                                position = di * pool_size + dj
+
+                    out[n, i, j, c] = best
+                    if track:
+                        idx[n, i, j, c] = position
+
+
+def conv2d(x, w, stride, out, cols=None):
+    """
+    Convolves a padded input with a kernel, see `numpy_kernels.conv2d`. `cols` is unused.
+    """
+    _conv2d(np.ascontiguousarray(x), np.ascontiguousarray(w), stride, out)
+    return out
+
+
+def bias_activation(z, b, activation, out=None):
+    """
+    Adds the biases to the pre-activation output in place, then applies the activation,
+    see `numpy_kernels.bias_activation`. Other activations than Identity, ReLU and Sigmoid use NumPy.
+    """
+    kind = ACTIVATIONS.get(type(activation))
+    if kind is None or not z.flags.c_contiguous:
+        return numpy_kernels.bias_activation(z, b, activation, out)
+
+    if out is None:
+        # Like NumPy's Identity, the activations are then the pre-activation output itself
+        out = z if kind == IDENTITY else np.empty_like(z)
+
+    n_c = z.shape[-1]
+    _bias_activation(z.reshape(-1, n_c), b.reshape(n_c), kind, out.reshape(-1, n_c))
+    return out
+
+
+def max_pool(x, pool_size, stride, out, idx=None):
+    """
+    Max pools a volume, keeping the position of the maximum in each window, see `numpy_kernels.max_pool`.
+    """
+    track = idx is not None
+    if not track:
+        idx = np.empty((1, 1, 1, 1), dtype=np.uint8)
+
+    _max_pool(np.ascontiguousarray(x), pool_size, stride, out, idx, track)
+    return out
@@ -0,0 +1,112 @@
+"""
+Reference kernels, vectorized with NumPy.
+"""
+import numpy as np
+
+from ..backend import parallel_for
+from ..utils.conv_utils import get_windows, im2col
+
+name = "numpy"
+
+# Convolutions are matrix products over unrolled windows, callers may provide the buffer for them
+unrolls_windows = True
+
+# Kernels run on the calling thread, callers may split the batch across the intra-op thread pool
+parallel = False
+
+
+def activate():
+    """
+    Called when the backend is selected, there is nothing to set up.
+    """
+
+
+def conv2d(x, w, stride, out, cols=None):
+    """
+    Convolves a padded input with a kernel.
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Padded input volume of shape (batch_size, height, width, n_c_prev).
+    w : numpy.ndarray
+        Kernel of shape (kernel_size, kernel_size, n_c_prev, n_c).
+    stride : int
+        Stride along height and width.
+    out : numpy.ndarray
+        Output volume of shape (batch_size, n_h, n_w, n_c), overwritten.
+    cols : numpy.ndarray, optional
+        Buffer of shape (batch_size, n_h, n_w, kernel_size, kernel_size, n_c_prev) to unroll the windows into.
+    Returns
+    -------
+    numpy.ndarray
+        The output volume.
+    """
+    n_h, n_w, n_c = out.shape[1:]
+    kernel_size = w.shape[0]
+    w_col = w.reshape(-1, n_c)
+
+    def convolve(start, stop):
+        # Convolve every window of the shard at once with a single matrix product
+        shard_cols = im2col(
+            x[start:stop], kernel_size, stride, n_h, n_w, out=None if cols is None else cols[start:stop]
+        )
+        np.dot(shard_cols, w_col, out=out[start:stop].reshape(-1, n_c))
+
+    parallel_for(x.shape[0], convolve)
+
+    return out
+
+
+def bias_activation(z, b, activation, out=None):
+    """
+    Adds the biases to the pre-activation output in place, then applies the activation.
+    Parameters
+    ----------
+    z : numpy.ndarray
+        Pre-activation output, without the biases.
+    b : numpy.ndarray
+        Biases, broadcast along the last axis.
+    activation : Activation
+        Activation function.
+    out : numpy.ndarray, optional
+        Buffer for the activations, which may be `z` itself.
+    Returns
+    -------
+    numpy.ndarray
+        The activations.
+    """
+    return activation.forward_inplace(z, b, out=out)
+
+
+def max_pool(x, pool_size, stride, out, idx=None):
+    """
+    Max pools a volume, keeping the position of the maximum in each window.
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Input volume of shape (batch_size, height, width, n_c).
+    pool_size : int
+        Height and Width of the pooling window.
+    stride : int
+        Stride along height and width.
+    out : numpy.ndarray
+        Output volume of shape (batch_size, n_h, n_w, n_c), overwritten.
+    idx : numpy.ndarray, optional
+        Integer buffer of the same shape, for the flat position of the maximum inside each
+        (pool_size, pool_size) window, the first one on ties.
+    Returns
+    -------
+    numpy.ndarray
+        The output volume.
+    """
+    batch_size, n_h, n_w, n_c = out.shape
+    windows = get_windows(x, pool_size, stride, n_h, n_w)
+    if idx is None:
+        return np.max(windows, axis=(3, 4), out=out)
+
+    windows = windows.reshape(batch_size, n_h, n_w, -1, n_c)
+    argmax = np.argmax(windows, axis=3)[:, :, :, np.newaxis, :]
+    out[...] = np.take_along_axis(windows, argmax, axis=3)[:, :, :, 0, :]
+    idx[...] = argmax[:, :, :, 0, :]
+
+    return out
@@ -0,0 +1,179 @@
+import numpy as np
+
+from ..backend import floatx
+from ..base import BaseLayer
+from ..utils.workspace import Workspace
+
+
+class BatchNorm(BaseLayer):
+    """Batch normalization layer, normalizing each channel with the statistics of the batch when training
+    and with running statistics otherwise, before scaling it by `w` (gamma) and shifting it by `b` (beta).
+    Works on the (batch_size, n) outputs of `Dense` and the (batch_size, n_h, n_w, n_c) outputs of `Conv`,
+    channels are the last axis. Frozen models fold it into the layer before it, see `fold_batch_norm`.
+    Attributes
+    ----------
+    momentum : float
+        Weight of the running statistics when updating them with the statistics of a batch.
+    epsilon : float
+        Added to the variances for numerical stability.
+    w : numpy.ndarray
+        Scale of each channel, gamma. Counts as weights for L2 regularization.
+    b : numpy.ndarray
+        Shift of each channel, beta.
+    running_mean : numpy.ndarray
+        Running mean of each channel.
+    running_var : numpy.ndarray
+        Running (unbiased) variance of each channel.
+    reducer : callable
+        Sums per channel values across the replicas of the layer, so that each one normalizes with the statistics
+        of the whole batch rather than of its shard. Set by `DataParallel` in its workers, None otherwise.
+    cache : dict
+        Cache.
+    workspace : Workspace
+        Scratch buffers reused across training steps, shared with the other layers of a model.
+    """
+
+    def __init__(self, momentum=0.99, epsilon=1e-3):
+        super().__init__()
+        self.momentum = momentum
+        self.epsilon = epsilon
+        self.in_dim = None
+        self.w = None
+        self.b = None
+        self.running_mean = None
+        self.running_var = None
+        self.reducer = None
+        self.cache = {}
+        self.workspace = Workspace()
+
+    def init(self, in_dim):
+        self.in_dim = in_dim
+        n_c = in_dim if isinstance(in_dim, int) else in_dim[-1]
+
+        self.w = np.ones(n_c, dtype=floatx())
+        self.b = np.zeros(n_c, dtype=floatx())
+        self.running_mean = np.zeros(n_c, dtype=floatx())
+        self.running_var = np.ones(n_c, dtype=floatx())
+
+    def forward(self, a_prev, training):
+        if not training:
+            scale, shift = self.scale_shift()
+            a = a_prev * scale
+            a += shift
+            return a
+
+        mean, var, x_hat, inv_std, num_samples = self.normalize(a_prev)
+
+        # Unbiased variance for the running statistics, like the variance of the whole dataset
+        self.running_mean *= self.momentum
+        self.running_mean += (1 - self.momentum) * mean
+        self.running_var *= self.momentum
+        self.running_var += (1 - self.momentum) * num_samples / max(num_samples - 1, 1) * var
+
+        return self.scale(x_hat, inv_std, num_samples)
+
+    def recompute(self, a_prev):
+        # The running statistics were updated by the first forward pass
+        _, _, x_hat, inv_std, num_samples = self.normalize(a_prev)
+        return self.scale(x_hat, inv_std, num_samples)
+
+    def normalize(self, a_prev):
+        """
+        Normalizes a batch with its own statistics, those of the whole batch across the replicas when reducing.
+        Returns
+        -------
+        tuple
+            The mean and (biased) variance of each channel, the normalized batch, the inverse standard deviations
+            and the number of samples per channel the statistics are over.
+        """
+        axes = tuple(range(a_prev.ndim - 1))
+        num_samples = a_prev.size // a_prev.shape[-1]
+        if self.reducer is None:
+            mean = a_prev.mean(axis=axes)
+            var = a_prev.var(axis=axes)
+        else:
+            # Two passes like NumPy's, the squared deviations are summed around the mean of the whole batch
+            totals = self.reducer(np.append(a_prev.sum(axis=axes, dtype=np.float64), num_samples))
+            num_samples = int(totals[-1])
+            mean = (totals[:-1] / num_samples).astype(a_prev.dtype)
+            var = (self.reducer(np.square(a_prev - mean).sum(axis=axes, dtype=np.float64)) / num_samples).astype(a_prev.dtype)
+        inv_std = 1 / np.sqrt(var + self.epsilon)
+
+        x_hat = a_prev - mean
+        x_hat *= inv_std
+
+        return mean, var, x_hat, inv_std, num_samples
+
+    def scale(self, x_hat, inv_std, num_samples):
+        """
+        Scales and shifts a normalized batch, caching what the backward pass needs.
+        """
+        self.cache.update({"x_hat": x_hat, "inv_std": inv_std, "num_samples": num_samples})
+        a = x_hat * self.w
+        a += self.b
+        return a
+
+    def backward(self, da):
+        x_hat, inv_std, num_samples = self.cache["x_hat"], self.cache["inv_std"], self.cache["num_samples"]
+        batch_size = da.shape[0]
+        n_c = da.shape[-1]
+
+        # Sums over every axis but the channels', without temporaries
+        db = da.reshape(-1, n_c).sum(axis=0)
+        dw = np.einsum("ij,ij->j", da.reshape(-1, n_c), x_hat.reshape(-1, n_c))
+        db_total, dw_total = db, dw
+        if self.reducer is not None:
+            # The normalization depends on the whole batch, so does its gradient
+            totals = self.reducer(np.concatenate([db, dw]).astype(np.float64)).astype(da.dtype)
+            db_total, dw_total = totals[:n_c], totals[n_c:]
+
+        # Gradients through the normalization, mean and variance included, in a single fused expression:
+        # da_prev = gamma * inv_std * (da - mean(da) - x_hat * mean(da * x_hat))
+        da_prev = self.workspace.get("da_prev", da.shape, da.dtype, avoid=(da,))
+        np.multiply(x_hat, dw_total / num_samples, out=da_prev)
+        np.subtract(da, da_prev, out=da_prev)
+        da_prev -= db_total / num_samples
+        da_prev *= self.w * inv_std
+
+        return da_prev, dw / batch_size, db / batch_size
+
+    def scale_shift(self):
+        """
+        Returns the scale and shift of each channel the running statistics normalize with, gamma included.
+        """
+        scale = self.w / np.sqrt(self.running_var + self.epsilon)
+        return scale, self.b - self.running_mean * scale
+
+    def freeze(self, batch_size):
+        # Only used when the layer cannot be folded into the previous one
+        scale, shift = self.scale_shift()
+        dim = (self.in_dim,) if isinstance(self.in_dim, int) else self.in_dim
+        out = np.empty((batch_size, *dim), dtype=scale.dtype)
+
+        def forward(a_prev):
+            a = out[: a_prev.shape[0]]
+            np.multiply(a_prev, scale, out=a)
+            a += shift
+            return a
+
+        return forward
+
+    def update_params(self, dw, db):
+        self.w -= dw
+        self.b -= db
+
+    def get_params(self):
+        return self.w, self.b
+
+    def get_state(self):
+        return {"running_mean": self.running_mean, "running_var": self.running_var}
+
+    def set_state(self, state):
+        self.running_mean[...] = state["running_mean"]
+        self.running_var[...] = state["running_var"]
+
+    def get_output_dim(self):
+        return self.in_dim
+
+    def get_config(self):
+        return {"momentum": self.momentum, "epsilon": self.epsilon}
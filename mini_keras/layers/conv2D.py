@@ -1,9 +1,16 @@
+import copy
 import typing as t  # noqa: E902
 
 import numpy as np
 
 from ..activations import identity, relu, sigmoid, softmax
+from ..backend import floatx, parallel_for
 from ..base import BaseLayer
+from ..kernels import kernel_backend
+from ..utils.compression import unpack
+from ..utils.conv_algorithms import autotune, convolve, supported_algorithms
+from ..utils.conv_utils import col2im, im2col
+from ..utils.workspace import Workspace
 
 
 class Conv(BaseLayer):
@@ -38,9 +45,21 @@ class Conv(BaseLayer):
         Activation function applied to the output volume after performing the convolution operation.
     cache : dict
         Cache.
+    workspace : Workspace
+        Scratch buffers reused across training steps, shared with the other layers of a model.
+    cache_compression : CacheCompression
+        Policy storing the cache in smaller representations, None to keep it as is.
+    algorithm : str
+        Algorithm of the forward pass, 'im2col' (the default), 'direct', 'fft', 'winograd_f23' or 'winograd_f43'
+        (3x3 kernels with stride 1 only), or 'auto' to time them on the first batch of each sample shape and use
+        the fastest. Algorithms round differently, and the choice of 'auto' depends on timings, so it may differ
+        across runs and machines.
+    groups : int
+        Number of groups the input and output channels are split in, each output channel only sees the input
+        channels of its group. Grouped convolutions use im2col, unrolling the windows of one group at a time.
     """
 
-    def __init__(self, kernel_size, stride, n_c, padding="valid", activation=identity):
+    def __init__(self, kernel_size, stride, n_c, padding="valid", activation=identity, algorithm="im2col", groups=1):
         super().__init__()
         self.kernel_size = kernel_size
         self.stride = stride
@@ -65,7 +84,21 @@ class Conv(BaseLayer):
         else:
             self.activation = activation
 
+        if algorithm != "auto" and algorithm not in supported_algorithms(kernel_size, stride):
+            raise ValueError(
+                f"The algorithm '{algorithm}' is not supported for {kernel_size}x{kernel_size} kernels with stride {stride}"
+            )
+        self.algorithm = algorithm
+
+        if n_c is not None and n_c % groups != 0:
+            raise ValueError(f"The number of filters ({n_c}) must be divisible by the number of groups ({groups})")
+        if groups > 1 and algorithm not in ("auto", "im2col"):
+            raise ValueError(f"Grouped convolutions only support the 'im2col' algorithm, got '{algorithm}'")
+        self.groups = groups
+
         self.cache = {}
+        self.workspace = Workspace()
+        self.cache_compression = None
 
     def init(self, in_dim):
         self.pad = 0 if self.padding == "valid" else int((self.kernel_size - 1) / 2)
@@ -78,87 +111,200 @@ class Conv(BaseLayer):
             (self.n_w_prev - self.kernel_size + 2 * self.pad) / self.stride + 1
         )
 
+        if self.n_c_prev % self.groups != 0:
+            raise ValueError(
+                f"The number of input channels ({self.n_c_prev}) must be divisible by the number of groups ({self.groups})"
+            )
+
         self.w = np.random.randn(
-            self.kernel_size, self.kernel_size, self.n_c_prev, self.n_c
-        ).astype("float32")
-        self.b = np.zeros((1, 1, 1, self.n_c)).astype("float32")
+            self.kernel_size, self.kernel_size, self.n_c_prev // self.groups, self.n_c
+        ).astype(floatx())
+        self.b = np.zeros((1, 1, 1, self.n_c), dtype=floatx())
 
     def forward(self, a_prev, training):
         batch_size = a_prev.shape[0]
-        a_prev_padded = Conv.zero_pad(a_prev, self.pad).astype("float32")
-        out = np.zeros((batch_size, self.n_h, self.n_w, self.n_c)).astype("float32")
-
-        # Convolve
-        for i in range(self.n_h):
-            v_start = i * self.stride
-            v_end = v_start + self.kernel_size
-
-            for j in range(self.n_w):
-                h_start = j * self.stride
-                h_end = h_start + self.kernel_size
+        a_prev_padded = self.workspace.pad("a_prev_pad", a_prev, self.pad) if self.pad != 0 else a_prev
 
-                out[:, i, j, :] = np.sum(
-                    a_prev_padded[:, v_start:v_end, h_start:h_end, :, np.newaxis] * self.w[np.newaxis, :, :, :],
-                    axis=(1, 2, 3),
-                )
-
-        z = out + self.b
-        z = z.astype("float32")
-        a = self.activation.f(z)
-        a = a.astype("float32")
+        kernels = kernel_backend()
+        out = np.empty(
+            (batch_size, self.n_h, self.n_w, self.n_c), dtype=np.result_type(a_prev, self.w)
+        )
+        if self.groups == 1:
+            algorithm = self.algorithm
+            if algorithm == "auto":
+                algorithm = autotune(a_prev_padded, self.w, self.stride, out, pad=self.pad)
+            # Only im2col unrolls the windows, into the buffer the backward pass unrolls them in anyway
+            cols = self.cols(batch_size, a_prev.dtype) if algorithm == "im2col" else None
+            z = convolve(a_prev_padded, self.w, self.stride, out, algorithm, cols)
+        else:
+            z = self.convolve_groups(a_prev_padded, self.w, out, self.cols(batch_size, a_prev.dtype))
+        a = kernels.bias_activation(z, self.b, self.activation)
 
         if training:
             # Cache for backward pass
-            self.cache.update({"a_prev": a_prev, "z": z, "a": a})
+            if self.cache_compression is None:
+                self.cache.update({"a_prev": a_prev, "z": z, "a": a})
+            else:
+                self.cache.update(self.cache_compression.pack_cache(self.activation, a_prev, z, a))
 
         return a
 
+    def freeze(self, batch_size):
+        kernels = kernel_backend()
+        w = np.ascontiguousarray(self.w)
+        b = self.b.copy()
+        # Borders of the padded input are zeroed once and never written
+        padded = np.zeros(
+            (batch_size, self.n_h_prev + 2 * self.pad, self.n_w_prev + 2 * self.pad, self.n_c_prev), dtype=w.dtype
+        )
+        out = np.empty((batch_size, self.n_h, self.n_w, self.n_c), dtype=w.dtype)
+        cols = None
+        if self.algorithm in ("auto", "im2col"):
+            cols = np.empty(
+                (batch_size, self.n_h, self.n_w, self.kernel_size, self.kernel_size, self.n_c_prev // self.groups), dtype=w.dtype
+            )
+
+        algorithm = self.algorithm if self.groups == 1 else "im2col"
+        if algorithm == "auto":
+            # Tuned once for the largest batch, the unrolled windows are only kept if im2col wins
+            algorithm = autotune(padded, w, self.stride, out, cols, self.pad)
+            if algorithm != "im2col":
+                cols = None
+
+        def forward(a_prev):
+            batch = a_prev.shape[0]
+            if self.pad != 0:
+                padded[:batch, self.pad: -self.pad, self.pad: -self.pad, :] = a_prev
+                a_prev = padded[:batch]
+
+            if self.groups == 1:
+                z = convolve(a_prev, w, self.stride, out[:batch], algorithm, None if cols is None else cols[:batch])
+            else:
+                z = self.convolve_groups(a_prev, w, out[:batch], cols[:batch])
+            return kernels.bias_activation(z, b, self.activation, out=z)
+
+        return forward
+
     def backward(self, da):
-        batch_size = da.shape[0]
-        a_prev, z, a = (self.cache[key] for key in ("a_prev", "z", "a"))
-        a_prev_pad = Conv.zero_pad(a_prev, self.pad) if self.pad != 0 else a_prev
+        z, a = unpack(self.cache["z"]), unpack(self.cache["a"])
+        dz = self.workspace.get("dz", da.shape, da.dtype)
+        dz = self.activation.backward(da, {"z": z, "a": a}, out=dz)
+
+        return self.backward_dz(dz)
+
+    def backward_dz(self, dz):
+        batch_size = dz.shape[0]
+        a_prev_pad = self.cached_input()
 
-        da_prev = np.zeros(
-            (batch_size, self.n_h_prev, self.n_w_prev, self.n_c_prev)
-        ).astype("float32")
-        da_prev_pad = Conv.zero_pad(da_prev, self.pad) if self.pad != 0 else da_prev
+        # Windows overlap and padding is accumulated into too, the whole buffer is zeroed every step
+        # dz is the gradient of the next layer's input itself when there is no activation
+        da_prev_pad = self.workspace.get("da_prev_pad", a_prev_pad.shape, dz.dtype, avoid=(dz,))
+        da_prev_pad.fill(0)
 
-        dz = da * self.activation.df(z, cached_y=a)
-        dz = dz.astype("float32")
         db = 1 / batch_size * dz.sum(axis=(0, 1, 2))
-        db = db.astype("float32")
-        dw = np.zeros((self.kernel_size, self.kernel_size, self.n_c_prev, self.n_c))
-        dw = dw.astype("float32")
-
-        # 'Convolve' back
-        for i in range(self.n_h):
-            v_start = self.stride * i
-            v_end = v_start + self.kernel_size
-
-            for j in range(self.n_w):
-                h_start = self.stride * j
-                h_end = h_start + self.kernel_size
-
-                da_prev_pad[:, v_start:v_end, h_start:h_end, :] += np.sum(
-                    self.w[np.newaxis, :, :, :, :] * dz[:, i: i + 1, j: j + 1, np.newaxis, :],
-                    axis=4,
-                )
+        w_col = self.w.reshape(-1, self.n_c)
+        cols = self.cols(batch_size, a_prev_pad.dtype)
+        dcols = self.workspace.get("dcols", cols.shape, dz.dtype)
+        dw = self.workspace.get("dw", w_col.shape, dz.dtype)
+        group_in, group_out = self.n_c_prev // self.groups, self.n_c // self.groups
+        # Columns of a group's filters are strided in dw, their gradients are computed in a contiguous buffer first
+        dw_group = self.workspace.get("dw_group", (w_col.shape[0], group_out), dz.dtype) if self.groups > 1 else None
 
-                dw += np.sum(
-                    a_prev_pad[:, v_start:v_end, h_start:h_end, :, np.newaxis] * dz[:, i: i + 1, j: j + 1, np.newaxis, :],  # noqa: W503
-                    axis=0,
-                )
+        for g in range(self.groups):
+            # Each group's windows are unrolled in turn and only take the gradients of the group's filters
+            c_prev, c = slice(g * group_in, (g + 1) * group_in), slice(g * group_out, (g + 1) * group_out)
+            dz_group, w_group = dz[:, :, :, c], w_col[:, c]
+
+            def convolve_back(start, stop):
+                # 'Convolve' back, the windows are unrolled again instead of being cached
+                im2col(a_prev_pad[start:stop, :, :, c_prev], self.kernel_size, self.stride, self.n_h, self.n_w, out=cols[start:stop])
+                np.dot(dz_group[start:stop].reshape(-1, group_out), w_group.T, out=dcols[start:stop].reshape(-1, w_col.shape[0]))
+                col2im(dcols[start:stop], da_prev_pad[start:stop, :, :, c_prev], self.kernel_size, self.stride)
 
+            parallel_for(batch_size, convolve_back)
+
+            # Every shard's windows are unrolled in the same buffer, a single product gives the weights' gradients
+            if self.groups == 1:
+                np.dot(cols.reshape(-1, w_col.shape[0]).T, dz.reshape(-1, self.n_c), out=dw)
+            else:
+                np.dot(cols.reshape(-1, w_col.shape[0]).T, dz_group.reshape(-1, group_out), out=dw_group)
+                dw[:, c] = dw_group
         dw /= batch_size
 
+        da_prev = da_prev_pad
         if self.pad != 0:
             da_prev = da_prev_pad[:, self.pad: -self.pad, self.pad: -self.pad, :]
 
-        return da_prev, dw, db
+        return da_prev, dw.reshape(self.w.shape), db
+
+    def cached_input(self):
+        """
+        Returns the cached input of the forward pass, decompressed and padded in scratch buffers if needed.
+        """
+        a_prev = self.cache["a_prev"]
+        if not isinstance(a_prev, np.ndarray):
+            # Decompress into a scratch buffer
+            a_prev = unpack(a_prev, out=self.workspace.get("a_prev", a_prev.shape, a_prev.dtype))
+        return self.workspace.pad("a_prev_pad", a_prev, self.pad) if self.pad != 0 else a_prev
+
+    def convolve_groups(self, a_prev_padded, w, out, cols):
+        """
+        Convolves each group of input channels with its own filters, unrolling the windows of one group at a time.
+        """
+        w_col = w.reshape(-1, self.n_c)
+        group_in, group_out = self.n_c_prev // self.groups, self.n_c // self.groups
+
+        for g in range(self.groups):
+            c_prev, c = slice(g * group_in, (g + 1) * group_in), slice(g * group_out, (g + 1) * group_out)
+
+            def convolve_group(start, stop):
+                shard_cols = im2col(
+                    a_prev_padded[start:stop, :, :, c_prev], self.kernel_size, self.stride, self.n_h, self.n_w, out=cols[start:stop]
+                )
+                out[start:stop, :, :, c] = np.dot(shard_cols, w_col[:, c]).reshape(stop - start, self.n_h, self.n_w, group_out)
+
+            parallel_for(a_prev_padded.shape[0], convolve_group)
+
+        return out
+
+    def cols(self, batch_size, dtype):
+        """
+        Returns the scratch buffer the windows of a batch, or of one group of channels, are unrolled in.
+        """
+        return self.workspace.get(
+            "cols", (batch_size, self.n_h, self.n_w, self.kernel_size, self.kernel_size, self.n_c_prev // self.groups), dtype
+        )
 
     def get_output_dim(self):
         return self.n_h, self.n_w, self.n_c
 
+    def get_config(self):
+        return {
+            "kernel_size": self.kernel_size,
+            "stride": self.stride,
+            "n_c": self.n_c,
+            "padding": self.padding,
+            "activation": type(self.activation).__name__.lower(),
+            "algorithm": self.algorithm,
+            "groups": self.groups,
+        }
+
+    def get_workspace_size(self):
+        # Unrolled windows, padded input and pre-activation output
+        cols = self.n_h * self.n_w * self.kernel_size * self.kernel_size * self.n_c_prev // self.groups
+        padded = (self.n_h_prev + 2 * self.pad) * (self.n_w_prev + 2 * self.pad) * self.n_c_prev
+        return cols + padded + self.n_h * self.n_w * self.n_c
+
+    def folded(self, scale, shift):
+        """
+        Returns a copy of the layer whose pre-activation output is scaled then shifted, per channel,
+        through its weights and biases, e.g. to fold a following `BatchNorm` into it.
+        """
+        layer = copy.copy(self)
+        layer.w = self.w * scale
+        layer.b = self.b * scale + shift
+        return layer
+
     def update_params(self, dw, db):
         self.w -= dw
         self.b -= db
@@ -1,7 +1,13 @@
+import copy
+
 import numpy as np
 
-from ..activations import SoftMax, identity, relu, sigmoid, softmax
+from ..activations import identity, relu, sigmoid, softmax
+from ..backend import floatx
 from ..base import BaseLayer
+from ..kernels import kernel_backend
+from ..utils.compression import unpack
+from ..utils.workspace import Workspace
 
 
 class Dense(BaseLayer):
@@ -12,14 +18,16 @@ class Dense(BaseLayer):
         Number of neurons.
     activation : Activation
         Neurons' activation's function.
-    is_softmax : bool
-        Whether or not the activation is softmax.
     cache : dict
         Cache.
     w : numpy.ndarray
         Weights.
     b : numpy.ndarray
         Biases.
+    workspace : Workspace
+        Scratch buffers reused across training steps, shared with the other layers of a model.
+    cache_compression : CacheCompression
+        Policy storing the cache in smaller representations, None to keep it as is.
     """
 
     def __init__(self, size, activation):
@@ -38,46 +46,79 @@ class Dense(BaseLayer):
                 raise (ValueError(f"The activation '{activation}' is not supported"))
         else:
             self.activation = activation
-        self.is_softmax = isinstance(self.activation, SoftMax)
         self.cache = {}
+        self.workspace = Workspace()
+        self.cache_compression = None
         self.w = None
         self.b = None
 
     def init(self, in_dim):
         # He initialization
-        self.w = np.random.randn(self.size, in_dim) * np.sqrt(2 / in_dim)
+        self.w = (np.random.randn(self.size, in_dim) * np.sqrt(2 / in_dim)).astype(floatx())
 
-        self.b = np.zeros((1, self.size))
+        self.b = np.zeros((1, self.size), dtype=floatx())
 
     def forward(self, a_prev, training):
-        z = np.dot(a_prev, self.w.T) + self.b
-        a = self.activation.f(z)
+        z = np.dot(a_prev, self.w.T)
+        a = kernel_backend().bias_activation(z, self.b, self.activation)
 
         if training:
             # Cache for backward pass
-            self.cache.update({"a_prev": a_prev, "z": z, "a": a})
+            if self.cache_compression is None:
+                self.cache.update({"a_prev": a_prev, "z": z, "a": a})
+            else:
+                self.cache.update(self.cache_compression.pack_cache(self.activation, a_prev, z, a))
 
         return a
 
+    def freeze(self, batch_size):
+        # Transposed weights are made contiguous once, the product is written straight into the output
+        w_t = np.ascontiguousarray(self.w.T)
+        b = self.b.copy()
+        out = np.empty((batch_size, self.size), dtype=w_t.dtype)
+        kernels = kernel_backend()
+
+        def forward(a_prev):
+            a = out[: a_prev.shape[0]]
+            np.dot(a_prev, w_t, out=a)
+            return kernels.bias_activation(a, b, self.activation, out=a)
+
+        return forward
+
     def backward(self, da):
-        a_prev, z, a = (self.cache[key] for key in ("a_prev", "z", "a"))
-        batch_size = a_prev.shape[0]
+        z, a = unpack(self.cache["z"]), unpack(self.cache["a"])
+        dz = self.workspace.get("dz", da.shape, da.dtype)
+        dz = self.activation.backward(da, {"z": z, "a": a}, out=dz)
 
-        if self.is_softmax:
-            # Get back y from the gradient wrt the cost of this layer's activations
-            # That is get back y from - y/a = da
-            y = da * (-a)
+        return self.backward_dz(dz)
 
-            dz = a - y
-        else:
-            dz = da * self.activation.df(z, cached_y=a)
+    def backward_dz(self, dz):
+        a_prev = self.cache["a_prev"]
+        if not isinstance(a_prev, np.ndarray):
+            # Decompress into a scratch buffer
+            a_prev = unpack(a_prev, out=self.workspace.get("a_prev", a_prev.shape, a_prev.dtype))
+        batch_size = a_prev.shape[0]
 
-        dw = 1 / batch_size * np.dot(dz.T, a_prev)
+        dw = self.workspace.get("dw", self.w.shape, dz.dtype)
+        np.dot(dz.T, a_prev, out=dw)
+        dw *= 1 / batch_size
         db = 1 / batch_size * dz.sum(axis=0, keepdims=True)
-        da_prev = np.dot(dz, self.w)
+        # dz is the gradient of the next layer's input itself when there is no activation
+        da_prev = self.workspace.get("da_prev", a_prev.shape, dz.dtype, avoid=(dz,))
+        np.dot(dz, self.w, out=da_prev)
 
         return da_prev, dw, db
 
+    def folded(self, scale, shift):
+        """
+        Returns a copy of the layer whose pre-activation output is scaled then shifted, per neuron,
+        through its weights and biases, e.g. to fold a following `BatchNorm` into it.
+        """
+        layer = copy.copy(self)
+        layer.w = self.w * scale[:, np.newaxis]
+        layer.b = self.b * scale + shift
+        return layer
+
     def update_params(self, dw, db):
         self.w -= dw
         self.b -= db
@@ -87,3 +128,10 @@ class Dense(BaseLayer):
 
     def get_output_dim(self):
         return self.size
+
+    def get_config(self):
+        return {"size": self.size, "activation": type(self.activation).__name__.lower()}
+
+    def get_workspace_size(self):
+        # Pre-activation output
+        return self.size
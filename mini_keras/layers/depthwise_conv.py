@@ -0,0 +1,162 @@
+import numpy as np
+
+from .conv2D import Conv
+from ..activations import identity
+from ..backend import parallel_for
+from ..kernels import kernel_backend
+from ..utils.conv_utils import depthwise_conv, depthwise_conv_backward
+
+
+class DepthwiseConv(Conv):
+    """2D depthwise convolutional layer, convolving each input channel with its own filters.
+    It is a `Conv` with as many groups as input channels, whose weights share the same layout,
+    of shape (kernel_size, kernel_size, 1, n_c_prev * depth_multiplier). Its windows are never unrolled.
+    Attributes
+    ----------
+    depth_multiplier : int
+        Number of filters of each input channel, the output volume has n_c_prev * depth_multiplier channels.
+    """
+
+    def __init__(self, kernel_size, stride, depth_multiplier=1, padding="valid", activation=identity):
+        super().__init__(kernel_size, stride, None, padding, activation)
+        self.depth_multiplier = depth_multiplier
+
+    def init(self, in_dim):
+        self.groups = in_dim[2]
+        self.n_c = in_dim[2] * self.depth_multiplier
+        super().init(in_dim)
+
+    def forward(self, a_prev, training):
+        a_prev_padded = self.workspace.pad("a_prev_pad", a_prev, self.pad) if self.pad != 0 else a_prev
+
+        z = self.convolve(a_prev_padded, self.w)
+        a = kernel_backend().bias_activation(z, self.b, self.activation)
+
+        if training:
+            # Cache for backward pass
+            if self.cache_compression is None:
+                self.cache.update({"a_prev": a_prev, "z": z, "a": a})
+            else:
+                self.cache.update(self.cache_compression.pack_cache(self.activation, a_prev, z, a))
+
+        return a
+
+    def convolve(self, a_prev_padded, w, out=None, scratch=None):
+        """
+        Convolves each channel of a padded input with its filters, into `out` when given.
+        `scratch` is an optional buffer of `scratch_shape(batch_size)` for the intermediate products.
+        """
+        if out is None:
+            out = np.empty(
+                (a_prev_padded.shape[0], self.n_h, self.n_w, self.n_c_prev * self.depth_multiplier),
+                dtype=np.result_type(a_prev_padded, w),
+            )
+        w = self.depthwise_weights(w)
+
+        def convolve(start, stop):
+            depthwise_conv(a_prev_padded[start:stop], w, self.stride, out[start:stop], None if scratch is None else scratch[:, start:stop])
+
+        parallel_for(a_prev_padded.shape[0], convolve)
+
+        return out
+
+    def scratch_shape(self, batch_size):
+        """
+        Shape of the buffer `convolve` uses for the intermediate products of `batch_size` samples, see `depthwise_conv`.
+        """
+        return 1 if self.depth_multiplier == 1 else self.depth_multiplier + 1, batch_size, self.n_h, self.n_w, self.n_c_prev
+
+    def convolve_back(self, dz, a_prev_pad, w, dw):
+        """
+        Backpropagates through the depthwise convolution.
+        Parameters
+        ----------
+        dz : numpy.ndarray
+            The gradients wrt the cost of the depthwise convolution's output.
+        a_prev_pad : numpy.ndarray
+            The padded input.
+        w : numpy.ndarray
+            The depthwise weights, shaped like `w`.
+        dw : numpy.ndarray
+            Buffer for the weights' gradients, shaped like `w` and averaged over the batch.
+        Returns
+        -------
+        numpy.ndarray
+            The gradients wrt the cost of the input.
+        """
+        batch_size = dz.shape[0]
+        # Windows overlap and padding is accumulated into too, the whole buffer is zeroed every step
+        da_prev_pad = self.workspace.get("da_prev_pad", a_prev_pad.shape, dz.dtype, avoid=(dz,))
+        da_prev_pad.fill(0)
+        w = self.depthwise_weights(w)
+
+        def convolve_back(start, stop):
+            # Each shard sums its own weights' gradients
+            shard_dw = np.empty(w.shape, dtype=dz.dtype)
+            depthwise_conv_backward(
+                a_prev_pad[start:stop], dz[start:stop], w, self.stride, da_prev_pad[start:stop], shard_dw
+            )
+            return shard_dw
+
+        shard_dws = parallel_for(batch_size, convolve_back)
+        dw_depthwise = self.depthwise_weights(dw)
+        np.copyto(dw_depthwise, shard_dws[0])
+        for shard_dw in shard_dws[1:]:
+            dw_depthwise += shard_dw
+        dw /= batch_size
+
+        if self.pad != 0:
+            return da_prev_pad[:, self.pad: -self.pad, self.pad: -self.pad, :]
+        return da_prev_pad
+
+    def backward_dz(self, dz):
+        batch_size = dz.shape[0]
+        a_prev_pad = self.cached_input()
+
+        db = 1 / batch_size * dz.sum(axis=(0, 1, 2))
+        dw = self.workspace.get("dw", self.w.shape, dz.dtype)
+        da_prev = self.convolve_back(dz, a_prev_pad, self.w, dw)
+
+        return da_prev, dw, db
+
+    def freeze(self, batch_size):
+        w = np.ascontiguousarray(self.w)
+        b = self.b.copy()
+        kernels = kernel_backend()
+        # Borders of the padded input are zeroed once and never written
+        padded = np.zeros(
+            (batch_size, self.n_h_prev + 2 * self.pad, self.n_w_prev + 2 * self.pad, self.n_c_prev), dtype=w.dtype
+        )
+        out = np.empty((batch_size, self.n_h, self.n_w, self.n_c), dtype=w.dtype)
+        scratch = np.empty(self.scratch_shape(batch_size), dtype=w.dtype)
+
+        def forward(a_prev):
+            batch = a_prev.shape[0]
+            if self.pad != 0:
+                padded[:batch, self.pad: -self.pad, self.pad: -self.pad, :] = a_prev
+                a_prev = padded[:batch]
+
+            z = self.convolve(a_prev, w, out[:batch], scratch[:, :batch])
+            return kernels.bias_activation(z, b, self.activation, out=z)
+
+        return forward
+
+    def depthwise_weights(self, w):
+        """
+        Returns a (kernel_size, kernel_size, n_c_prev, depth_multiplier) view of depthwise weights.
+        """
+        return w.reshape(self.kernel_size, self.kernel_size, self.n_c_prev, self.depth_multiplier)
+
+    def get_config(self):
+        return {
+            "kernel_size": self.kernel_size,
+            "stride": self.stride,
+            "depth_multiplier": self.depth_multiplier,
+            "padding": self.padding,
+            "activation": type(self.activation).__name__.lower(),
+        }
+
+    def get_workspace_size(self):
+        # Padded input, pre-activation output and the product of each kernel offset
+        padded = (self.n_h_prev + 2 * self.pad) * (self.n_w_prev + 2 * self.pad) * self.n_c_prev
+        return padded + 2 * self.n_h * self.n_w * self.n_c_prev * self.depth_multiplier
@@ -0,0 +1,124 @@
+import numpy as np
+
+from ..base import BaseLayer
+from ..utils.compression import PackedMask
+from ..utils.workspace import Workspace
+
+
+class Dropout(BaseLayer):
+    """Inverted dropout layer. When training, every input is zeroed with probability `rate` and the others
+    are scaled by 1 / (1 - rate), so that nothing changes at inference, where the layer returns its input.
+    Masks are drawn from a `numpy.random.Generator` and cached for the backward pass as bitmasks, 1 bit per element.
+    Attributes
+    ----------
+    rate : float
+        Fraction of the inputs to drop, between 0 and 1.
+    seed : int
+        Seed of the masks' generator. Drawn from NumPy's global random state when None,
+        so that `np.random.seed` makes training reproducible.
+    rng : numpy.random.Generator
+        Generator of the masks.
+    replay_state : dict
+        State of the generator before drawing the last mask, to draw it again when recomputing the forward pass.
+    cache : dict
+        Cache.
+    workspace : Workspace
+        Scratch buffers reused across training steps, shared with the other layers of a model.
+    """
+
+    def __init__(self, rate, seed=None):
+        super().__init__()
+        if not 0 <= rate < 1:
+            raise ValueError(f"The dropout rate must be in [0, 1), got {rate}")
+
+        self.rate = rate
+        self.seed = seed
+        self.rng = np.random.default_rng(np.random.randint(2 ** 31) if seed is None else seed)
+        self.replay_state = None
+        self.in_dim = None
+        self.cache = {}
+        self.workspace = Workspace()
+
+    def init(self, in_dim):
+        self.in_dim = in_dim
+
+    def forward(self, a_prev, training):
+        if not training or self.rate == 0:
+            return a_prev
+
+        self.replay_state = self.rng.bit_generator.state
+        return self.drop(a_prev, self.rng)
+
+    def recompute(self, a_prev):
+        if self.rate == 0:
+            return a_prev
+
+        # Replay the mask of the first forward pass, without moving the generator
+        rng = np.random.Generator(type(self.rng.bit_generator)())
+        rng.bit_generator.state = self.replay_state
+        return self.drop(a_prev, rng)
+
+    def drop(self, a_prev, rng):
+        """
+        Draws a mask, caches it and applies it to the input.
+        """
+        # Uniform samples are drawn in place, in single precision, which is twice as fast as double
+        uniform = self.workspace.get("uniform", a_prev.shape, np.float32)
+        rng.random(dtype=np.float32, out=uniform)
+        mask = self.workspace.get("mask", a_prev.shape, bool)
+        np.greater_equal(uniform, self.rate, out=mask)
+        self.cache["mask"] = PackedMask(mask)
+
+        a = np.multiply(a_prev, mask)
+        a *= 1 / (1 - self.rate)
+        return a
+
+    def backward(self, da):
+        if self.rate == 0:
+            return da, None, None
+
+        mask = self.cache["mask"].unpack(out=self.workspace.get("mask", da.shape, bool))
+        da_prev = self.workspace.get("da_prev", da.shape, da.dtype, avoid=(da,))
+        np.multiply(da, mask, out=da_prev)
+        da_prev *= 1 / (1 - self.rate)
+
+        return da_prev, None, None
+
+    def freeze(self, batch_size):
+        return lambda a_prev: a_prev
+
+    def get_params(self):
+        pass
+
+    def update_params(self, dw, db):
+        pass
+
+    def get_state(self):
+        # The generator's 128 bits state and increment, so that a resumed training draws the same masks
+        state = self.rng.bit_generator.state
+        return {
+            "rng": np.array(
+                [
+                    *divmod(state["state"]["state"], 2 ** 64),
+                    *divmod(state["state"]["inc"], 2 ** 64),
+                    state["has_uint32"],
+                    state["uinteger"],
+                ],
+                dtype=np.uint64,
+            )
+        }
+
+    def set_state(self, state):
+        state_hi, state_lo, inc_hi, inc_lo, has_uint32, uinteger = (int(x) for x in state["rng"])
+        self.rng.bit_generator.state = {
+            "bit_generator": type(self.rng.bit_generator).__name__,
+            "state": {"state": state_hi * 2 ** 64 + state_lo, "inc": inc_hi * 2 ** 64 + inc_lo},
+            "has_uint32": has_uint32,
+            "uinteger": uinteger,
+        }
+
+    def get_output_dim(self):
+        return self.in_dim
+
+    def get_config(self):
+        return {"rate": self.rate, "seed": self.seed}
@@ -36,3 +36,6 @@ class Flatten(BaseLayer):
 
     def get_output_dim(self):
         return self.output_dim
+
+    def get_config(self):
+        return {}
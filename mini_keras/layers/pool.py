@@ -1,17 +1,22 @@
 import numpy as np
 
+from ..backend import floatx, parallel_for
 from ..base import BaseLayer
+from ..kernels import kernel_backend
+from ..utils.conv_utils import col2im, get_windows
+from ..utils.workspace import Workspace
 
 
 class Pool(BaseLayer):
     """2D pooling layer.
-    Supports both max and average pooling.
+    Supports max and average pooling, over sliding windows or over the whole input volume.
     Attributes
     ----------
     pool_size : int
-        Height and Width of the 2D pooling window.
+        Height and Width of the 2D pooling window. Unused by the global modes.
     stride : int
         Stride along height and width of the input volume on which the pooling operation is applied.
+        Unused by the global modes.
     n_h : int
         Height of the output volume.
     n_w : int
@@ -29,13 +34,20 @@ class Pool(BaseLayer):
     b : numpy.ndarray
         Biases.
     mode : str
-        Pooling mode, either max or average.
+        Pooling mode, either max, average, global_max or global_average.
     cache : dict
-        Cache.
+        Cache. In max modes it only holds the position of the maximum inside each window.
+    workspace : Workspace
+        Scratch buffers reused across training steps, shared with the other layers of a model.
     """
 
-    def __init__(self, pool_size, stride, mode):
+    modes = ("max", "average", "global_max", "global_average")
+
+    def __init__(self, pool_size=None, stride=None, mode="max"):
         super().__init__()
+        if mode not in Pool.modes:
+            raise NotImplementedError("Invalid type of pooling")
+
         self.pool_size = pool_size
         self.stride = stride
         self.n_h, self.n_w, self.n_c = None, None, None
@@ -44,95 +56,198 @@ class Pool(BaseLayer):
         self.b = None
         self.mode = mode
         self.cache = {}
+        self.workspace = Workspace()
 
     def init(self, in_dim):
         self.n_h_prev, self.n_w_prev, self.n_c_prev = in_dim
-        self.n_h = int((self.n_h_prev - self.pool_size) / self.stride + 1)
-        self.n_w = int((self.n_w_prev - self.pool_size) / self.stride + 1)
+        if self.is_global:
+            self.n_h, self.n_w = 1, 1
+        else:
+            self.n_h = int((self.n_h_prev - self.pool_size) / self.stride + 1)
+            self.n_w = int((self.n_w_prev - self.pool_size) / self.stride + 1)
         self.n_c = self.n_c_prev
 
+    @property
+    def is_global(self):
+        return self.mode.startswith("global")
+
+    @property
+    def is_overlapping(self):
+        return self.stride != self.pool_size
+
     def forward(self, a_prev, training):
+        if self.mode == "max" and kernel_backend().parallel:
+            # The kernel splits the batch itself
+            shards = [self.pool(a_prev, training)]
+        else:
+            shards = parallel_for(
+                a_prev.shape[0], lambda start, stop: self.pool(a_prev[start:stop], training)
+            )
+        a = join_shards([a for a, _ in shards])
+
+        if training and self.mode in ("max", "global_max"):
+            # Cache for backward pass
+            self.cache["idx"] = join_shards([idx for _, idx in shards])
+
+        return a
+
+    def pool(self, a_prev, training):
+        """
+        Pools a shard of the batch.
+        Returns
+        -------
+        tuple
+            The pooled shard and, in max modes when training, the position of the maximum in each window.
+        """
         batch_size = a_prev.shape[0]
-        a = np.zeros((batch_size, self.n_h, self.n_w, self.n_c)).astype("float32")
+        windows = self.windows(a_prev)
 
-        # Pool
-        for i in range(self.n_h):
-            v_start = i * self.stride
-            v_end = v_start + self.pool_size
+        if self.mode in ("average", "global_average"):
+            return windows.mean(axis=self.window_axis), None
 
-            for j in range(self.n_w):
-                h_start = j * self.stride
-                h_end = h_start + self.pool_size
+        if self.mode == "max":
+            # Reduced straight from the input by the kernel, no copy of the windows
+            a = np.empty((batch_size, self.n_h, self.n_w, self.n_c), dtype=a_prev.dtype)
+            if not training:
+                return kernel_backend().max_pool(a_prev, self.pool_size, self.stride, a), None
 
-                if self.mode == "max":
-                    a_prev_slice = a_prev[:, v_start:v_end, h_start:h_end, :]
+            idx = np.empty(a.shape, dtype=np.min_scalar_type(self.window_size - 1))
+            kernel_backend().max_pool(a_prev, self.pool_size, self.stride, a, idx)
+            return a, idx[:, :, :, np.newaxis, :]
+
+        if not training:
+            return windows.max(axis=self.window_axis), None
+
+        # Keep the argmax of every window instead of a dense mask
+        windows = windows.reshape(batch_size, self.n_h, self.n_w, -1, self.n_c)
+        idx = np.argmax(windows, axis=3)[:, :, :, np.newaxis, :]
+        a = np.take_along_axis(windows, idx, axis=3)[:, :, :, 0, :]
+
+        return a, idx.astype(np.min_scalar_type(windows.shape[3] - 1))
+
+    def windows(self, a_prev):
+        """
+        Returns a view of the pooling windows of the input, of shape
+        (batch_size, n_h, n_w, pool_size, pool_size, n_c) or (batch_size, 1, 1, window_size, n_c) in global modes.
+        """
+        if self.is_global:
+            # The whole input volume is a single window
+            return a_prev.reshape(a_prev.shape[0], 1, 1, -1, self.n_c)
+        if self.is_overlapping:
+            return get_windows(a_prev, self.pool_size, self.stride, self.n_h, self.n_w)
 
-                    if training:
-                        # Cache for backward pass
-                        self.cache_max_mask(a_prev_slice, (i, j))
+        # Windows tile the input, a reshape is enough to expose them
+        return self.blocks(a_prev).transpose(0, 1, 3, 2, 4, 5)
 
-                    a[:, i, j, :] = np.max(a_prev_slice, axis=(1, 2))
+    @property
+    def window_size(self):
+        return self.n_h_prev * self.n_w_prev if self.is_global else self.pool_size ** 2
 
-                elif self.mode == "average":
-                    a[:, i, j, :] = np.mean(
-                        a_prev[:, v_start:v_end, h_start:h_end, :], axis=(1, 2)
-                    )
+    @property
+    def window_axis(self):
+        return 3 if self.is_global else (3, 4)
 
+    def freeze(self, batch_size):
+        out = np.empty((batch_size, self.n_h, self.n_w, self.n_c), dtype=floatx())
+        average = self.mode in ("average", "global_average")
+        kernels = kernel_backend()
+
+        def forward(a_prev):
+            def pool(start, stop):
+                if self.mode == "max":
+                    kernels.max_pool(a_prev[start:stop], self.pool_size, self.stride, out[start:stop])
+                elif average:
+                    # np.mean allocates a temporary even with out
+                    np.sum(self.windows(a_prev[start:stop]), axis=self.window_axis, out=out[start:stop])
+                    out[start:stop] /= self.window_size
                 else:
-                    raise NotImplementedError("Invalid type of pooling")
+                    np.max(self.windows(a_prev[start:stop]), axis=self.window_axis, out=out[start:stop])
 
-        if training:
-            self.cache["a_prev"] = a_prev
+            if self.mode == "max" and kernels.parallel:
+                pool(0, a_prev.shape[0])
+            else:
+                parallel_for(a_prev.shape[0], pool)
+            return out[: a_prev.shape[0]]
 
-        return a
+        return forward
 
     def backward(self, da):
-        a_prev = self.cache["a_prev"]
-        a_prev = a_prev.astype("float32")
-        batch_size = a_prev.shape[0]
-        da_prev = np.zeros(
-            (batch_size, self.n_h_prev, self.n_w_prev, self.n_c_prev)
-        ).astype("float32")
+        batch_size = da.shape[0]
+        da_prev = self.workspace.get("da_prev", (batch_size, self.n_h_prev, self.n_w_prev, self.n_c_prev), da.dtype, avoid=(da,))
+        idx = self.cache.get("idx")
+        dcols = None
+        if idx is not None:
+            dcols = self.workspace.get("dcols", (*idx.shape[:3], self.window_size, self.n_c), da.dtype)
 
-        # 'Pool' back
-        for i in range(self.n_h):
-            v_start = i * self.stride
-            v_end = v_start + self.pool_size
+        def unpool(start, stop):
+            if idx is None:
+                self.unpool(da[start:stop], None, da_prev[start:stop], None)
+            else:
+                self.unpool(da[start:stop], idx[start:stop], da_prev[start:stop], dcols[start:stop])
 
-            for j in range(self.n_w):
-                h_start = j * self.stride
-                h_end = h_start + self.pool_size
+        parallel_for(batch_size, unpool)
 
-                if self.mode == "max":
-                    da_prev[:, v_start:v_end, h_start:h_end, :] += (
-                        da[:, i: i + 1, j: j + 1, :] * self.cache[(i, j)]
-                    )
-
-                elif self.mode == "average":
-                    # Distribute the average value back
-                    mean_value = np.copy(da[:, i: i + 1, j: j + 1, :])
-                    mean_value[:, :, :, np.arange(mean_value.shape[-1])] /= (
-                        self.pool_size * self.pool_size
-                    )
-                    da_prev[:, v_start:v_end, h_start:h_end, :] += mean_value
+        return da_prev, None, None
 
-                else:
-                    raise NotImplementedError("Invalid type of pooling")
+    def unpool(self, da, idx, da_prev, dcols):
+        """
+        Routes the gradients of a shard of the batch back to the windows they come from.
+        Parameters
+        ----------
+        da : numpy.ndarray
+            The gradients wrt the cost of the shard's activations.
+        idx : numpy.ndarray
+            Position of the maximum in each window, in max modes.
+        da_prev : numpy.ndarray
+            The gradients wrt the cost of the shard's input, overwritten.
+        dcols : numpy.ndarray
+            Scratch buffer of shape (batch_size, n_h, n_w, window_size, n_c) for the gradients of each window, in max modes.
+        """
+        batch_size = da.shape[0]
+        window_size = self.window_size
 
-        return da_prev, None, None
+        if not self.is_global:
+            # Windows may overlap or leave out the input's last rows and columns
+            da_prev.fill(0)
+
+        if self.mode in ("max", "global_max"):
+            dcols.fill(0)
+            np.put_along_axis(dcols, idx, da[:, :, :, np.newaxis, :], axis=3)
+        else:
+            # Distribute the average value back
+            dcols = np.broadcast_to(
+                da[:, :, :, np.newaxis, :] / window_size,
+                (batch_size, self.n_h, self.n_w, window_size, self.n_c),
+            )
 
-    def cache_max_mask(self, x, ij):
-        mask = np.zeros_like(x)
+        if self.is_global:
+            da_prev[...] = dcols.reshape(da_prev.shape)
+            return
 
-        # This would be like doing idx = np.argmax(x, axis=(1,2)) if that was possible
-        reshaped_x = x.reshape(x.shape[0], x.shape[1] * x.shape[2], x.shape[3])
-        idx = np.argmax(reshaped_x, axis=1)
+        dcols = dcols.reshape(
+            batch_size, self.n_h, self.n_w, self.pool_size, self.pool_size, self.n_c
+        )
+        if self.is_overlapping:
+            col2im(dcols, da_prev, self.pool_size, self.stride)
+        else:
+            self.blocks(da_prev)[...] = dcols.transpose(0, 1, 3, 2, 4, 5)
 
-        ax1, ax2 = np.indices((x.shape[0], x.shape[3]))
-        mask.reshape(mask.shape[0], mask.shape[1] * mask.shape[2], mask.shape[3])[
-            ax1, idx, ax2
-        ] = 1
-        self.cache[ij] = mask
+    def blocks(self, x):
+        """
+        Splits the input in non overlapping pooling windows.
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Volume of shape (batch_size, n_h_prev, n_w_prev, n_c_prev).
+        Returns
+        -------
+        numpy.ndarray
+            View of shape (batch_size, n_h, pool_size, n_w, pool_size, n_c).
+        """
+        n_h, n_w, size = self.n_h, self.n_w, self.pool_size
+        return x[:, : n_h * size, : n_w * size, :].reshape(
+            x.shape[0], n_h, size, n_w, size, x.shape[3]
+        )
 
     def update_params(self, dw, db):
         pass
@@ -142,3 +257,10 @@ class Pool(BaseLayer):
 
     def get_output_dim(self):
         return self.n_h, self.n_w, self.n_c
+
+    def get_config(self):
+        return {"pool_size": self.pool_size, "stride": self.stride, "mode": self.mode}
+
+
+def join_shards(shards):
+    return shards[0] if len(shards) == 1 else np.concatenate(shards)
@@ -0,0 +1,139 @@
+import copy
+
+import numpy as np
+
+from .depthwise_conv import DepthwiseConv
+from ..activations import identity
+from ..backend import floatx
+from ..kernels import kernel_backend
+from ..utils.compression import unpack
+
+
+class SeparableConv(DepthwiseConv):
+    """2D depthwise separable convolutional layer: a depthwise convolution of each input channel,
+    followed by a pointwise (1x1) convolution mixing the channels.
+    The depthwise and pointwise weights are stored one after the other in `w`, so that the layer has a
+    single weights array like every other one, see `split_weights`. The biases are the pointwise ones.
+    Attributes
+    ----------
+    filters : int
+        Number of pointwise filters, the number of channels of the output volume.
+    depth_multiplier : int
+        Number of depthwise filters of each input channel.
+    """
+
+    def __init__(self, kernel_size, stride, n_c, depth_multiplier=1, padding="valid", activation=identity):
+        super().__init__(kernel_size, stride, depth_multiplier, padding, activation)
+        self.filters = n_c
+
+    def init(self, in_dim):
+        super().init(in_dim)
+        depthwise = self.w
+        pointwise = np.random.randn(self.n_c, self.filters).astype(floatx())
+
+        self.n_c = self.filters
+        self.w = np.concatenate([depthwise.reshape(-1), pointwise.reshape(-1)])
+        self.b = np.zeros((1, 1, 1, self.n_c), dtype=floatx())
+
+    def forward(self, a_prev, training):
+        a_prev_padded = self.workspace.pad("a_prev_pad", a_prev, self.pad) if self.pad != 0 else a_prev
+        w_depthwise, w_pointwise = self.split_weights(self.w)
+
+        d = self.convolve(a_prev_padded, w_depthwise)
+        z = np.dot(d.reshape(-1, d.shape[-1]), w_pointwise).reshape(*d.shape[:3], self.n_c)
+        a = kernel_backend().bias_activation(z, self.b, self.activation)
+
+        if training:
+            # Cache for backward pass, the depthwise output is needed for the pointwise weights' gradients
+            if self.cache_compression is None:
+                self.cache.update({"a_prev": a_prev, "d": d, "z": z, "a": a})
+            else:
+                self.cache.update(self.cache_compression.pack_cache(self.activation, a_prev, z, a))
+                self.cache["d"] = self.cache_compression.pack(d)
+
+        return a
+
+    def backward_dz(self, dz):
+        batch_size = dz.shape[0]
+        a_prev_pad = self.cached_input()
+        d = self.cache["d"]
+        if not isinstance(d, np.ndarray):
+            # Decompress into a scratch buffer
+            d = unpack(d, out=self.workspace.get("d", d.shape, d.dtype))
+
+        db = 1 / batch_size * dz.sum(axis=(0, 1, 2))
+        w_depthwise, w_pointwise = self.split_weights(self.w)
+        dw = self.workspace.get("dw", self.w.shape, dz.dtype)
+        dw_depthwise, dw_pointwise = self.split_weights(dw)
+
+        # Pointwise convolution, a matrix product over every position
+        np.dot(d.reshape(-1, d.shape[-1]).T, dz.reshape(-1, self.n_c), out=dw_pointwise)
+        dw_pointwise /= batch_size
+        dd = self.workspace.get("dd", d.shape, dz.dtype)
+        np.dot(dz.reshape(-1, self.n_c), w_pointwise.T, out=dd.reshape(-1, dd.shape[-1]))
+
+        da_prev = self.convolve_back(dd, a_prev_pad, w_depthwise, dw_depthwise)
+
+        return da_prev, dw, db
+
+    def freeze(self, batch_size):
+        w_depthwise, w_pointwise = (np.ascontiguousarray(w) for w in self.split_weights(self.w))
+        b = self.b.copy()
+        kernels = kernel_backend()
+        # Borders of the padded input are zeroed once and never written
+        padded = np.zeros(
+            (batch_size, self.n_h_prev + 2 * self.pad, self.n_w_prev + 2 * self.pad, self.n_c_prev), dtype=b.dtype
+        )
+        d = np.empty((batch_size, self.n_h, self.n_w, w_pointwise.shape[0]), dtype=b.dtype)
+        scratch = np.empty(self.scratch_shape(batch_size), dtype=b.dtype)
+        out = np.empty((batch_size, self.n_h, self.n_w, self.n_c), dtype=b.dtype)
+
+        def forward(a_prev):
+            batch = a_prev.shape[0]
+            if self.pad != 0:
+                padded[:batch, self.pad: -self.pad, self.pad: -self.pad, :] = a_prev
+                a_prev = padded[:batch]
+
+            self.convolve(a_prev, w_depthwise, d[:batch], scratch[:, :batch])
+            z = out[:batch]
+            np.dot(d[:batch].reshape(-1, w_pointwise.shape[0]), w_pointwise, out=z.reshape(-1, self.n_c))
+            return kernels.bias_activation(z, b, self.activation, out=z)
+
+        return forward
+
+    def folded(self, scale, shift):
+        layer = copy.copy(self)
+        layer.w = self.w.copy()
+        # Only the pointwise convolution mixes into the output channels
+        layer.split_weights(layer.w)[1][...] *= scale
+        layer.b = self.b * scale + shift
+        return layer
+
+    def split_weights(self, w):
+        """
+        Splits weights laid out like `w` in views of the depthwise weights, shaped like a
+        (kernel_size, kernel_size, 1, n_c_prev * depth_multiplier) `DepthwiseConv` kernel,
+        and of the pointwise weights, of shape (n_c_prev * depth_multiplier, n_c).
+        """
+        n_c_depthwise = self.n_c_prev * self.depth_multiplier
+        depthwise_size = self.kernel_size * self.kernel_size * n_c_depthwise
+        return (
+            w[:depthwise_size].reshape(self.kernel_size, self.kernel_size, 1, n_c_depthwise),
+            w[depthwise_size:].reshape(n_c_depthwise, self.n_c),
+        )
+
+    def get_config(self):
+        return {
+            "kernel_size": self.kernel_size,
+            "stride": self.stride,
+            "n_c": self.filters,
+            "depth_multiplier": self.depth_multiplier,
+            "padding": self.padding,
+            "activation": type(self.activation).__name__.lower(),
+        }
+
+    def get_workspace_size(self):
+        # Padded input, depthwise output, its gradients and the product of each kernel offset
+        n_c_depthwise = self.n_c_prev * self.depth_multiplier
+        padded = (self.n_h_prev + 2 * self.pad) * (self.n_w_prev + 2 * self.pad) * self.n_c_prev
+        return padded + self.n_h * self.n_w * (3 * n_c_depthwise + self.n_c)
@@ -1,15 +1,17 @@
 import numpy as np
 
+from .activations import Sigmoid, SoftMax
 from .base import BaseCostFunction
 
 epsilon = 1e-20
 
 
 class SigmoidCrossEntropy(BaseCostFunction):
+    activation = Sigmoid
+
     def f(self, a_last, y):
         batch_size = y.shape[0]
-        # It would be better to have the logits and use this instead
-        # max(logits, 0) - logits * y + log(1 + exp(-abs(logits)))
+        # Prefer f_logits when the logits are available
         a_last = np.clip(a_last, epsilon, 1.0 - epsilon)
         cost = (
             -1 / batch_size * (y * np.log(a_last) + (1 - y) * np.log(1 - a_last)).sum()
@@ -20,8 +22,21 @@ class SigmoidCrossEntropy(BaseCostFunction):
         a_last = np.clip(a_last, epsilon, 1.0 - epsilon)
         return -(np.divide(y, a_last) - np.divide(1 - y, 1 - a_last))
 
+    def f_logits(self, z_last, y):
+        batch_size = y.shape[0]
+        # max(logits, 0) - logits * y + log(1 + exp(-abs(logits)))
+        cost = (
+            np.maximum(z_last, 0) - z_last * y + np.log1p(np.exp(-np.abs(z_last)))
+        ).sum()
+        return 1 / batch_size * cost
+
+    def grad_logits(self, a_last, y):
+        return a_last - y
+
 
 class SoftmaxCrossEntropy(BaseCostFunction):
+    activation = SoftMax
+
     def f(self, a_last, y):
         batch_size = y.shape[0]
         cost = -1 / batch_size * (y * np.log(np.clip(a_last, epsilon, 1.0))).sum()
@@ -30,6 +45,16 @@ class SoftmaxCrossEntropy(BaseCostFunction):
     def grad(self, a_last, y):
         return -np.divide(y, np.clip(a_last, epsilon, 1.0))
 
+    def f_logits(self, z_last, y):
+        batch_size = y.shape[0]
+        # log(softmax(z)) = z - max(z) - log(sum(exp(z - max(z))))
+        z_shifted = z_last - np.max(z_last, axis=1, keepdims=True)
+        log_sum_exp = np.log(np.sum(np.exp(z_shifted), axis=1, keepdims=True))
+        return 1 / batch_size * (y * (log_sum_exp - z_shifted)).sum()
+
+    def grad_logits(self, a_last, y):
+        return a_last - y
+
 
 # -- Assign to the short forms --
 softmax_cross_entropy = SoftmaxCrossEntropy()
@@ -0,0 +1,80 @@
+import numpy as np
+
+from ..activations import Identity
+from ..backend import floatx
+from ..layers.batch_norm import BatchNorm
+
+
+class FrozenModel:
+    """Inference only executor of a model, created by `Sequential.freeze`.
+    Every layer writes into buffers allocated once for `batch_size` samples, and no backward
+    pass state is kept. Parameters are captured when freezing, later updates are not seen.
+    BatchNorm layers are folded into the layers before them when possible, see `fold_batch_norm`.
+    The returned predictions are a view of the last layer's buffer, overwritten by the next call.
+    Attributes
+    ----------
+    batch_size : int
+        Maximum number of samples per call.
+    input_dim : int or tuple
+        Shape of a single input sample.
+    steps : list
+        Frozen forward pass of each layer.
+    """
+
+    def __init__(self, layers, input_dim, batch_size):
+        self.batch_size = batch_size
+        self.input_dim = input_dim
+        self.steps = [layer.freeze(batch_size) for layer in fold_batch_norm(layers)]
+
+    def predict(self, x):
+        """
+        Calculates the output of the model for the input.
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Input of at most `batch_size` samples.
+        Returns
+        -------
+        numpy.ndarray
+            Prediction of the model, valid until the next call.
+        """
+        if x.shape[0] > self.batch_size:
+            raise ValueError(f"Got {x.shape[0]} samples, the model was frozen for at most {self.batch_size}")
+
+        # No copy when the input already has the right dtype
+        a = np.asarray(x, dtype=floatx())
+        for step in self.steps:
+            a = step(a)
+
+        return a
+
+    __call__ = predict
+
+
+def fold_batch_norm(layers):
+    """
+    Folds the inference normalization of every `BatchNorm` directly following a layer without activation
+    into copies of that layer's weights and biases, so that it costs nothing. The layers are not modified.
+    Other BatchNorm layers are kept, as a single scale and shift.
+    Parameters
+    ----------
+    layers : list
+        Layers of a model.
+    Returns
+    -------
+    list
+        The layers to run, with folded copies.
+    """
+    folded = []
+    for layer in layers:
+        prev_layer = folded[-1] if folded else None
+        if (
+            isinstance(layer, BatchNorm)
+            and hasattr(prev_layer, "folded")
+            and isinstance(getattr(prev_layer, "activation", None), Identity)
+        ):
+            folded[-1] = prev_layer.folded(*layer.scale_shift())
+        else:
+            folded.append(layer)
+
+    return folded
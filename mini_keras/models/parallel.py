@@ -0,0 +1,303 @@
+import multiprocessing as mp
+import threading
+import traceback
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+
+class DataParallel:
+    """Data parallel trainer running replicas of a model in forked worker processes.
+    Every mini batch is split across the workers, which compute the gradients of their shard.
+    The gradients are averaged through shared memory and a single optimizer update is made
+    in this process on parameters that live in shared memory, so every replica sees it.
+    The result matches single process training with the same mini batches.
+    Layers drawing random numbers, like `Dropout`, get a new seed for every worker and step from their
+    generator in this process, so shards draw different masks and the generator's state keeps advancing.
+    Layers normalizing with batch statistics, like `BatchNorm`, sum them across the workers through an `AllReduce`,
+    and the state of the trainable layers, e.g. running statistics, is written back into this process every step.
+    Attributes
+    ----------
+    model : Sequential
+        Model to train.
+    num_workers : int
+        Number of worker processes.
+    workers : list
+        Pairs of worker process and connection to it.
+    capacity : int
+        Number of samples the shared input buffers can hold.
+    """
+
+    def __init__(self, model, num_workers):
+        if "fork" not in mp.get_all_start_methods():
+            raise RuntimeError("DataParallel needs the 'fork' start method, unavailable on this platform")
+
+        self.model = model
+        self.num_workers = num_workers
+        self.workers = []
+        self.capacity = 0
+        self.memory = []
+        self.grads = None
+        self.x = None
+        self.y = None
+        self.states = None
+        self.reducer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def start(self, x, y):
+        """
+        Moves the parameters to shared memory and forks the workers.
+        Parameters
+        ----------
+        x : numpy.ndarray
+            A mini batch of input data, to size the shared input buffers.
+        y : numpy.ndarray
+            A mini batch of target labels, to size the shared input buffers.
+        """
+        arena = self.model.arena
+        self.capacity = x.shape[0]
+
+        # Updates of the shared parameters made by the optimizer are seen by every replica
+        params = self.shared_array(arena.params.shape, arena.params.dtype)
+        params[...] = arena.params
+        arena.bind(params=params)
+
+        self.grads = self.shared_array((self.num_workers, arena.size), arena.grads.dtype)
+        self.x = self.shared_array((self.capacity, *x.shape[1:]), x.dtype)
+        self.y = self.shared_array((self.capacity, *y.shape[1:]), y.dtype)
+        self.states = [
+            {name: self.shared_array(buffer.shape, buffer.dtype) for name, buffer in layer.get_state().items()}
+            for layer in self.model.trainable_layers
+        ]
+
+        context = mp.get_context("fork")
+        # BatchNorm reduces at most two values per channel at a time
+        reduce_size = max([2 * layer.w.size for layer in reducing_layers(self.model)], default=0)
+        if reduce_size > 0:
+            self.reducer = AllReduce(self.shared_array((self.num_workers, reduce_size), np.float64), self.num_workers, context)
+
+        # Buffers created before forking are inherited by the workers
+        for rank in range(self.num_workers):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(
+                target=run_worker,
+                args=(self.model, rank, self.grads[rank], self.x, self.y, self.states, self.reducer, worker_connection),
+                daemon=True,
+            )
+            process.start()
+            worker_connection.close()
+            self.workers.append((process, connection))
+
+    def close(self):
+        """
+        Stops the workers and moves the parameters back to private memory.
+        """
+        for process, connection in self.workers:
+            connection.send(None)
+            connection.close()
+            process.join()
+        self.workers = []
+
+        if self.memory:
+            self.model.arena.bind(params=np.array(self.model.arena.params))
+            self.grads = self.x = self.y = self.states = self.reducer = None
+
+            for memory in self.memory:
+                memory.close()
+                memory.unlink()
+            self.memory = []
+
+    def shared_array(self, shape, dtype):
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        memory = SharedMemory(create=True, size=max(size, 1))
+        self.memory.append(memory)
+        return np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+    def train(self, *args, **kwargs):
+        """
+        Trains the model like `Sequential.train`, with the training steps spread across the workers.
+        """
+        return self.model.train(*args, trainer=self, **kwargs)
+
+    def train_step(self, x_train, y_train, learning_rate, step):
+        """
+        Performs one model training step across the workers.
+        Parameters
+        ----------
+        x_train : numpy.ndarray
+            Training input data.
+        y_train : numpy.ndarray
+            Training target labels.
+        learning_rate : float
+            Parameters' update learning rate.
+        step : int
+            How many parameters updates have been performed from the start of the training.
+        Returns
+        -------
+        float
+            The cost during this training step.
+        """
+        batch_size = x_train.shape[0]
+        if self.x is None or batch_size > self.capacity or x_train.shape[1:] != self.x.shape[1:]:
+            # Workers are forked again around bigger buffers, which is rare
+            self.close()
+            self.start(x_train, y_train)
+
+        self.x[:batch_size] = x_train
+        self.y[:batch_size] = y_train
+
+        # Shards are given to the first workers, the others idle when there are fewer samples than workers
+        num_active = min(self.num_workers, batch_size)
+        bounds = np.linspace(0, batch_size, num_active + 1)
+        bounds = np.append(bounds, [batch_size] * (self.num_workers - num_active)).astype(int)
+        seeds = [layer.rng.integers(2 ** 63, size=self.num_workers) for layer in random_layers(self.model)]
+
+        # The first worker continues from this process' layer states
+        for layer, state in zip(self.model.trainable_layers, self.states):
+            for name, buffer in layer.get_state().items():
+                state[name][...] = buffer
+
+        for rank, (_, connection) in enumerate(self.workers):
+            connection.send((bounds[rank], bounds[rank + 1], batch_size, num_active, [int(seed[rank]) for seed in seeds]))
+
+        # Every result is received before raising, so that none is left for the next step
+        results = [connection.recv() for _, connection in self.workers]
+        errors = [result for ok, result in results if not ok]
+        if errors:
+            # Workers released by a failed one report None
+            errors = [error for error in errors if error is not None] or errors
+            if self.reducer is not None:
+                self.reducer.reset()
+            raise RuntimeError(f"A DataParallel worker failed:\n{errors[0]}")
+        cost = sum(result for _, result in results)
+
+        for layer, state in zip(self.model.trainable_layers, self.states):
+            if state:
+                layer.set_state(state)
+
+        # Shards' gradients are already weighted by their size, the sum is the batch average
+        arena = self.model.arena
+        np.sum(self.grads, axis=0, out=arena.grads)
+
+        l2_lambda = self.model.l2_lambda
+        if l2_lambda != 0:
+            # Regularization is accounted for once, here rather than in each worker
+            arena.weight_grads += (l2_lambda / batch_size) * arena.weights
+            cost += (l2_lambda / (2 * batch_size)) * np.dot(arena.weights, arena.weights)
+
+        self.model.update_param(learning_rate, step)
+
+        return cost
+
+
+class AllReduce:
+    """Sums arrays across the workers of a data parallel step, through shared memory.
+    Every active worker must make the same sequence of calls, each blocking until all of them made it.
+    Attributes
+    ----------
+    buffer : numpy.ndarray
+        Shared buffer with a row of values per worker.
+    barriers : list
+        Barriers synchronizing 1, 2, ... up to every worker, one is used per step depending on how many are active.
+    rank : int
+        Rank of the worker using the reducer.
+    num_active : int
+        Number of workers with samples in the current step.
+    """
+
+    def __init__(self, buffer, num_workers, context):
+        self.buffer = buffer
+        self.barriers = [context.Barrier(parties) for parties in range(1, num_workers + 1)]
+        self.rank = None
+        self.num_active = None
+
+    def __call__(self, x):
+        """
+        Returns the sum of a flat array over the active workers, in float64.
+        """
+        barrier = self.barriers[self.num_active - 1]
+        self.buffer[self.rank, : x.size] = x
+        barrier.wait()
+        total = self.buffer[: self.num_active, : x.size].sum(axis=0)
+        # Nobody writes the next values before every worker has read these
+        barrier.wait()
+        return total
+
+    def abort(self):
+        """
+        Releases the workers waiting for this one, which failed. They fail too.
+        """
+        self.barriers[self.num_active - 1].abort()
+
+    def reset(self):
+        for barrier in self.barriers:
+            barrier.reset()
+
+
+def random_layers(model):
+    """
+    Returns the layers of a model drawing random numbers from their own generator, `rng`.
+    """
+    return [layer for layer in model.layers if hasattr(layer, "rng")]
+
+
+def reducing_layers(model):
+    """
+    Returns the layers of a model summing values across the replicas with their `reducer`.
+    """
+    return [layer for layer in model.layers if hasattr(layer, "reducer")]
+
+
+def run_worker(model, rank, grads, x, y, states, reducer, connection):
+    """
+    Worker process loop, computing the gradients of the shards it is sent until it gets None.
+    """
+    model.l2_lambda = 0
+    model.arena.bind(grads=grads)
+    layers = random_layers(model)
+    for layer in reducing_layers(model):
+        layer.reducer = reducer
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+
+        start, stop, batch_size, num_active, seeds = message
+        for layer, seed in zip(layers, seeds):
+            layer.rng = np.random.default_rng(seed)
+        if reducer is not None:
+            reducer.rank, reducer.num_active = rank, num_active
+
+        try:
+            if stop > start:
+                # Only the first worker's layer states are kept, the others' are never read
+                if rank == 0:
+                    for layer, state in zip(model.trainable_layers, states):
+                        if state:
+                            layer.set_state(state)
+
+                cost = model.compute_gradients(x[start:stop], y[start:stop])
+                grads *= (stop - start) / batch_size
+
+                if rank == 0:
+                    for layer, state in zip(model.trainable_layers, states):
+                        for name, buffer in layer.get_state().items():
+                            state[name][...] = buffer
+                connection.send((True, float(cost) * (stop - start) / batch_size))
+            else:
+                grads[...] = 0
+                connection.send((True, 0.0))
+        except threading.BrokenBarrierError:
+            connection.send((False, None))
+        except Exception:
+            if reducer is not None and stop > start:
+                reducer.abort()
+            connection.send((False, traceback.format_exc()))
+
+    connection.close()
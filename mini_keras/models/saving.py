@@ -0,0 +1,232 @@
+"""
+Single file model format.
+
+A file starts with a magic string and the length of a JSON header describing the model:
+its layers' configs, cost function, optimizer, training counters and RNG state, along with the
+position of every array. The arrays follow, raw and uncompressed, each at an offset aligned on
+`ALIGNMENT` bytes so that the parameters can be memory mapped straight from the file.
+"""
+import json
+import os
+from functools import partial
+
+import numpy as np
+
+from ..layers.batch_norm import BatchNorm
+from ..layers.conv2D import Conv
+from ..layers.dense import Dense
+from ..layers.depthwise_conv import DepthwiseConv
+from ..layers.dropout import Dropout
+from ..layers.flatten import Flatten
+from ..layers.pool import Pool
+from ..layers.separable_conv import SeparableConv
+from ..loss import SigmoidCrossEntropy, SoftmaxCrossEntropy
+from ..optimizer import Adam, GradientDescent, RMSProp
+
+MAGIC = b"MKERAS1\n"
+ALIGNMENT = 64
+FORMAT_VERSION = 1
+
+LAYERS = {cls.__name__: cls for cls in (BatchNorm, Conv, Dense, DepthwiseConv, Dropout, Flatten, Pool, SeparableConv)}
+COST_FUNCTIONS = {cls.__name__: cls for cls in (SigmoidCrossEntropy, SoftmaxCrossEntropy)}
+OPTIMIZERS = {cls.__name__: cls for cls in (Adam, GradientDescent, RMSProp)}
+
+
+def align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def get_state(model):
+    """
+    Collects everything needed to rebuild a model and resume its training.
+    Parameters
+    ----------
+    model : Sequential
+        Model to save.
+    Returns
+    -------
+    tuple
+        The JSON serializable header and a dict of the arrays to store, which may be the model's own buffers.
+    """
+    for layer in model.layers:
+        if type(layer).__name__ not in LAYERS:
+            raise ValueError(f"Saving layers of type '{type(layer).__name__}' is not supported")
+
+    rng_name, rng_keys, rng_pos, rng_has_gauss, rng_cached_gaussian = np.random.get_state()
+    header = {
+        "version": FORMAT_VERSION,
+        "input_dim": model.input_dim,
+        "layers": [
+            {"class_name": type(layer).__name__, "config": layer.get_config()}
+            for layer in model.layers
+        ],
+        "cost_function": type(model.cost_function).__name__,
+        "optimizer": {
+            "class_name": type(model.optimizer).__name__,
+            "config": model.optimizer.get_config(),
+        },
+        "l2_lambda": model.l2_lambda,
+        "step": model.step,
+        "epoch": model.epoch,
+        "rng": {
+            "name": rng_name,
+            "pos": int(rng_pos),
+            "has_gauss": int(rng_has_gauss),
+            "cached_gaussian": float(rng_cached_gaussian),
+        },
+    }
+
+    arrays = {"params": model.arena.params, "rng_keys": rng_keys}
+    for name, buffer in model.optimizer.get_state().items():
+        arrays[f"optimizer/{name}"] = buffer
+    for i, layer in enumerate(model.layers):
+        for name, buffer in layer.get_state().items():
+            arrays[f"layers/{i}/{name}"] = buffer
+
+    return header, arrays
+
+
+def write(file_path, header, arrays):
+    """
+    Writes a header and arrays atomically: readers either see the previous file or the whole new one.
+    Parameters
+    ----------
+    file_path : str
+        Path of the file.
+    header : dict
+        JSON serializable header.
+    arrays : dict
+        Arrays to store after the header, by name.
+    """
+    header = dict(header, arrays={})
+    offset = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {
+            "offset": offset,
+            "shape": list(array.shape),
+            "dtype": array.dtype.str,
+        }
+        offset = align(offset + array.nbytes)
+
+    encoded = json.dumps(header).encode("utf-8")
+    data_start = align(len(MAGIC) + 8 + len(encoded))
+
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(encoded)).tobytes())
+        f.write(encoded)
+
+        for name, array in arrays.items():
+            f.seek(data_start + header["arrays"][name]["offset"])
+            f.write(np.ascontiguousarray(array).data)
+
+        f.truncate(data_start + offset)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, file_path)
+
+
+def read_header(file_path):
+    """
+    Reads the header of a model file.
+    Returns
+    -------
+    tuple
+        The header and the offset of the arrays in the file.
+    """
+    with open(file_path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"'{file_path}' is not a mini_keras model file")
+
+        length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(length).decode("utf-8"))
+
+    if header["version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model file version {header['version']}")
+
+    return header, align(len(MAGIC) + 8 + length)
+
+
+def save_model(model, file_path):
+    """
+    Saves a model, its weights and its training state to a single file.
+    Parameters
+    ----------
+    model : Sequential
+        Model to save.
+    file_path : str
+        Path of the file.
+    """
+    write(file_path, *get_state(model))
+
+
+def load_model(cls, file_path, mmap=True):
+    """
+    Rebuilds a model saved by `save_model` and restores its training state, including the global RNG state.
+    Parameters
+    ----------
+    cls : type
+        Model class.
+    file_path : str
+        Path of the file.
+    mmap : bool
+        Whether to memory map the parameters instead of reading them. The mapping is copy on write,
+        training the loaded model never modifies the file.
+    Returns
+    -------
+    Sequential
+        The model.
+    """
+    header, data_start = read_header(file_path)
+
+    def read(name, use_mmap=False):
+        spec = header["arrays"][name]
+        dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+        offset = data_start + spec["offset"]
+        if use_mmap:
+            return np.memmap(file_path, dtype=dtype, mode="c", offset=offset, shape=shape)
+
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            return np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+    input_dim = header["input_dim"]
+    layers = [
+        LAYERS[layer["class_name"]](**layer["config"]) for layer in header["layers"]
+    ]
+    optimizer = OPTIMIZERS[header["optimizer"]["class_name"]]
+    model = cls(
+        tuple(input_dim) if isinstance(input_dim, list) else input_dim,
+        layers,
+        COST_FUNCTIONS[header["cost_function"]](),
+        optimizer=partial(optimizer, **header["optimizer"]["config"]),
+        l2_lambda=header["l2_lambda"],
+    )
+
+    arena = model.arena
+    if np.dtype(header["arrays"]["params"]["dtype"]) == arena.params.dtype:
+        params = read("params", use_mmap=mmap)
+        arena.bind(params=params)
+    else:
+        # Cast to the current floatx policy, which needs a copy
+        arena.params[...] = read("params")
+
+    model.optimizer.set_state({
+        name.split("/", 1)[1]: read(name)
+        for name in header["arrays"] if name.startswith("optimizer/")
+    })
+    for i, layer in enumerate(model.layers):
+        prefix = f"layers/{i}/"
+        state = {name[len(prefix):]: read(name) for name in header["arrays"] if name.startswith(prefix)}
+        if state:
+            layer.set_state(state)
+    model.step, model.epoch = header["step"], header["epoch"]
+
+    rng = header["rng"]
+    np.random.set_state(
+        (rng["name"], read("rng_keys"), rng["pos"], rng["has_gauss"], rng["cached_gaussian"])
+    )
+
+    return model
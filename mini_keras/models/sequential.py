@@ -1,21 +1,33 @@
-from functools import reduce
+import math
 
 import numpy as np
-from tqdm import tqdm
 
+from .frozen import FrozenModel
+from .saving import load_model, save_model
+from .. import profiler as profiling
+from ..backend import cast_to_floatx, floatx
+from ..callbacks import ProgressLogger
 from ..optimizer import gradient_descent
+from ..utils.arena import ParameterArena
+from ..utils.data_utils import DataLoader
+from ..utils.workspace import Workspace
+
+# Bytes the activations of an inference chunk may use when neither a batch size nor a budget is given
+DEFAULT_MEMORY_BUDGET = 64 * 1024 ** 2
 
 
 class Sequential:
     """Neural network model.
     Attributes
     ----------
+    input_dim : int or tuple
+        Shape of a single input sample.
     layers : list
         Layers used in the model.
     w_grads : dict
-        Weights' gradients during backpropagation.
+        Weights' gradients during backpropagation, views into the arena's gradients.
     b_grads : dict
-        Biases' gradients during backpropagation.
+        Biases' gradients during backpropagation, views into the arena's gradients.
     cost_function : CostFunction
         Cost function to be minimized.
     optimizer : Optimizer
@@ -24,29 +36,65 @@ class Sequential:
         L2 regularization parameter.
     trainable_layers: list
         Trainable layers(those that have trainable parameters) used in the model.
+    arena : ParameterArena
+        Contiguous storage of the trainable layers' parameters and gradients.
+    workspace : Workspace
+        Scratch buffers the layers share and reuse across training steps. Inference uses buffers of its own.
+    fused_cost : bool
+        Whether the last layer's activation is fused with the cost function, in which case
+        the cost and its gradient are computed from the logits.
+    step : int
+        Number of parameters updates performed since the model was created.
+    epoch : int
+        Number of training epochs completed since the model was created.
+    stop_training : bool
+        Set by callbacks to stop the training at the end of the current epoch.
+    segments : list
+        Pairs of start and stop indices of the layers' segments when checkpointing, None otherwise.
     """
 
     def __init__(
         self, input_dim, layers, cost_function, optimizer=gradient_descent, l2_lambda=0
     ):
+        self.input_dim = input_dim
         self.layers = layers
-        self.w_grads = {}
-        self.b_grads = {}
         self.cost_function = cost_function
         self.optimizer = optimizer
         self.l2_lambda = l2_lambda
+        self.step = 0
+        self.epoch = 0
+        self.stop_training = False
+        self.segments = None
+        self.segment_inputs = None
 
         # Initialize the layers in the model providing the input dimension they should expect
         self.layers[0].init(input_dim)
         for prev_layer, curr_layer in zip(self.layers, self.layers[1:]):
             curr_layer.init(prev_layer.get_output_dim())
 
-        self.trainable_layers = set(
+        self.workspace = Workspace()
+        self.set_workspace(self.workspace)
+
+        self.trainable_layers = [
             layer for layer in self.layers if layer.get_params() is not None
-        )
-        self.optimizer = optimizer(self.trainable_layers)
+        ]
+        self.arena = ParameterArena(self.trainable_layers)
+        self.optimizer = optimizer(self.trainable_layers, arena=self.arena)
         self.optimizer.initialize()
 
+        fused_activation = getattr(cost_function, "activation", None)
+        self.fused_cost = fused_activation is not None and isinstance(
+            getattr(self.layers[-1], "activation", None), fused_activation
+        )
+
+    @property
+    def w_grads(self):
+        return self.arena.w_grads
+
+    @property
+    def b_grads(self):
+        return self.arena.b_grads
+
     def forward_prop(self, x, training=True):
         """
         Performs a forward propagation pass.
@@ -61,9 +109,36 @@ class Sequential:
         numpy.ndarray
             Model's output, corresponding to the last layer's activations.
         """
-        a = x
-        for layer in self.layers:
-            a = layer.forward(a, training)
+        # Cast once at the model's boundary, layers keep the dtype they are given
+        a = cast_to_floatx(x)
+        if not training or self.segments is None:
+            return self.forward_layers(a, 0, len(self.layers), training)
+
+        # Only the input of each segment is kept, the caches of all but the last one are recomputed in backward_prop
+        self.segment_inputs = []
+        for start, stop in self.segments:
+            self.segment_inputs.append(a)
+            a = self.forward_layers(a, start, stop, training)
+            if stop != len(self.layers):
+                for layer in self.layers[start:stop]:
+                    layer.clear_cache()
+
+        return a
+
+    def forward_layers(self, a, start, stop, training, recompute=False):
+        """
+        Performs the forward propagation pass of the layers from index `start` to `stop`, excluded.
+        When `recompute` is True, the training pass is replayed to rebuild the layers' caches.
+        """
+        profiler = profiling.current
+        for i in range(start, stop):
+            layer = self.layers[i]
+            if recompute:
+                a = layer.recompute(a) if profiler is None else profiler.call(f"{self.layer_name(i)}.recompute", layer.recompute, a)
+            elif profiler is None:
+                a = layer.forward(a, training)
+            else:
+                a = profiler.call(f"{self.layer_name(i)}.forward", layer.forward, a, training)
 
         return a
 
@@ -77,40 +152,281 @@ class Sequential:
         y : numpy.ndarray
             Target labels.
         """
-        da = self.cost_function.grad(a_last, y)
-        batch_size = da.shape[0]
+        batch_size = y.shape[0]
+        layers = reversed(list(enumerate(self.layers)))
+        profiler = profiling.current
+
+        # Segments whose caches were dropped, by the index of their last layer
+        recomputed = {}
+        if self.segments is not None:
+            recomputed = {
+                stop - 1: (start, stop, a_prev)
+                for (start, stop), a_prev in zip(self.segments[:-1], self.segment_inputs)
+            }
+
+        if self.fused_cost:
+            # Feed the gradient wrt the logits straight into the last layer
+            i, last_layer = next(layers)
+            dz = self.cost_function.grad_logits(a_last, y)
+            if profiler is None:
+                da, dw, db = last_layer.backward_dz(dz)
+            else:
+                da, dw, db = profiler.call(f"{self.layer_name(i)}.backward", last_layer.backward_dz, dz)
+            self.store_grads(last_layer, dw, db, batch_size)
+        else:
+            da = self.cost_function.grad(a_last, y)
+
+        segment_start = None
+        for i, layer in layers:
+            if i in recomputed:
+                # Rematerialize the segment's caches from its input
+                segment_start, stop, a_prev = recomputed[i]
+                self.forward_layers(a_prev, segment_start, stop, True, recompute=True)
+
+            if profiler is None:
+                da_prev, dw, db = layer.backward(da)
+            else:
+                da_prev, dw, db = profiler.call(f"{self.layer_name(i)}.backward", layer.backward, da)
+            self.store_grads(layer, dw, db, batch_size)
+            da = da_prev
+
+            if segment_start is not None:
+                layer.clear_cache()
+                if i == segment_start:
+                    segment_start = None
+
+        self.segment_inputs = None
+
+    def enable_checkpointing(self, boundaries=None):
+        """
+        Enables gradient checkpointing: during training, only the inputs of segments of layers are kept
+        and each segment's forward pass is performed again in the backward pass, to rebuild its caches.
+        Memory used by cached activations grows with the square root of the depth instead of linearly,
+        for about one more forward pass per step; the workspace's scratch buffers are shared by the layers
+        and do not grow with depth either. Gradients, running statistics and dropout masks are unchanged.
+        Parameters
+        ----------
+        boundaries : list, optional
+            Indices of the layers starting a segment. Segments of about the square root of the number
+            of layers by default.
+        """
+        num_layers = len(self.layers)
+        if boundaries is None:
+            size = math.ceil(math.sqrt(num_layers))
+            boundaries = range(0, num_layers, size)
 
-        for layer in reversed(self.layers):
-            da_prev, dw, db = layer.backward(da)
+        boundaries = sorted(set(boundaries) | {0})
+        if boundaries[0] < 0 or boundaries[-1] >= num_layers:
+            raise ValueError(f"Segment boundaries must be layer indices, between 0 and {num_layers - 1}")
 
-            if layer in self.trainable_layers:
-                if self.l2_lambda != 0:
-                    # Update the weights' gradients also wrt the l2 regularization cost
-                    self.w_grads[layer] = (
-                        dw + (self.l2_lambda / batch_size) * layer.get_params()[0]
-                    )
-                else:
-                    self.w_grads[layer] = dw
+        self.segments = list(zip(boundaries, boundaries[1:] + [num_layers]))
 
-                self.b_grads[layer] = db
+    def disable_checkpointing(self):
+        self.segments = None
 
-            da = da_prev
+    def set_cache_compression(self, policy):
+        """
+        Sets how layers store the tensors they cache for the backward pass.
+        Parameters
+        ----------
+        policy : CacheCompression
+            Compression policy, None to store the tensors as they are.
+        """
+        for layer in self.layers:
+            if hasattr(layer, "cache_compression"):
+                layer.cache_compression = policy
+
+        if self.fused_cost:
+            # The fused cost is computed from the last layer's exact logits
+            self.layers[-1].cache_compression = None
 
-    def predict(self, x):
+    def layer_name(self, index):
         """
-        Calculates the output of the model for the input.
+        Name of a layer in profiles, e.g. 'conv_0'.
+        """
+        return f"{type(self.layers[index]).__name__.lower()}_{index}"
+
+    def store_grads(self, layer, dw, db, batch_size):
+        """
+        Keeps the gradients of a layer for the next parameters update.
+        Parameters
+        ----------
+        layer : Layer
+            Layer the gradients belong to.
+        dw : numpy.ndarray
+            The gradients wrt the cost of the layer's weights.
+        db : numpy.ndarray
+            The gradients wrt the cost of the layer's biases.
+        batch_size : int
+            Number of samples the gradients were computed on.
+        """
+        if layer not in self.trainable_layers:
+            return
+
+        # Gradients are written in place, in the arena
+        if self.l2_lambda != 0:
+            # Update the weights' gradients also wrt the l2 regularization cost
+            np.multiply(
+                layer.get_params()[0], self.l2_lambda / batch_size, out=self.w_grads[layer]
+            )
+            self.w_grads[layer] += dw
+        else:
+            self.w_grads[layer][...] = dw
+
+        self.b_grads[layer][...] = db
+
+    def predict(self, x, batch_size=None, memory_budget=None):
+        """
+        Calculates the output of the model for the input, streaming over it in chunks.
         Parameters
         ----------
         x : numpy.ndarray
             Input.
+        batch_size : int, optional
+            Number of samples per chunk. Defaults to as many as the memory budget allows.
+        memory_budget : int, optional
+            Bytes the activations of a chunk may use, to pick the chunk size automatically,
+            `DEFAULT_MEMORY_BUDGET` by default.
         Returns
         -------
         numpy.ndarray
             Prediction of the model, corresponding to the last layer's activations.
         """
-        a_last = self.forward_prop(x, training=False)
+        a_last = None
+        # Buffers sized for the chunks are released when done, the training ones are kept
+        self.set_workspace(Workspace())
+        try:
+            for start, stop in self.chunks(x.shape[0], batch_size, memory_budget):
+                a = self.forward_prop(x[start:stop], training=False)
+
+                if a_last is None:
+                    a_last = np.empty((x.shape[0], *a.shape[1:]), dtype=a.dtype)
+                a_last[start:stop] = a
+        finally:
+            self.set_workspace(self.workspace)
+
         return a_last
 
+    def set_workspace(self, workspace):
+        """
+        Points every layer to the scratch buffers they use.
+        """
+        for layer in self.layers:
+            layer.workspace = workspace
+
+    def freeze(self, batch_size):
+        """
+        Creates an inference only executor, with every buffer preallocated, for low latency serving.
+        Parameters
+        ----------
+        batch_size : int
+            Maximum number of samples per prediction.
+        Returns
+        -------
+        FrozenModel
+            The executor, using the parameters as they are now.
+        """
+        return FrozenModel(self.layers, self.input_dim, batch_size)
+
+    def evaluate(self, x, y, batch_size=None, metrics=("loss", "accuracy"), memory_budget=None, transform=None):
+        """
+        Evaluates the model on a dataset, streaming over it in chunks.
+        Parameters
+        ----------
+        x : numpy.ndarray
+            Input.
+        y : numpy.ndarray
+            Target labels, one hot encoded or as class indices. The loss needs the former.
+        batch_size : int, optional
+            Number of samples per chunk. Defaults to as many as the memory budget allows.
+        metrics : tuple
+            Metrics to compute, among 'loss' (without the L2 regularization cost) and 'accuracy'.
+        memory_budget : int, optional
+            Bytes the activations of a chunk may use, to pick the chunk size automatically,
+            `DEFAULT_MEMORY_BUDGET` by default.
+        transform : callable, optional
+            Applied to each chunk's pair of input data and target labels, like a `DataLoader` transform,
+            e.g. to preprocess memory mapped data lazily.
+        Returns
+        -------
+        dict
+            The value of each metric over the whole dataset.
+        """
+        unknown = set(metrics) - {"loss", "accuracy"}
+        if unknown:
+            raise ValueError(f"Unsupported metrics: {', '.join(sorted(unknown))}")
+
+        totals = dict.fromkeys(metrics, 0.0)
+        self.set_workspace(Workspace())
+        try:
+            for start, stop in self.chunks(x.shape[0], batch_size, memory_budget):
+                x_chunk, y_chunk = x[start:stop], y[start:stop]
+                if transform is not None:
+                    x_chunk, y_chunk = transform(x_chunk, y_chunk)
+                a = self.forward_prop(x_chunk, training=False)
+
+                if "loss" in totals:
+                    totals["loss"] += float(self.cost_function.f(a, cast_to_floatx(y_chunk))) * (stop - start)
+
+                if "accuracy" in totals:
+                    if a.shape[1] == 1:
+                        predictions = (a[:, 0] > 0.5).astype(int)
+                    else:
+                        predictions = np.argmax(a, axis=1)
+
+                    if y_chunk.ndim == 2 and y_chunk.shape[1] > 1:
+                        y_chunk = np.argmax(y_chunk, axis=1)
+                    totals["accuracy"] += np.sum(predictions == y_chunk.reshape(-1))
+        finally:
+            self.set_workspace(self.workspace)
+
+        return {metric: total / x.shape[0] for metric, total in totals.items()}
+
+    def chunks(self, num_samples, batch_size=None, memory_budget=None):
+        """
+        Splits samples in chunks to run inference on.
+        Parameters
+        ----------
+        num_samples : int
+            Number of samples.
+        batch_size : int, optional
+            Number of samples per chunk.
+        memory_budget : int, optional
+            Bytes the activations of a chunk may use, used when no batch size is given.
+            Defaults to `DEFAULT_MEMORY_BUDGET`, so that large inputs are always streamed.
+        Returns
+        -------
+        list
+            Pairs of start and stop indices.
+        """
+        if batch_size is None:
+            if memory_budget is None:
+                memory_budget = DEFAULT_MEMORY_BUDGET
+            batch_size = max(1, memory_budget // self.sample_memory())
+
+        batch_size = max(1, batch_size)
+        return [
+            (start, min(start + batch_size, num_samples))
+            for start in range(0, num_samples, batch_size)
+        ]
+
+    def sample_memory(self):
+        """
+        Estimates the peak memory, in bytes, the inference forward pass needs per sample.
+        Returns
+        -------
+        int
+            Bytes per sample.
+        """
+        in_size = int(np.prod(self.input_dim))
+        peak = 0
+        for layer in self.layers:
+            out_size = int(np.prod(layer.get_output_dim()))
+            peak = max(peak, in_size + out_size + layer.get_workspace_size())
+            in_size = out_size
+
+        return peak * np.dtype(floatx()).itemsize
+
     def update_param(self, learning_rate, step):
         """
         Updates the trainable parameters of the layers in the model.
@@ -121,9 +437,16 @@ class Sequential:
         step : int
             How many updates have been performed from the start of the training.
         """
-        self.optimizer.update(learning_rate, self.w_grads, self.b_grads, step)
+        profiler = profiling.current
+        if profiler is None:
+            self.optimizer.update(learning_rate, self.w_grads, self.b_grads, step)
+        else:
+            profiler.call(
+                f"{type(self.optimizer).__name__.lower()}.update",
+                self.optimizer.update, learning_rate, self.w_grads, self.b_grads, step,
+            )
 
-    def compute_cost(self, a_last, y):
+    def compute_cost(self, a_last, y, z_last=None):
         """
         Computes the cost, given the output and the target labels.
         Parameters
@@ -132,18 +455,31 @@ class Sequential:
             Output.
         y : numpy.ndarray
             Target labels.
+        z_last : numpy.ndarray, optional
+            Logits of the output, used instead of it when the cost is fused with the last activation.
         Returns
         -------
         float
             The cost.
         """
-        cost = self.cost_function.f(a_last, y)
+        profiler = profiling.current
+        if profiler is None:
+            return self.regularized_cost(a_last, y, z_last)
+        return profiler.call(f"{type(self.cost_function).__name__.lower()}.cost", self.regularized_cost, a_last, y, z_last)
+
+    def regularized_cost(self, a_last, y, z_last=None):
+        """
+        Cost function's value plus the L2 regularization cost, see `compute_cost`.
+        """
+        if self.fused_cost and z_last is not None:
+            cost = self.cost_function.f_logits(z_last, y)
+        else:
+            cost = self.cost_function.f(a_last, y)
         if self.l2_lambda != 0:
             batch_size = y.shape[0]
-            weights = [layer.get_params()[0] for layer in self.trainable_layers]
-            l2_cost = (self.l2_lambda / (2 * batch_size)) * reduce(
-                lambda ws, w: ws + np.sum(np.square(w)), weights, 0
-            )
+            # Every weight is contiguous in the arena, the sum of their squares is a single dot product
+            weights = self.arena.weights
+            l2_cost = (self.l2_lambda / (2 * batch_size)) * np.dot(weights, weights)
             return cost + l2_cost
         else:
             return cost
@@ -151,70 +487,134 @@ class Sequential:
     def train(
         self,
         x_train,
-        y_train,
-        mini_batch_size,
-        learning_rate,
-        num_epochs,
-        validation_data,
+        y_train=None,
+        mini_batch_size=None,
+        learning_rate=0.01,
+        num_epochs=1,
+        validation_data=None,
+        trainer=None,
+        initial_epoch=0,
+        callbacks=(),
+        verbose=True,
+        validation_freq=1,
+        validation_samples=None,
+        transform=None,
     ):
         """
         Trains the model for a given number of epochs.
         Parameters
         ----------
-        x_train : numpy.ndarray
-            Training input data.
+        x_train : numpy.ndarray or DataLoader
+            Training input data, or a loader yielding pairs of input data and target labels.
         y_train : numpy.ndarray
-            Training target labels.
-        mini_batch_size : int
-            Size of a mini batch. Number of samples per parameters update step.
+            Training target labels. Unused when `x_train` is a loader.
+        mini_batch_size : int, optional
+            Size of a mini batch. Number of samples per parameters update step, the whole training data by default.
+            Unused when `x_train` is a loader.
         learning_rate : float
             Parameters' update learning rate.
         num_epochs : int
             The number of epochs.
-        validation_data : tuple
+        validation_data : tuple, optional
             A pair of input data and target labels to evaluate the model on.
+        trainer : object, optional
+            Performs the training steps in place of the model, e.g. a `DataParallel` trainer.
+        initial_epoch : int
+            Epoch to start from, e.g. `model.epoch` to resume the training of a loaded model.
+        callbacks : list, optional
+            Callbacks notified as the training progresses, e.g. a `ModelCheckpoint` or an `EarlyStopping`.
+        verbose : bool
+            Whether to report the progress with a `ProgressLogger`, unless one is among the callbacks already.
+        validation_freq : int
+            Number of epochs between evaluations on the validation data.
+        validation_samples : int, optional
+            Number of validation samples, drawn once, to evaluate on instead of the whole validation data.
+        transform : callable, optional
+            Applied to each pair of input data and target labels, of the training mini batches and of the validation
+            data, e.g. `mnist.preprocess` on memory mapped data. When `x_train` is a loader, its own transform is used.
+        Returns
+        -------
+        dict
+            The cost of each epoch, and the validation accuracy of each evaluation.
         """
+        train_step = self.train_step if trainer is None else trainer.train_step
+        if isinstance(x_train, DataLoader):
+            loader = x_train
+        else:
+            loader = DataLoader(x_train, y_train, mini_batch_size, transform=transform)
+
+        if validation_data is not None and validation_samples is not None:
+            x_val, y_val = validation_data
+            if validation_samples < x_val.shape[0]:
+                # Sorted indices keep the gather sequential, which matters for memory mapped data
+                idx = np.sort(np.random.choice(x_val.shape[0], validation_samples, replace=False))
+                validation_data = (x_val[idx], y_val[idx])
+
+        callbacks = list(callbacks)
+        if verbose and not any(isinstance(callback, ProgressLogger) for callback in callbacks):
+            callbacks.append(ProgressLogger())
+
+        params = {
+            "batch_size": loader.batch_size,
+            "num_batches": len(loader),
+            "num_epochs": num_epochs,
+            "learning_rate": learning_rate,
+        }
+        self.stop_training = False
+        for callback in callbacks:
+            callback.set_model(self)
+            callback.set_params(params)
+            callback.on_train_begin()
+
         stats = {"train_loss": [], "test_acc": []}
-        x_val, y_val = validation_data
-        print(
-            f"Started training (batch_size={mini_batch_size}, learning_rate={learning_rate})"
-        )
+        try:
+            self.train_epochs(
+                loader, train_step, learning_rate, num_epochs, initial_epoch, validation_data, validation_freq, callbacks, stats
+            )
+        finally:
+            # Let callbacks release their resources, e.g. wait for pending checkpoints
+            for callback in callbacks:
+                callback.on_train_end()
 
-        step = 0
-        for e in range(num_epochs):
-            print(f"Epoch {e + 1} / {num_epochs}")
-            epoch_cost = 0
+        return stats
 
-            if mini_batch_size == x_train.shape[0]:
-                mini_batches = (x_train, y_train)
-            else:
-                mini_batches = Sequential.create_mini_batches(
-                    x_train, y_train, mini_batch_size
-                )
+    def train_epochs(
+        self, loader, train_step, learning_rate, num_epochs, initial_epoch, validation_data, validation_freq, callbacks, stats
+    ):
+        """
+        Runs the epochs of `train`, recording the cost and validation accuracy of each one in `stats`.
+        """
+        for e in range(initial_epoch, num_epochs):
+            for callback in callbacks:
+                callback.on_epoch_begin(e + 1)
 
-            num_mini_batches = len(mini_batches)
-            for i, mini_batch in enumerate(tqdm(mini_batches), 1):
-                mini_batch_x, mini_batch_y = mini_batch
-                step += 1
-                epoch_cost += (
-                    self.train_step(mini_batch_x, mini_batch_y, learning_rate, step) / mini_batch_size
-                )
+            epoch_cost = 0
+            for mini_batch_x, mini_batch_y in loader:
+                self.step += 1
+                cost = train_step(mini_batch_x, mini_batch_y, learning_rate, self.step)
+                epoch_cost += cost / loader.batch_size
 
-                print("\rProgress {:1.1%}".format(i / num_mini_batches), end="")
+                for callback in callbacks:
+                    callback.on_batch_end(self.step, cost)
 
-            print(f"\nCost after epoch {e + 1}: {epoch_cost}")
             stats["train_loss"].append(epoch_cost)
-            print("Computing accuracy on validation set...")
+            self.epoch = e + 1
+            logs = {"loss": epoch_cost}
 
-            accuracy = (
-                np.sum(np.argmax(self.predict(x_val), axis=1) == y_val) / x_val.shape[0]
-            )
-            stats["test_acc"].append(accuracy)
+            if validation_data is not None and self.epoch % validation_freq == 0:
+                x_val, y_val = validation_data
+                # Validation data is preprocessed like the training data
+                accuracy = self.evaluate(
+                    x_val, y_val, batch_size=loader.batch_size, metrics=("accuracy",), transform=loader.transform
+                )["accuracy"]
+                stats["test_acc"].append(accuracy)
+                logs["val_accuracy"] = accuracy
 
-            print(f"Accuracy on validation set: {accuracy}")
+            for callback in callbacks:
+                callback.on_epoch_end(self.epoch, logs)
 
-        print("Finished training")
-        return stats
+            if self.stop_training:
+                break
 
     def train_step(self, x_train, y_train, learning_rate, step):
         """
@@ -234,49 +634,56 @@ class Sequential:
         float
             The cost during this training step.
         """
-        a_last = self.forward_prop(x_train, training=True)
-        self.backward_prop(a_last, y_train)
-
-        cost = self.compute_cost(a_last, y_train)
+        cost = self.compute_gradients(x_train, y_train)
         self.update_param(learning_rate, step)
 
         return cost
 
-    @staticmethod
-    def create_mini_batches(x, y, mini_batch_size) -> list:
+    def compute_gradients(self, x_train, y_train):
         """
-        Creates sample mini batches from input and target labels batches.
-        x : numpy.ndarray
-            Input batch.
-        y : numpy.ndarray
-            Target labels batch.
+        Performs the forward and backward passes, leaving the gradients in `w_grads` and `b_grads`.
+        Parameters
+        ----------
+        x_train : numpy.ndarray
+            Training input data.
+        y_train : numpy.ndarray
+            Training target labels.
         Returns
         -------
-        list
-            Mini batches pairs of input and target labels.
+        float
+            The cost on this batch.
         """
-        batch_size = x.shape[0]
-        mini_batches = []
-
-        p = np.random.permutation(x.shape[0])
-        x, y = x[p, :], y[p, :]
-        num_complete_minibatches = batch_size // mini_batch_size
+        y_train = cast_to_floatx(y_train)
+        a_last = self.forward_prop(x_train, training=True)
+        self.backward_prop(a_last, y_train)
 
-        for k in range(0, num_complete_minibatches):
-            mini_batches.append(
-                (
-                    x[k * mini_batch_size: (k + 1) * mini_batch_size, :],
-                    y[k * mini_batch_size: (k + 1) * mini_batch_size, :],
-                )
-            )
+        z_last = self.layers[-1].cache["z"] if self.fused_cost else None
+        return self.compute_cost(a_last, y_train, z_last)
 
-        # Fill with remaining data, if needed
-        if batch_size % mini_batch_size != 0:
-            mini_batches.append(
-                (
-                    x[num_complete_minibatches * mini_batch_size:, :],
-                    y[num_complete_minibatches * mini_batch_size:, :],
-                )
-            )
+    def save(self, file_path):
+        """
+        Saves the model to a single file: layers' configs, parameters, optimizer state, step and epoch
+        counters and the global RNG state, so that training can be resumed exactly.
+        Parameters
+        ----------
+        file_path : str
+            Path of the file, replaced atomically.
+        """
+        save_model(self, file_path)
 
-        return mini_batches
+    @classmethod
+    def load(cls, file_path, mmap=True):
+        """
+        Loads a model saved by `save`. The global RNG state is restored as well.
+        Parameters
+        ----------
+        file_path : str
+            Path of the file.
+        mmap : bool
+            Whether to memory map the parameters (copy on write) instead of reading them.
+        Returns
+        -------
+        Sequential
+            The model.
+        """
+        return load_model(cls, file_path, mmap=mmap)
@@ -4,119 +4,124 @@ from .base import BaseOptimizer
 
 
 class GradientDescent(BaseOptimizer):
-    def __init__(self, trainable_layers):
-        super(GradientDescent, self).__init__(trainable_layers)
+    def __init__(self, trainable_layers, arena=None):
+        super(GradientDescent, self).__init__(trainable_layers, arena)
+        self.buffer = None
 
     def initialize(self):
-        pass
+        super(GradientDescent, self).initialize()
+        self.buffer = np.empty_like(self.arena.params)
 
     def update(self, learning_rate, w_grads, b_grads, step):
-        for layer in self.trainable_layers:
-            layer.update_params(
-                dw=learning_rate * w_grads[layer], db=learning_rate * b_grads[layer]
-            )
+        self.arena.load_grads(w_grads, b_grads)
+
+        np.multiply(self.arena.grads, learning_rate, out=self.buffer)
+        self.arena.params -= self.buffer
 
 
 class RMSProp(BaseOptimizer):
-    def __init__(self, trainable_layers, beta=0.9, epsilon=1e-8):
-        super(RMSProp, self).__init__(trainable_layers)
+    def __init__(self, trainable_layers, beta=0.9, epsilon=1e-8, arena=None):
+        super(RMSProp, self).__init__(trainable_layers, arena)
         self.s = {}
+        self.s_flat = None
+        self.buffer = None
         self.beta = beta
         self.epsilon = epsilon
 
     def initialize(self):
-        for layer in self.trainable_layers:
-            w, b = layer.get_params()
-            w_shape = w.shape
-            b_shape = b.shape
-            self.s[("dw", layer)] = np.zeros(w_shape)
-            self.s[("db", layer)] = np.zeros(b_shape)
+        super(RMSProp, self).initialize()
+        self.s_flat = np.zeros_like(self.arena.params)
+        self.buffer = np.empty_like(self.arena.params)
+        self.s = moment_views(self.arena, self.s_flat)
 
     def update(self, learning_rate, w_grads, b_grads, step):
-        s_corrected = {}
-        s_correction_term = 1 - np.power(self.beta, step)
-
-        for layer in self.trainable_layers:
-            layer_dw = ("dw", layer)
-            layer_db = ("db", layer)
+        self.arena.load_grads(w_grads, b_grads)
+        grads, s, buffer = self.arena.grads, self.s_flat, self.buffer
+        # Python floats keep the parameters' dtype in the update
+        s_correction_term = 1 - self.beta ** step
 
-            self.s[layer_dw] = self.beta * self.s[layer_dw] + (
-                1 - self.beta
-            ) * np.square(w_grads[layer])
-            self.s[layer_db] = self.beta * self.s[layer_db] + (
-                1 - self.beta
-            ) * np.square(b_grads[layer])
+        # s = beta * s + (1 - beta) * grads^2
+        s *= self.beta
+        np.square(grads, out=buffer)
+        buffer *= 1 - self.beta
+        s += buffer
 
-            s_corrected[layer_dw] = self.s[layer_dw] / s_correction_term
-            s_corrected[layer_db] = self.s[layer_db] / s_correction_term
+        # params -= learning_rate * grads / (sqrt(s / s_correction_term) + epsilon)
+        np.divide(s, s_correction_term, out=buffer)
+        np.sqrt(buffer, out=buffer)
+        buffer += self.epsilon
+        np.divide(grads, buffer, out=buffer)
+        buffer *= learning_rate
+        self.arena.params -= buffer
 
-            dw = learning_rate * (
-                w_grads[layer] / (np.sqrt(s_corrected[layer_dw]) + self.epsilon)
-            )
-            db = learning_rate * (
-                b_grads[layer] / (np.sqrt(s_corrected[layer_db]) + self.epsilon)
-            )
+    def get_config(self):
+        return {"beta": self.beta, "epsilon": self.epsilon}
 
-            layer.update_params(dw, db)
+    def get_state(self):
+        return {"s": self.s_flat}
 
 
 class Adam(BaseOptimizer):
-    def __init__(self, trainable_layers, beta1=0.9, beta2=0.999, epsilon=1e-8):
-        super(Adam, self).__init__(trainable_layers)
+    def __init__(self, trainable_layers, beta1=0.9, beta2=0.999, epsilon=1e-8, arena=None):
+        super(Adam, self).__init__(trainable_layers, arena)
         self.v = {}
         self.s = {}
+        self.v_flat = None
+        self.s_flat = None
+        self.buffer = None
         self.beta1 = beta1
         self.beta2 = beta2
         self.epsilon = epsilon
 
     def initialize(self):
-        for layer in self.trainable_layers:
-            w, b = layer.get_params()
-            w_shape = w.shape
-            b_shape = b.shape
-            self.v[("dw", layer)] = np.zeros(w_shape)
-            self.v[("db", layer)] = np.zeros(b_shape)
-            self.s[("dw", layer)] = np.zeros(w_shape)
-            self.s[("db", layer)] = np.zeros(b_shape)
+        super(Adam, self).initialize()
+        self.v_flat = np.zeros_like(self.arena.params)
+        self.s_flat = np.zeros_like(self.arena.params)
+        self.buffer = np.empty_like(self.arena.params)
+        self.v = moment_views(self.arena, self.v_flat)
+        self.s = moment_views(self.arena, self.s_flat)
 
     def update(self, learning_rate, w_grads, b_grads, step):
-        v_correction_term = 1 - np.power(self.beta1, step)
-        s_correction_term = 1 - np.power(self.beta2, step)
-        s_corrected = {}
-        v_corrected = {}
-
-        for layer in self.trainable_layers:
-            layer_dw = ("dw", layer)
-            layer_db = ("db", layer)
-
-            self.v[layer_dw] = (
-                self.beta1 * self.v[layer_dw] + (1 - self.beta1) * w_grads[layer]
-            )
-            self.v[layer_db] = (
-                self.beta1 * self.v[layer_db] + (1 - self.beta1) * b_grads[layer]
-            )
-
-            v_corrected[layer_dw] = self.v[layer_dw] / v_correction_term
-            v_corrected[layer_db] = self.v[layer_db] / v_correction_term
-
-            self.s[layer_dw] = self.beta2 * self.s[layer_dw] + (
-                1 - self.beta2
-            ) * np.square(w_grads[layer])
-            self.s[layer_db] = self.beta2 * self.s[layer_db] + (
-                1 - self.beta2
-            ) * np.square(b_grads[layer])
-
-            s_corrected[layer_dw] = self.s[layer_dw] / s_correction_term
-            s_corrected[layer_db] = self.s[layer_db] / s_correction_term
-
-            dw = (
-                learning_rate * v_corrected[layer_dw] / (np.sqrt(s_corrected[layer_dw]) + self.epsilon)
-            )
-            db = (
-                learning_rate * v_corrected[layer_db] / (np.sqrt(s_corrected[layer_db]) + self.epsilon)
-            )
-
-            layer.update_params(dw, db)
+        self.arena.load_grads(w_grads, b_grads)
+        grads, v, s, buffer = self.arena.grads, self.v_flat, self.s_flat, self.buffer
+        # Python floats keep the parameters' dtype in the update
+        v_correction_term = 1 - self.beta1 ** step
+        s_correction_term = 1 - self.beta2 ** step
+
+        # v = beta1 * v + (1 - beta1) * grads
+        v *= self.beta1
+        np.multiply(grads, 1 - self.beta1, out=buffer)
+        v += buffer
+
+        # s = beta2 * s + (1 - beta2) * grads^2
+        s *= self.beta2
+        np.square(grads, out=buffer)
+        buffer *= 1 - self.beta2
+        s += buffer
+
+        # params -= learning_rate * (v / v_correction_term) / (sqrt(s / s_correction_term) + epsilon)
+        np.divide(s, s_correction_term, out=buffer)
+        np.sqrt(buffer, out=buffer)
+        buffer += self.epsilon
+        np.divide(v, buffer, out=buffer)
+        buffer *= learning_rate / v_correction_term
+        self.arena.params -= buffer
+
+    def get_config(self):
+        return {"beta1": self.beta1, "beta2": self.beta2, "epsilon": self.epsilon}
+
+    def get_state(self):
+        return {"v": self.v_flat, "s": self.s_flat}
+
+
+def moment_views(arena, buffer):
+    """
+    Maps ("dw", layer) and ("db", layer) keys to the views of a flat optimizer state buffer.
+    """
+    w_views, b_views = arena.split(buffer)
+    views = {("dw", layer): view for layer, view in w_views.items()}
+    views.update({("db", layer): view for layer, view in b_views.items()})
+    return views
 
 
 # -- Assign to the short forms --
@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Profiler recording the model's hot paths, checked once per call so that it costs nothing when None
+current = None
+
+# Before Python 3.9 the peak cannot be reset, only the net growth of each call is measured
+CAN_RESET_PEAK = hasattr(tracemalloc, "reset_peak")
+
+
+class Profiler:
+    """Records the wall time, number of calls and bytes allocated of named operations.
+    Attributes
+    ----------
+    memory : bool
+        Whether allocations are traced, which slows the profiled code down. Before Python 3.9, the bytes still
+        allocated when a call returns are recorded instead of its peak.
+    stats : dict
+        Number of calls, total time in seconds and bytes allocated of each operation, by name.
+    events : list
+        Chrome trace events of every call.
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.stats = {}
+        self.events = []
+        self.start = time.perf_counter()
+
+    def call(self, name, fn, *args):
+        """
+        Calls a function and records it under a name.
+        Parameters
+        ----------
+        name : str
+            Name of the operation.
+        fn : callable
+            Function to call with the remaining arguments.
+        Returns
+        -------
+        object
+            What the function returns.
+        """
+        if self.memory:
+            if CAN_RESET_PEAK:
+                tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            end = time.perf_counter()
+            allocated = 0
+            if self.memory:
+                # Peak growth, which counts the temporaries freed before returning too
+                allocated = tracemalloc.get_traced_memory()[1 if CAN_RESET_PEAK else 0] - start_bytes
+            self.record(name, start, end, allocated)
+
+    def record(self, name, start, end, allocated=0):
+        calls, total, total_allocated = self.stats.get(name, (0, 0.0, 0))
+        self.stats[name] = (calls + 1, total + end - start, total_allocated + allocated)
+        self.events.append({
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.start) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {"allocated": allocated},
+        })
+
+    def summary(self):
+        """
+        Returns a table of the recorded operations, the slowest first.
+        """
+        total_time = sum(total for _, total, _ in self.stats.values()) or 1.0
+        lines = [f"{'operation':<28} {'calls':>7} {'total (ms)':>11} {'mean (ms)':>10} {'time':>6} {'allocated (MB)':>15}"]
+        for name, (calls, total, allocated) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+            lines.append(
+                f"{name:<28} {calls:>7} {total * 1e3:>11.2f} {total * 1e3 / calls:>10.3f} "
+                f"{total / total_time:>6.1%} {allocated / 2 ** 20:>15.2f}"
+            )
+
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, file_path):
+        """
+        Writes the recorded calls in the Chrome trace format, viewable in chrome://tracing or Perfetto.
+        Parameters
+        ----------
+        file_path : str
+            Path of the JSON file.
+        """
+        with open(file_path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+@contextmanager
+def profile(memory=True, trace_file=None):
+    """
+    Profiles the models' layers forward and backward passes, optimizer updates and losses within the block.
+    Parameters
+    ----------
+    memory : bool
+        Whether to trace the bytes allocated, at the cost of slowing things down.
+    trace_file : str, optional
+        Path to write a Chrome trace to when the block exits.
+    Returns
+    -------
+    Profiler
+        The profiler, holding the results.
+    """
+    global current
+    if current is not None:
+        raise RuntimeError("A profiler is already running")
+
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    current = profiler = Profiler(memory=memory)
+    try:
+        yield profiler
+    finally:
+        current = None
+        if started_tracing:
+            tracemalloc.stop()
+
+    if trace_file is not None:
+        profiler.export_chrome_trace(trace_file)
@@ -0,0 +1,116 @@
+import numpy as np
+
+from ..backend import floatx
+
+
+class ParameterArena:
+    """Contiguous storage for the parameters and gradients of trainable layers.
+    Every weight comes first, followed by every bias, so that a whole model can be
+    updated with a few vectorized operations. Each layer's `w` and `b` are views into `params`,
+    which is why layers must update their parameters in place.
+    Attributes
+    ----------
+    layers : list
+        Trainable layers whose parameters live in the arena, in order.
+    size : int
+        Total number of parameters.
+    num_weights : int
+        Number of weights, the biases start right after them.
+    params : numpy.ndarray
+        Flat parameters buffer.
+    grads : numpy.ndarray
+        Flat gradients buffer, laid out like `params`.
+    weights : numpy.ndarray
+        View of every weight in `params`.
+    weight_grads : numpy.ndarray
+        View of every weight gradient in `grads`.
+    w_grads : dict
+        Views of `grads` shaped like each layer's weights.
+    b_grads : dict
+        Views of `grads` shaped like each layer's biases.
+    """
+
+    def __init__(self, layers, dtype=None):
+        self.layers = list(layers)
+        self.shapes = {}
+        self.offsets = {}
+
+        params = [layer.get_params() for layer in self.layers]
+        self.num_weights = sum(w.size for w, _ in params)
+        self.size = self.num_weights + sum(b.size for _, b in params)
+
+        w_offset, b_offset = 0, self.num_weights
+        for layer, (w, b) in zip(self.layers, params):
+            self.shapes[layer] = (w.shape, b.shape)
+            self.offsets[layer] = (w_offset, b_offset)
+            w_offset += w.size
+            b_offset += b.size
+
+        self.params = np.empty(self.size, dtype=dtype or floatx())
+        self.grads = np.zeros(self.size, dtype=self.params.dtype)
+        w_views, b_views = self.split(self.params)
+        for layer, (w, b) in zip(self.layers, params):
+            w_views[layer][...] = w
+            b_views[layer][...] = b
+
+        self.bind(self.params, self.grads)
+
+    def split(self, buffer):
+        """
+        Splits a buffer laid out like `params` in per layer views.
+        Parameters
+        ----------
+        buffer : numpy.ndarray
+            Flat buffer of `size` elements.
+        Returns
+        -------
+        tuple
+            Dicts mapping each layer to the views of its weights and of its biases.
+        """
+        w_views, b_views = {}, {}
+        for layer in self.layers:
+            (w_shape, b_shape), (w_offset, b_offset) = self.shapes[layer], self.offsets[layer]
+            w_views[layer] = buffer[w_offset: w_offset + int(np.prod(w_shape))].reshape(w_shape)
+            b_views[layer] = buffer[b_offset: b_offset + int(np.prod(b_shape))].reshape(b_shape)
+
+        return w_views, b_views
+
+    def bind(self, params=None, grads=None):
+        """
+        Moves the parameters and/or the gradients to new buffers, without copying them.
+        Parameters
+        ----------
+        params : numpy.ndarray, optional
+            Flat buffer the layers' weights and biases should point to.
+        grads : numpy.ndarray, optional
+            Flat buffer the gradients should be stored in.
+        """
+        if params is not None:
+            self.params = params
+            self.weights = params[: self.num_weights]
+            w_views, b_views = self.split(params)
+            for layer in self.layers:
+                layer.w, layer.b = w_views[layer], b_views[layer]
+
+        if grads is not None:
+            self.grads = grads
+            self.weight_grads = grads[: self.num_weights]
+            self.w_grads, self.b_grads = self.split(grads)
+
+    def load_grads(self, w_grads, b_grads):
+        """
+        Copies gradients into the arena, unless they already are its own views.
+        Parameters
+        ----------
+        w_grads : dict
+            Weights' gradients of each layer.
+        b_grads : dict
+            Biases' gradients of each layer.
+        """
+        if w_grads is not self.w_grads:
+            for layer in self.layers:
+                self.w_grads[layer][...] = w_grads[layer]
+
+        if b_grads is not self.b_grads:
+            for layer in self.layers:
+                self.b_grads[layer][...] = b_grads[layer]
@@ -0,0 +1,150 @@
+import numpy as np
+
+from ..activations import Identity, ReLU, Sigmoid
+
+
+class PackedMask:
+    """Boolean tensor stored as a bitmask, 1 bit per element.
+    Attributes
+    ----------
+    bits : numpy.ndarray
+        Packed bits.
+    shape : tuple
+        Shape of the tensor.
+    dtype : numpy.dtype
+        Data type of the unpacked tensor, bool.
+    """
+
+    def __init__(self, mask):
+        self.bits = np.packbits(mask.reshape(-1))
+        self.shape = mask.shape
+        self.dtype = np.dtype(bool)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def unpack(self, out=None):
+        mask = np.unpackbits(self.bits, count=int(np.prod(self.shape))).view(bool).reshape(self.shape)
+        if out is None:
+            return mask
+        np.copyto(out, mask)
+        return out
+
+
+class PackedTensor:
+    """Floating point tensor stored with fewer bits, float16 or bfloat16.
+    bfloat16 keeps float32's range with 8 bits of precision (relative error below 2^-8). It is stored as
+    the rounded upper half of each float32. float16 is more precise (2^-11) but overflows beyond 65504.
+    Attributes
+    ----------
+    data : numpy.ndarray
+        Compressed values.
+    storage : str
+        'float16' or 'bfloat16'.
+    shape : tuple
+        Shape of the tensor.
+    dtype : numpy.dtype
+        Data type of the unpacked tensor.
+    """
+
+    def __init__(self, x, storage):
+        self.storage = storage
+        self.shape = x.shape
+        self.dtype = x.dtype
+
+        if storage == "float16":
+            self.data = x.astype(np.float16)
+        else:
+            # Round to nearest even, then keep the upper 16 bits
+            bits = np.ascontiguousarray(x, dtype=np.float32).view(np.uint32)
+            rounding = (bits >> 16) & 1
+            rounding += 0x7FFF
+            rounding += bits
+            self.data = (rounding >> 16).astype(np.uint16)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def unpack(self, out=None):
+        if self.storage == "float16":
+            x = self.data
+        else:
+            x = (self.data.astype(np.uint32) << 16).view(np.float32)
+
+        if out is None:
+            return x.astype(self.dtype)
+        np.copyto(out, x)
+        return out
+
+
+class CacheCompression:
+    """Policy storing the tensors layers cache for their backward pass in smaller representations.
+    ReLU only needs the sign of its pre-activation output, kept as a bitmask; Identity needs nothing.
+    These are exact. The layers' inputs, and the outputs of Sigmoid, can also be stored in
+    float16 or bfloat16, in which case the weights' gradients and the gradients through Sigmoid
+    are approximate. Each stored tensor is within the relative precision of the storage, 2^-8 or 2^-11,
+    and the errors of every compressed layer a gradient flows back through add up.
+    Attributes
+    ----------
+    storage : str
+        'bfloat16', 'float16', or None to only apply the exact compressions.
+    """
+
+    storages = ("bfloat16", "float16", None)
+
+    def __init__(self, storage="bfloat16"):
+        if storage not in CacheCompression.storages:
+            raise ValueError(f"Invalid storage '{storage}', expected 'bfloat16', 'float16' or None")
+        self.storage = storage
+
+    def pack(self, x):
+        return x if self.storage is None else PackedTensor(x, self.storage)
+
+    def pack_cache(self, activation, a_prev, z, a):
+        """
+        Compresses the cache of a layer.
+        Parameters
+        ----------
+        activation : Activation
+            The layer's activation, which decides what its derivative needs.
+        a_prev : numpy.ndarray
+            The layer's input.
+        z : numpy.ndarray
+            The layer's pre-activation output.
+        a : numpy.ndarray
+            The layer's activations.
+        Returns
+        -------
+        dict
+            The cache, whose entries may be packed.
+        """
+        cache = {"a_prev": self.pack(a_prev)}
+        if isinstance(activation, ReLU):
+            # The derivative of a mask of the signs is that mask, as ReLU.df only compares with 0
+            cache.update({"z": PackedMask(z > 0), "a": None})
+        elif isinstance(activation, Identity):
+            cache.update({"z": None, "a": None})
+        elif isinstance(activation, Sigmoid):
+            cache.update({"z": None, "a": self.pack(a)})
+        else:
+            cache.update({"z": z, "a": a})
+
+        return cache
+
+
+def unpack(x, out=None):
+    """
+    Returns a cached tensor, decompressed if it is packed, into `out` when given.
+    """
+    if isinstance(x, (PackedMask, PackedTensor)):
+        return x.unpack(out)
+    return x
+
+
+def nbytes(cache):
+    """
+    Returns the bytes used by a cache's tensors, packed or not.
+    """
+    return sum(x.nbytes for x in cache.values() if x is not None and hasattr(x, "nbytes"))
@@ -0,0 +1,250 @@
+"""
+Algorithms computing the forward pass of a convolution, and the autotuner choosing between them.
+
+- 'direct' accumulates one product per kernel offset, or runs the kernel backend's direct loops when it has them.
+- 'im2col' unrolls every window and convolves them with a single matrix product.
+- 'fft' multiplies the spectra of the input and the kernel, cheaper for large kernels and feature maps.
+- 'winograd_f23' and 'winograd_f43' compute 2x2 and 4x4 output tiles of a 3x3, stride 1 convolution
+  with 16 and 36 multiplies per tile and channel pair, instead of 36 and 144.
+
+Every algorithm takes a padded input of shape (batch_size, height, width, n_c_prev), a kernel of shape
+(kernel_size, kernel_size, n_c_prev, n_c), the stride and an output buffer of shape (batch_size, n_h, n_w, n_c).
+"""
+import time
+
+import numpy as np
+
+from ..backend import parallel_for
+from ..kernels import kernel_backend, numpy_kernels
+
+# Winner of the autotuning of each (sample shape, kernel shape, stride, padding, dtype)
+_TUNED = {}
+
+# Transforms (A^T, G, B^T) of Winograd's minimal filtering algorithms F(m, 3), from Lavin & Gray (2015)
+WINOGRAD = {
+    2: (
+        np.array([[1, 1, 1, 0], [0, 1, -1, -1]]),
+        np.array([[1, 0, 0], [1 / 2, 1 / 2, 1 / 2], [1 / 2, -1 / 2, 1 / 2], [0, 0, 1]]),
+        np.array([[1, 0, -1, 0], [0, 1, 1, 0], [0, -1, 1, 0], [0, 1, 0, -1]]),
+    ),
+    4: (
+        np.array([
+            [1, 1, 1, 1, 1, 0],
+            [0, 1, -1, 2, -2, 0],
+            [0, 1, 1, 4, 4, 0],
+            [0, 1, -1, 8, -8, 1],
+        ]),
+        np.array([
+            [1 / 4, 0, 0],
+            [-1 / 6, -1 / 6, -1 / 6],
+            [-1 / 6, 1 / 6, -1 / 6],
+            [1 / 24, 1 / 12, 1 / 6],
+            [1 / 24, -1 / 12, 1 / 6],
+            [0, 0, 1],
+        ]),
+        np.array([
+            [4, 0, -5, 0, 1, 0],
+            [0, -4, -4, 1, 1, 0],
+            [0, 4, -4, -1, 1, 0],
+            [0, -2, -1, 2, 1, 0],
+            [0, 2, -1, -2, 1, 0],
+            [0, 4, 0, -5, 0, 1],
+        ]),
+    ),
+}
+
+
+def direct(x, w, stride, out, cols=None):
+    kernels = kernel_backend()
+    if not kernels.unrolls_windows:
+        return kernels.conv2d(x, w, stride, out)
+
+    n_h, n_w = out.shape[1:3]
+    kernel_size = w.shape[0]
+
+    def convolve(start, stop):
+        shard = out[start:stop]
+        product = np.empty_like(shard)
+        shard.fill(0)
+        # One product per kernel offset, over a strided view of the input
+        for i in range(kernel_size):
+            for j in range(kernel_size):
+                np.matmul(x[start:stop, i: i + stride * n_h: stride, j: j + stride * n_w: stride, :], w[i, j], out=product)
+                shard += product
+
+    parallel_for(x.shape[0], convolve)
+
+    return out
+
+
+def im2col(x, w, stride, out, cols=None):
+    return numpy_kernels.conv2d(x, w, stride, out, cols)
+
+
+def fft(x, w, stride, out, cols=None):
+    height, width = x.shape[1:3]
+    n_h, n_w, n_c = out.shape[1:]
+    kernel_size = w.shape[0]
+
+    # A convolution with the flipped kernel is a cross-correlation, circular wrap-around only
+    # reaches the outputs before the (kernel_size - 1)th, which are dropped
+    w_f = np.fft.rfft2(w[::-1, ::-1], s=(height, width), axes=(0, 1))
+    w_f = w_f.reshape(-1, *w_f.shape[2:])
+    offset = kernel_size - 1
+
+    def convolve(start, stop):
+        x_f = np.fft.rfft2(x[start:stop], axes=(1, 2))
+        batch_size, f_h, f_w, n_c_prev = x_f.shape
+        # Channels are mixed with one matrix product per frequency
+        z_f = np.matmul(x_f.reshape(batch_size, -1, n_c_prev).transpose(1, 0, 2), w_f)
+        z_f = z_f.transpose(1, 0, 2).reshape(batch_size, f_h, f_w, n_c)
+        z = np.fft.irfft2(z_f, s=(height, width), axes=(1, 2))
+        out[start:stop] = z[:, offset: offset + stride * n_h: stride, offset: offset + stride * n_w: stride, :]
+
+    parallel_for(x.shape[0], convolve)
+
+    return out
+
+
+def winograd(x, w, out, m):
+    """
+    Computes a 3x3, stride 1 convolution with Winograd's F(m x m, 3 x 3) algorithm.
+    Parameters
+    ----------
+    m : int
+        Height and width of the output tiles, 2 or 4.
+    """
+    a_t, g, b_t = (matrix.astype(out.dtype) for matrix in WINOGRAD[m])
+    tile_size = m + 2
+    n_h, n_w, n_c = out.shape[1:]
+    n_c_prev = w.shape[2]
+    tiles_h, tiles_w = -(-n_h // m), -(-n_w // m)
+
+    # Kernels are transformed once, to (tile_size * tile_size, n_c_prev, n_c)
+    u = np.tensordot(g, np.tensordot(g, w, axes=(1, 0)), axes=(1, 1)).transpose(1, 0, 2, 3).reshape(-1, n_c_prev, n_c)
+
+    def convolve(start, stop):
+        shard = x[start:stop]
+        batch_size = shard.shape[0]
+        # The last tiles may go past the input, which is padded with zeros for them
+        height, width = tiles_h * m + 2, tiles_w * m + 2
+        if shard.shape[1] < height or shard.shape[2] < width:
+            padded = np.zeros((batch_size, height, width, n_c_prev), dtype=shard.dtype)
+            padded[:, : shard.shape[1], : shard.shape[2]] = shard
+            shard = padded
+
+        tiles = np.lib.stride_tricks.as_strided(
+            shard,
+            shape=(batch_size, tiles_h, tiles_w, tile_size, tile_size, n_c_prev),
+            strides=(shard.strides[0], m * shard.strides[1], m * shard.strides[2], *shard.strides[1:]),
+            writeable=False,
+        )
+        # B^T d B, the tile's rows then its columns, giving (tile_size, tile_size, batch_size, tiles_h, tiles_w, n_c_prev)
+        v = np.tensordot(b_t, np.tensordot(b_t, tiles, axes=(1, 3)), axes=(1, 4)).transpose(1, 0, 2, 3, 4, 5)
+        # One matrix product per position in the transformed tiles
+        product = np.matmul(v.reshape(tile_size ** 2, -1, n_c_prev), u)
+        product = product.reshape(tile_size, tile_size, batch_size, tiles_h, tiles_w, n_c)
+        # A^T M A, then the output tiles are put back in place
+        y = np.tensordot(a_t, np.tensordot(a_t, product, axes=(1, 0)), axes=(1, 1)).transpose(2, 3, 1, 4, 0, 5)
+        y = y.reshape(batch_size, tiles_h * m, tiles_w * m, n_c)
+        out[start:stop] = y[:, :n_h, :n_w, :]
+
+    parallel_for(x.shape[0], convolve)
+
+    return out
+
+
+def winograd_f23(x, w, stride, out, cols=None):
+    return winograd(x, w, out, 2)
+
+
+def winograd_f43(x, w, stride, out, cols=None):
+    return winograd(x, w, out, 4)
+
+
+ALGORITHMS = {
+    "direct": direct,
+    "im2col": im2col,
+    "fft": fft,
+    "winograd_f23": winograd_f23,
+    "winograd_f43": winograd_f43,
+}
+
+
+def supported_algorithms(kernel_size, stride) -> list:
+    """
+    Returns the names of the algorithms that can compute a convolution.
+    """
+    names = ["direct", "im2col", "fft"]
+    if kernel_size == 3 and stride == 1:
+        names += ["winograd_f23", "winograd_f43"]
+    return names
+
+
+def convolve(x, w, stride, out, algorithm="im2col", cols=None, pad=0):
+    """
+    Convolves a padded input with a kernel.
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Padded input volume of shape (batch_size, height, width, n_c_prev).
+    w : numpy.ndarray
+        Kernel of shape (kernel_size, kernel_size, n_c_prev, n_c).
+    stride : int
+        Stride along height and width.
+    out : numpy.ndarray
+        Output volume of shape (batch_size, n_h, n_w, n_c), overwritten.
+    algorithm : str
+        Name of the algorithm, or 'auto' to use the fastest one for this sample shape, timed on its first call.
+    cols : numpy.ndarray, optional
+        Buffer to unroll the windows into, for 'im2col'.
+    pad : int
+        Padding the input was given, part of the key the autotuned algorithms are cached under.
+    Returns
+    -------
+    numpy.ndarray
+        The output volume.
+    """
+    if algorithm == "auto":
+        algorithm = autotune(x, w, stride, out, cols, pad)
+    elif algorithm not in supported_algorithms(w.shape[0], stride):
+        raise ValueError(f"The '{algorithm}' algorithm does not support {w.shape[0]}x{w.shape[1]} kernels with stride {stride}")
+
+    return ALGORITHMS[algorithm](x, w, stride, out, cols)
+
+
+def autotune(x, w, stride, out, cols=None, pad=0, repeat=2) -> str:
+    """
+    Returns the fastest algorithm for a convolution, timing every supported one the first time its shape is seen.
+    The batch size is not part of the shape, so partial batches and inference chunks reuse the choice.
+    """
+    key = (x.shape[1:], w.shape, stride, pad, np.dtype(out.dtype).name)
+    if key in _TUNED:
+        return _TUNED[key]
+
+    timings = {}
+    for name in supported_algorithms(w.shape[0], stride):
+        # A first untimed call, which may compile kernels or allocate buffers
+        ALGORITHMS[name](x, w, stride, out, cols)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            ALGORITHMS[name](x, w, stride, out, cols)
+        timings[name] = (time.perf_counter() - start) / repeat
+
+    _TUNED[key] = best = min(timings, key=timings.get)
+    return best
+
+
+def tuned_algorithms() -> dict:
+    """
+    Returns the algorithm chosen by the autotuner for each shape, keyed by
+    (sample shape, kernel shape, stride, padding, dtype).
+    """
+    return dict(_TUNED)
+
+
+def clear_tuned_algorithms() -> None:
+    """
+    Forgets the autotuned algorithms, they are timed again on their next call.
+    """
+    _TUNED.clear()
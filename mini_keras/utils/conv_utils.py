@@ -0,0 +1,177 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+def get_windows(x, kernel_size, stride, n_h, n_w):
+    """
+    Returns a read-only strided view over every sliding window of the input.
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Input volume of shape (batch_size, height, width, channels).
+    kernel_size : int
+        Height and Width of the window.
+    stride : int
+        Stride along height and width.
+    n_h : int
+        Number of windows along the height.
+    n_w : int
+        Number of windows along the width.
+    Returns
+    -------
+    numpy.ndarray
+        View of shape (batch_size, n_h, n_w, kernel_size, kernel_size, channels).
+    """
+    s_n, s_h, s_w, s_c = x.strides
+    return as_strided(
+        x,
+        shape=(x.shape[0], n_h, n_w, kernel_size, kernel_size, x.shape[3]),
+        strides=(s_n, stride * s_h, stride * s_w, s_h, s_w, s_c),
+        writeable=False,
+    )
+
+
+def im2col(x, kernel_size, stride, n_h, n_w, out=None):
+    """
+    Unrolls every sliding window of the input into a row.
+    The columns are ordered like a (kernel_size, kernel_size, channels) kernel,
+    so a convolution is a single matrix product with the reshaped weights.
+    Parameters
+    ----------
+    out : numpy.ndarray, optional
+        Buffer of shape (batch_size, n_h, n_w, kernel_size, kernel_size, channels) to unroll the windows into.
+    Returns
+    -------
+    numpy.ndarray
+        Matrix of shape (batch_size * n_h * n_w, kernel_size * kernel_size * channels).
+    """
+    windows = get_windows(x, kernel_size, stride, n_h, n_w)
+    if out is not None:
+        np.copyto(out, windows)
+        windows = out
+    return windows.reshape(-1, kernel_size * kernel_size * x.shape[3])
+
+
+def col2im(cols, out, kernel_size, stride):
+    """
+    Accumulates unrolled windows back into the volume they were taken from.
+    Parameters
+    ----------
+    cols : numpy.ndarray
+        Windows of shape (batch_size, n_h, n_w, kernel_size, kernel_size, channels).
+    out : numpy.ndarray
+        Volume of shape (batch_size, height, width, channels), updated in place.
+    kernel_size : int
+        Height and Width of the window.
+    stride : int
+        Stride along height and width.
+    Returns
+    -------
+    numpy.ndarray
+        The updated output volume.
+    """
+    n_h, n_w = cols.shape[1], cols.shape[2]
+
+    # Only loop over the kernel offsets, every window is handled at once
+    for i in range(kernel_size):
+        v_end = i + stride * n_h
+
+        for j in range(kernel_size):
+            h_end = j + stride * n_w
+            out[:, i:v_end:stride, j:h_end:stride, :] += cols[:, :, :, i, j, :]
+
+    return out
+
+
+def depthwise_conv(x, w, stride, out, scratch=None):
+    """
+    Convolves each channel of the input with its own filters.
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Padded input volume of shape (batch_size, height, width, channels).
+    w : numpy.ndarray
+        Kernel of shape (kernel_size, kernel_size, channels, depth_multiplier).
+    stride : int
+        Stride along height and width.
+    out : numpy.ndarray
+        Contiguous output volume of shape (batch_size, n_h, n_w, channels * depth_multiplier), overwritten.
+        Output channel c * depth_multiplier + m is input channel c convolved with filter m.
+    scratch : numpy.ndarray, optional
+        Buffer for the products and, with several filters per channel, their sums, allocated when not given.
+        Of shape (1, batch_size, n_h, n_w, channels), or (depth_multiplier + 1, ...) with several filters per channel.
+    Returns
+    -------
+    numpy.ndarray
+        The output volume.
+    """
+    kernel_size, _, channels, depth_multiplier = w.shape
+    n_h, n_w = out.shape[1:3]
+    out_channels = out.reshape(*out.shape[:3], channels, depth_multiplier)
+    # Each filter is accumulated over the channels' contiguous axis, only moved in place at the end
+    if scratch is None:
+        scratch = np.empty((1 if depth_multiplier == 1 else depth_multiplier + 1, *out.shape[:3], channels), dtype=out.dtype)
+    product = scratch[0]
+    acc = out_channels[:, :, :, :, 0] if depth_multiplier == 1 else scratch[1:]
+
+    # One broadcast product per kernel offset and filter, there is no unrolled copy of the windows
+    for m in range(depth_multiplier):
+        acc_m = acc if depth_multiplier == 1 else acc[m]
+        acc_m.fill(0)
+        for i in range(kernel_size):
+            for j in range(kernel_size):
+                window = x[:, i: i + stride * n_h: stride, j: j + stride * n_w: stride, :]
+                np.multiply(window, w[i, j, :, m], out=product)
+                acc_m += product
+
+    if depth_multiplier != 1:
+        out_channels[...] = acc.transpose(1, 2, 3, 4, 0)
+
+    return out
+
+
+def depthwise_conv_backward(x, dz, w, stride, da_prev, dw):
+    """
+    Backpropagates through a depthwise convolution.
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Padded input volume of shape (batch_size, height, width, channels).
+    dz : numpy.ndarray
+        Gradients of the output volume, of shape (batch_size, n_h, n_w, channels * depth_multiplier).
+    w : numpy.ndarray
+        Kernel of shape (kernel_size, kernel_size, channels, depth_multiplier).
+    stride : int
+        Stride along height and width.
+    da_prev : numpy.ndarray
+        Gradients of the padded input volume, accumulated into.
+    dw : numpy.ndarray
+        Gradients of the kernel, summed over the batch and overwritten, or None to skip them.
+    Returns
+    -------
+    numpy.ndarray
+        The gradients of the padded input volume.
+    """
+    kernel_size, _, channels, depth_multiplier = w.shape
+    n_h, n_w = dz.shape[1:3]
+    # Gradients of each filter, along the channels' contiguous axis
+    dz_filters = dz.reshape(*dz.shape[:3], channels, depth_multiplier).transpose(4, 0, 1, 2, 3)
+    if depth_multiplier != 1:
+        dz_filters = np.ascontiguousarray(dz_filters)
+    product = np.empty(dz.shape[:3] + (channels,), dtype=dz.dtype)
+
+    for i in range(kernel_size):
+        v_end = i + stride * n_h
+
+        for j in range(kernel_size):
+            h_end = j + stride * n_w
+            window = x[:, i:v_end:stride, j:h_end:stride, :]
+            da_window = da_prev[:, i:v_end:stride, j:h_end:stride, :]
+
+            for m in range(depth_multiplier):
+                np.multiply(dz_filters[m], w[i, j, :, m], out=product)
+                da_window += product
+                if dw is not None:
+                    dw[i, j, :, m] = np.einsum("nhwc,nhwc->c", window, dz_filters[m])
+
+    return da_prev
@@ -1,5 +1,9 @@
+import json
 import os
+import queue
+import threading
 
+import numpy as np
 import requests
 
 
@@ -33,3 +37,244 @@ def get_file(url, filename, cache_dir_location="datasets"):
             raise exc
 
     return full_path
+
+
+def save_memmap_dataset(directory, arrays, chunk_size=65536):
+    """
+    Writes arrays in the memory mapped dataset format: one raw .npy shard per array and a JSON manifest.
+    Parameters
+    ----------
+    directory : str
+        Directory the dataset is written to.
+    arrays : dict
+        Arrays of the dataset by name, samples along their first axis. Any mapping works, e.g. an opened .npz archive,
+        in which case only one array is loaded at a time.
+    chunk_size : int
+        Number of samples copied at a time.
+    Returns
+    -------
+    str
+        The path of the manifest.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"version": 1, "arrays": {}}
+
+    for name in arrays.keys():
+        array = arrays[name]
+        file_name = f"{name}.npy"
+        shard = np.lib.format.open_memmap(
+            os.path.join(directory, file_name), mode="w+", dtype=array.dtype, shape=array.shape
+        )
+        for start in range(0, array.shape[0], chunk_size):
+            shard[start: start + chunk_size] = array[start: start + chunk_size]
+
+        shard.flush()
+        del shard
+        manifest["arrays"][name] = {
+            "file": file_name,
+            "shape": list(array.shape),
+            "dtype": np.dtype(array.dtype).str,
+        }
+
+    # The manifest is written last, its presence marks a complete dataset
+    manifest_path = os.path.join(directory, "manifest.json")
+    with open(manifest_path + ".tmp", "w") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    return manifest_path
+
+
+def load_memmap_dataset(directory):
+    """
+    Opens a dataset written by `save_memmap_dataset` without reading it.
+    Parameters
+    ----------
+    directory : str
+        Directory of the dataset.
+    Returns
+    -------
+    dict
+        Read-only memory mapped arrays of the dataset by name.
+    """
+    with open(os.path.join(directory, "manifest.json")) as file:
+        manifest = json.load(file)
+
+    arrays = {}
+    for name, info in manifest["arrays"].items():
+        array = np.load(os.path.join(directory, info["file"]), mmap_mode="r")
+        if list(array.shape) != info["shape"] or array.dtype.str != info["dtype"]:
+            raise ValueError(f"The shard of '{name}' does not match the dataset manifest")
+
+        arrays[name] = array
+
+    return arrays
+
+
+def get_memmap_dataset(file_path):
+    """
+    Converts a .npz archive to the memory mapped dataset format the first time, then opens it.
+    The dataset is stored next to the archive, in a directory named after it.
+    Parameters
+    ----------
+    file_path : str
+        Path of the .npz archive, e.g. as returned by `get_file`.
+    Returns
+    -------
+    dict
+        Read-only memory mapped arrays of the dataset by name.
+    """
+    directory = os.path.splitext(file_path)[0]
+
+    if not os.path.exists(os.path.join(directory, "manifest.json")):
+        with np.load(file_path) as archive:
+            save_memmap_dataset(directory, archive)
+
+    return load_memmap_dataset(directory)
+
+
+class DataLoader:
+    """Iterates over the mini batches of a dataset, gathering each one on demand.
+    Only the sample indices are shuffled, and every batch is gathered into a reused buffer,
+    so a yielded batch is only valid until the next one is requested.
+    Attributes
+    ----------
+    x : numpy.ndarray
+        Input data, any array supporting integer indexing along its first axis (e.g. a memmap).
+    y : numpy.ndarray
+        Target labels.
+    batch_size : int
+        Number of samples per mini batch. None makes a single batch of the whole dataset.
+    shuffle : bool
+        Whether the samples are shuffled every epoch.
+    prefetch : int
+        Number of batches gathered ahead on a background thread, 0 to gather them on the caller's thread.
+    drop_last : bool
+        Whether the last, partial, mini batch is skipped.
+    transform : callable
+        Applied to each gathered pair of input data and target labels, e.g. to preprocess
+        memory mapped data lazily. It runs on the background thread when prefetching.
+    """
+
+    def __init__(self, x, y, batch_size, shuffle=True, prefetch=0, drop_last=False, transform=None):
+        if x.shape[0] != y.shape[0]:
+            raise ValueError(
+                f"x and y have a different number of samples ({x.shape[0]} and {y.shape[0]})"
+            )
+        if batch_size is None:
+            batch_size = max(x.shape[0], 1)
+        elif batch_size < 1:
+            raise ValueError(f"The batch size must be at least 1, got {batch_size}")
+
+        self.x = x
+        self.y = y
+        self.batch_size = int(batch_size)
+        self.shuffle = shuffle
+        self.prefetch = prefetch
+        self.drop_last = drop_last
+        self.transform = transform
+        self.buffers = None
+
+    @property
+    def num_samples(self):
+        return self.x.shape[0]
+
+    def __len__(self):
+        if self.drop_last:
+            return self.num_samples // self.batch_size
+
+        return -(-self.num_samples // self.batch_size)
+
+    def __iter__(self):
+        if self.shuffle:
+            indices = np.random.permutation(self.num_samples)
+        else:
+            indices = np.arange(self.num_samples)
+
+        if self.prefetch > 0:
+            return self.prefetch_batches(indices)
+
+        return self.batches(indices)
+
+    def batches(self, indices):
+        """
+        Gathers the mini batches in turn, cycling through the reused buffers.
+        Parameters
+        ----------
+        indices : numpy.ndarray
+            Order in which the samples are visited.
+        """
+        # The buffers being filled, queued and used by the caller must be distinct
+        num_buffers = self.prefetch + 2 if self.prefetch > 0 else 1
+        if self.buffers is None or len(self.buffers) != num_buffers:
+            self.buffers = [
+                (
+                    np.empty((self.batch_size, *self.x.shape[1:]), dtype=self.x.dtype),
+                    np.empty((self.batch_size, *self.y.shape[1:]), dtype=self.y.dtype),
+                )
+                for _ in range(num_buffers)
+            ]
+
+        for k in range(len(self)):
+            x_buffer, y_buffer = self.buffers[k % num_buffers]
+            # Sorted indices read the input sequentially, which matters for memory mapped data
+            batch_indices = np.sort(indices[k * self.batch_size: (k + 1) * self.batch_size])
+            size = batch_indices.shape[0]
+
+            np.take(self.x, batch_indices, axis=0, out=x_buffer[:size])
+            np.take(self.y, batch_indices, axis=0, out=y_buffer[:size])
+
+            if self.transform is not None:
+                yield self.transform(x_buffer[:size], y_buffer[:size])
+            else:
+                yield x_buffer[:size], y_buffer[:size]
+
+    def prefetch_batches(self, indices):
+        """
+        Gathers the mini batches on a background thread, up to `prefetch` batches ahead.
+        Parameters
+        ----------
+        indices : numpy.ndarray
+            Order in which the samples are visited.
+        """
+        batches = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        end = object()
+
+        def put(item):
+            # Give up as soon as the caller stops iterating
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+
+            return False
+
+        def produce():
+            try:
+                for batch in self.batches(indices):
+                    if not put(batch):
+                        return
+
+                put(end)
+            except Exception as exc:
+                put(exc)
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                batch = batches.get()
+                if batch is end:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+
+                yield batch
+        finally:
+            # Unblock the producer if the caller stopped early
+            stop.set()
+            thread.join()
@@ -1,7 +1,9 @@
 import numpy as np
 
+from ..backend import floatx
 
-def one_hot_encoder(x, num_classes):
-    out = np.zeros((x.shape[0], num_classes))
+
+def one_hot_encoder(x, num_classes, dtype=None):
+    out = np.zeros((x.shape[0], num_classes), dtype=dtype or floatx())
     out[np.arange(x.shape[0]), x[:, 0]] = 1
     return out
@@ -0,0 +1,88 @@
+import numpy as np
+
+
+class Workspace:
+    """Scratch buffers shared by the layers of a model across training steps.
+    Buffers are keyed by their role, e.g. 'cols', the shape of a sample and their dtype, not by layer, so that
+    layers of the same shape take turns using the same memory, which does not grow with the depth of the model.
+    A request for fewer samples than a buffer holds, e.g. for the last partial batch, gets a view of its
+    leading samples; a bigger one replaces it. Buffers must only hold temporaries of one layer's pass, never
+    data kept until the next one. A request names the arrays it must not overlap, like the gradients a layer
+    is reading, another buffer of the same role is then used.
+    Attributes
+    ----------
+    buffers : dict
+        Buffers by role, sample shape and dtype, a list of at most a few each.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffers in self.buffers.values() for buffer in buffers)
+
+    def get(self, name, shape, dtype, zeros=False, avoid=()):
+        """
+        Returns a scratch buffer, its content is whatever the previous user left in it.
+        Parameters
+        ----------
+        name : str
+            Role of the buffer.
+        shape : tuple
+            Shape of the buffer, the first dimension being the number of samples.
+        dtype : numpy.dtype
+            Data type of the buffer.
+        zeros : bool
+            Whether the buffer is zeroed when allocated. It is not zeroed again when reused.
+        avoid : tuple
+            Arrays still in use that the buffer must not overlap.
+        Returns
+        -------
+        numpy.ndarray
+            Contiguous buffer of the given shape.
+        """
+        dtype = np.dtype(dtype)
+        buffers = self.buffers.setdefault((name, tuple(shape[1:]), dtype), [])
+
+        for index, buffer in enumerate(buffers):
+            if any(np.may_share_memory(buffer, array) for array in avoid):
+                continue
+
+            if buffer.shape[0] < shape[0]:
+                # Drop the old buffer first, so both are never alive together
+                buffers[index] = buffer = None
+                buffer = buffers[index] = (np.zeros if zeros else np.empty)(shape, dtype=dtype)
+            return buffer[: shape[0]]
+
+        buffer = (np.zeros if zeros else np.empty)(shape, dtype=dtype)
+        buffers.append(buffer)
+        return buffer
+
+    def pad(self, name, x, pad):
+        """
+        Copies a volume into a persistent zero bordered buffer, whose borders are never written.
+        Parameters
+        ----------
+        name : str
+            Role of the buffer. Buffers of different padding sizes are kept apart, their borders differ.
+        x : numpy.ndarray
+            Volume of shape (batch_size, height, width, channels).
+        pad : int
+            Padding size, along height and width.
+        Returns
+        -------
+        numpy.ndarray
+            The padded volume.
+        """
+        batch_size, height, width, channels = x.shape
+        padded = self.get(f"{name}_{pad}", (batch_size, height + 2 * pad, width + 2 * pad, channels), x.dtype, zeros=True)
+        padded[:, pad: pad + height, pad: pad + width, :] = x
+
+        return padded
+
+    def clear(self):
+        """
+        Releases every buffer. They are allocated again when needed.
+        """
+        self.buffers.clear()
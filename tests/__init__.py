@@ -0,0 +1,60 @@
+import numpy as np
+
+from mini_keras import Dense, Sequential, relu, softmax, softmax_cross_entropy
+
+
+def build_model(input_dim=4, layers=None, cost_function=softmax_cross_entropy, **kwargs):
+    """
+    Returns a model with the same initial weights on every call, by default a small classifier into 3 classes.
+    Parameters
+    ----------
+    input_dim : int or tuple
+        Shape of a sample.
+    layers : list, optional
+        The model's layers, `Dense(8, relu), Dense(3, softmax)` by default.
+    cost_function : BaseCostFunction
+        The model's cost function.
+    kwargs
+        Other arguments of `Sequential`.
+    """
+    np.random.seed(0)
+    if layers is None:
+        layers = [Dense(8, relu), Dense(3, softmax)]
+    return Sequential(input_dim, layers, cost_function, **kwargs)
+
+
+def make_data(num_samples, input_dim=4, num_classes=3, seed=0):
+    """
+    Returns standard normal float32 samples and random one-hot float32 labels.
+    """
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal((num_samples, *np.atleast_1d(input_dim))).astype(np.float32)
+    y = np.eye(num_classes, dtype=np.float32)[rng.integers(0, num_classes, num_samples)]
+    return x, y
+
+
+def numerical_gradients(model, x, y, epsilon=1e-6):
+    """
+    Returns the central differences of the regularized cost wrt every parameter, laid out like `model.arena.params`.
+    The training forward pass is replayed with `recompute`, so random and stateful layers do the same as in the last
+    `compute_gradients`. The model should be in float64.
+    """
+    params = model.arena.params
+    gradients = np.empty_like(params)
+
+    def cost():
+        a = x
+        for layer in model.layers:
+            a = layer.recompute(a)
+        return model.regularized_cost(a, y)
+
+    for i in range(params.size):
+        value = params[i]
+        params[i] = value + epsilon
+        cost_plus = cost()
+        params[i] = value - epsilon
+        cost_minus = cost()
+        params[i] = value
+        gradients[i] = (cost_plus - cost_minus) / (2 * epsilon)
+
+    return gradients
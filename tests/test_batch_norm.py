@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+import mini_keras
+from mini_keras import BatchNorm, Conv, Dense, Flatten, SeparableConv, identity, relu, softmax
+from mini_keras.models.frozen import FrozenModel
+from . import build_model, make_data, numerical_gradients
+
+
+class BatchNormTest(unittest.TestCase):
+    def test_gradients_match_finite_differences(self):
+        mini_keras.set_floatx("float64")
+        try:
+            layers = [
+                Conv(3, 1, 4, padding="same"),
+                BatchNorm(),
+                Conv(3, 2, 4, activation=relu),
+                BatchNorm(momentum=0.5),
+                Flatten(),
+                Dense(6, identity),
+                BatchNorm(),
+                Dense(3, softmax),
+            ]
+            model = build_model((7, 7, 3), layers, l2_lambda=0.1)
+            x, y = make_data(5, (7, 7, 3))
+            model.compute_gradients(x, y)
+            np.testing.assert_allclose(model.arena.grads, numerical_gradients(model, x, y), rtol=1e-5, atol=1e-7)
+        finally:
+            mini_keras.set_floatx("float32")
+
+    def test_freeze_folding_matches_predict(self):
+        cases = {
+            "conv": ((6, 6, 3), [Conv(3, 1, 4, padding="same"), BatchNorm(), Flatten()]),
+            "separable": ((6, 6, 3), [SeparableConv(3, 1, 4, depth_multiplier=2), BatchNorm(), Flatten()]),
+            "dense": (5, [Dense(6, identity), BatchNorm()]),
+        }
+        for name, (input_dim, layers) in cases.items():
+            with self.subTest(layer=name):
+                model = build_model(input_dim, [*layers, Dense(3, softmax)])
+                x, y = make_data(32, input_dim)
+                # Shifted and scaled data moves the running statistics and the BatchNorm parameters away from the identity
+                for step in range(1, 21):
+                    model.train_step(3 * x + 1, y, 0.05, step)
+
+                # Compared before the softmax, which would hide most of a folding error
+                frozen = FrozenModel(model.layers[:-1], input_dim, 32)
+                # The BatchNorm is folded into the layer before it
+                self.assertEqual(len(frozen.steps), len(layers) - 1)
+                expected = x
+                for layer in model.layers[:-1]:
+                    expected = layer.forward(expected, training=False)
+                np.testing.assert_allclose(frozen(x), expected, rtol=1e-5, atol=1e-5)
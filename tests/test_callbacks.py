@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from mini_keras import BatchNorm, Dense, Sequential, relu, softmax
+from mini_keras.base import BaseCallback
+from mini_keras.callbacks import EarlyStopping, ModelCheckpoint
+from . import build_model, make_data
+
+
+class FailAtStep(BaseCallback):
+    def __init__(self, step):
+        super().__init__()
+        self.step = step
+
+    def on_batch_end(self, step, cost):
+        if step == self.step:
+            raise ValueError("training failed")
+
+
+class ModelCheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.x, self.y = make_data(20)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def train(self, file_path, *callbacks, num_epochs=3):
+        model = build_model()
+        checkpoint = ModelCheckpoint(file_path, every_n_steps=1)
+        model.train(self.x, self.y, 5, num_epochs=num_epochs, callbacks=[*callbacks, checkpoint], verbose=False)
+        return model
+
+    def test_writes_and_rotates(self):
+        file_path = os.path.join(self.directory.name, "model-{step}.mk")
+        model = build_model()
+        checkpoint = ModelCheckpoint(file_path, keep=2)
+        model.train(self.x, self.y, 5, num_epochs=3, callbacks=[checkpoint], verbose=False)
+
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["model-12.mk", "model-8.mk"])
+        loaded = Sequential.load(file_path.format(step=12), mmap=False)
+        np.testing.assert_array_equal(loaded.arena.params, model.arena.params)
+
+    def test_write_error_is_raised(self):
+        file_path = os.path.join(self.directory.name, "missing", "model.mk")
+        with self.assertRaisesRegex(RuntimeError, "Writing a checkpoint failed"):
+            self.train(file_path)
+
+    def test_write_error_does_not_replace_the_training_error(self):
+        file_path = os.path.join(self.directory.name, "missing", "model.mk")
+        with self.assertWarnsRegex(RuntimeWarning, "Writing a checkpoint failed"):
+            with self.assertRaisesRegex(ValueError, "training failed"):
+                self.train(file_path, FailAtStep(2))
+
+
+class EarlyStoppingTest(unittest.TestCase):
+    def run_epochs(self, callback, values, monitor):
+        model = build_model()
+        callback.set_model(model)
+        callback.on_train_begin()
+        for epoch, value in enumerate(values, 1):
+            model.epoch = epoch
+            callback.on_epoch_end(epoch, {monitor: value})
+            if model.stop_training:
+                break
+        callback.on_train_end()
+        return model
+
+    def test_min_mode(self):
+        callback = EarlyStopping(monitor="loss", patience=2)
+        model = self.run_epochs(callback, [0.34, 0.33, 0.32, 0.314], "loss")
+        self.assertFalse(model.stop_training)
+        self.assertEqual((callback.best, callback.best_epoch), (0.314, 4))
+
+        callback = EarlyStopping(monitor="loss", patience=2)
+        model = self.run_epochs(callback, [0.34, 0.3, 0.31, 0.32, 0.2], "loss")
+        self.assertTrue(model.stop_training)
+        self.assertEqual((callback.best, callback.best_epoch, model.epoch), (0.3, 2, 4))
+
+    def test_max_mode(self):
+        callback = EarlyStopping(monitor="val_accuracy", patience=1, min_delta=0.01)
+        model = self.run_epochs(callback, [0.5, 0.6, 0.605, 0.9], "val_accuracy")
+        self.assertTrue(model.stop_training)
+        self.assertEqual((callback.best, callback.best_epoch, model.epoch), (0.6, 2, 3))
+
+    def test_restores_the_best_weights_and_layer_state(self):
+        model = build_model(layers=[Dense(8, relu), BatchNorm(), Dense(3, softmax)])
+        batch_norm = model.layers[1]
+        x, y = make_data(20)
+
+        callback = EarlyStopping(monitor="loss", patience=1)
+        callback.set_model(model)
+        callback.on_train_begin()
+        model.train_step(x, y, 0.1, 1)
+        model.epoch = 1
+        callback.on_epoch_end(1, {"loss": 0.1})
+        params, running_mean = model.arena.params.copy(), batch_norm.running_mean.copy()
+
+        model.train_step(x, y, 0.1, 2)
+        model.epoch = 2
+        callback.on_epoch_end(2, {"loss": 0.2})
+        self.assertTrue(model.stop_training)
+        self.assertFalse(np.array_equal(batch_norm.running_mean, running_mean))
+
+        callback.on_train_end()
+        np.testing.assert_array_equal(model.arena.params, params)
+        np.testing.assert_array_equal(batch_norm.running_mean, running_mean)
@@ -0,0 +1,99 @@
+import unittest
+
+import numpy as np
+
+from mini_keras import Conv, Dense, Flatten, relu, sigmoid, softmax
+from mini_keras.utils.compression import CacheCompression, PackedMask, PackedTensor, nbytes
+from . import build_model, make_data
+
+PRECISION = {"bfloat16": 2 ** -8, "float16": 2 ** -11}
+
+
+def build_mixed_model():
+    layers = [
+        Conv(3, 1, 8, padding="same", activation=relu),
+        Conv(3, 2, 8, activation=sigmoid),
+        Conv(1, 1, 4),
+        Flatten(),
+        Dense(32, relu),
+        Dense(16, sigmoid),
+        Dense(3, softmax),
+    ]
+    return build_model((8, 8, 3), layers)
+
+
+def relative_errors(model, expected):
+    """
+    Returns the relative error, in norm, of the gradients of each parameter of a model.
+    """
+    errors = []
+    for layer, expected_layer in zip(model.trainable_layers, expected.trainable_layers):
+        for grads, expected_grads in ((model.w_grads, expected.w_grads), (model.b_grads, expected.b_grads)):
+            diff = grads[layer] - expected_grads[expected_layer]
+            errors.append(np.linalg.norm(diff) / np.linalg.norm(expected_grads[expected_layer]))
+    return errors
+
+
+class PackedTensorTest(unittest.TestCase):
+    def test_round_trip(self):
+        x = np.random.default_rng(0).standard_normal(10000).astype(np.float32) * 100
+        for storage, precision in PRECISION.items():
+            with self.subTest(storage=storage):
+                packed = PackedTensor(x, storage)
+                self.assertEqual(packed.nbytes, x.nbytes // 2)
+                self.assertEqual(packed.unpack().dtype, np.float32)
+                self.assertLessEqual(np.max(np.abs(packed.unpack() - x) / np.abs(x)), precision)
+
+        # bfloat16 keeps float32's range
+        np.testing.assert_allclose(PackedTensor(np.array([1e30, -1e-30], np.float32), "bfloat16").unpack(), [1e30, -1e-30], rtol=2 ** -8)
+
+    def test_mask(self):
+        mask = np.random.default_rng(0).random((3, 5, 7)) > 0.5
+        packed = PackedMask(mask)
+        self.assertEqual(packed.nbytes, 14)
+        np.testing.assert_array_equal(packed.unpack(), mask)
+        np.testing.assert_array_equal(packed.unpack(out=np.empty(mask.shape, bool)), mask)
+
+
+class CacheCompressionTest(unittest.TestCase):
+    def setUp(self):
+        self.x, self.y = make_data(32, (8, 8, 3))
+
+    def gradients(self, build, storage):
+        model = build()
+        model.set_cache_compression(CacheCompression(storage))
+        model.compute_gradients(self.x, self.y)
+        return model
+
+    def test_exact_compressions(self):
+        expected = build_mixed_model()
+        expected.compute_gradients(self.x, self.y)
+        model = self.gradients(build_mixed_model, None)
+        np.testing.assert_array_equal(model.arena.grads, expected.arena.grads)
+
+        cache_bytes = sum(nbytes(layer.cache) for layer in model.layers if hasattr(layer, "cache"))
+        expected_bytes = sum(nbytes(layer.cache) for layer in expected.layers if hasattr(layer, "cache"))
+        self.assertLess(cache_bytes, expected_bytes)
+
+    def test_single_compressed_layer(self):
+        # Only the inputs of the layers are stored approximately, once on the way back to each gradient
+        def build():
+            return build_model((8, 8, 3), [Conv(3, 1, 8, padding="same", activation=relu), Flatten(), Dense(3, softmax)])
+
+        expected = build()
+        expected.compute_gradients(self.x, self.y)
+        for storage, precision in PRECISION.items():
+            with self.subTest(storage=storage):
+                self.assertLessEqual(max(relative_errors(self.gradients(build, storage), expected)), precision)
+
+    def test_errors_add_up(self):
+        expected = build_mixed_model()
+        expected.compute_gradients(self.x, self.y)
+        for storage, precision in PRECISION.items():
+            with self.subTest(storage=storage):
+                model = self.gradients(build_mixed_model, storage)
+                self.assertLessEqual(max(relative_errors(model, expected)), precision * len(model.trainable_layers))
+
+    def test_invalid_storage(self):
+        with self.assertRaises(ValueError):
+            CacheCompression("int8")
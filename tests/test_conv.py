@@ -0,0 +1,124 @@
+import unittest
+
+import numpy as np
+
+import mini_keras
+from mini_keras import Conv, Dense, DepthwiseConv, Flatten, SeparableConv, relu, sigmoid, softmax
+from . import build_model, make_data, numerical_gradients
+
+
+def loop_forward(layer, a_prev):
+    """
+    The sliding window forward pass `Conv` had before im2col, without the activation.
+    """
+    batch_size = a_prev.shape[0]
+    a_prev_pad = Conv.zero_pad(a_prev, layer.pad)
+    out = np.zeros((batch_size, layer.n_h, layer.n_w, layer.n_c), dtype=a_prev.dtype)
+
+    for i in range(layer.n_h):
+        v_start = i * layer.stride
+        v_end = v_start + layer.kernel_size
+
+        for j in range(layer.n_w):
+            h_start = j * layer.stride
+            h_end = h_start + layer.kernel_size
+
+            out[:, i, j, :] = np.sum(
+                a_prev_pad[:, v_start:v_end, h_start:h_end, :, np.newaxis] * layer.w[np.newaxis, :, :, :],
+                axis=(1, 2, 3),
+            )
+
+    return out + layer.b
+
+
+def loop_backward(layer, a_prev, dz):
+    """
+    The sliding window backward pass `Conv` had before im2col, returning da_prev and dw.
+    """
+    batch_size = a_prev.shape[0]
+    a_prev_pad = Conv.zero_pad(a_prev, layer.pad)
+    da_prev_pad = np.zeros(a_prev_pad.shape, dtype=a_prev.dtype)
+    dw = np.zeros(layer.w.shape, dtype=a_prev.dtype)
+
+    for i in range(layer.n_h):
+        v_start = layer.stride * i
+        v_end = v_start + layer.kernel_size
+
+        for j in range(layer.n_w):
+            h_start = layer.stride * j
+            h_end = h_start + layer.kernel_size
+
+            da_prev_pad[:, v_start:v_end, h_start:h_end, :] += np.sum(
+                layer.w[np.newaxis, :, :, :, :] * dz[:, i: i + 1, j: j + 1, np.newaxis, :],
+                axis=4,
+            )
+            dw += np.sum(
+                a_prev_pad[:, v_start:v_end, h_start:h_end, :, np.newaxis] * dz[:, i: i + 1, j: j + 1, np.newaxis, :],
+                axis=0,
+            )
+
+    h_end, w_end = da_prev_pad.shape[1] - layer.pad, da_prev_pad.shape[2] - layer.pad
+    return da_prev_pad[:, layer.pad:h_end, layer.pad:w_end, :], dw / batch_size
+
+
+class ConvTest(unittest.TestCase):
+    def test_im2col_matches_the_loops(self):
+        rng = np.random.default_rng(0)
+        for kernel_size in (1, 3, 4, 5):
+            for stride in (1, 2, 3):
+                for padding in ("valid", "same"):
+                    with self.subTest(kernel_size=kernel_size, stride=stride, padding=padding):
+                        layer = Conv(kernel_size, stride, 4, padding=padding)
+                        layer.init((11, 11, 3))
+                        a_prev = rng.standard_normal((2, 11, 11, 3)).astype(np.float32)
+
+                        z = layer.forward(a_prev, training=True)
+                        np.testing.assert_allclose(z, loop_forward(layer, a_prev), rtol=1e-4, atol=1e-4)
+
+                        dz = rng.standard_normal(z.shape).astype(np.float32)
+                        da_prev, dw, _ = layer.backward(dz)
+                        expected_da_prev, expected_dw = loop_backward(layer, a_prev, dz)
+                        np.testing.assert_allclose(dw, expected_dw, rtol=1e-4, atol=1e-4)
+                        np.testing.assert_allclose(da_prev, expected_da_prev, rtol=1e-4, atol=1e-4)
+
+
+class GroupedConvTest(unittest.TestCase):
+    def setUp(self):
+        mini_keras.set_floatx("float64")
+        self.rng = np.random.default_rng(0)
+
+    def tearDown(self):
+        mini_keras.set_floatx("float32")
+
+    def test_depthwise_matches_grouped_conv(self):
+        for depth_multiplier in (1, 2):
+            for stride, padding in ((1, "same"), (2, "valid")):
+                with self.subTest(depth_multiplier=depth_multiplier, stride=stride, padding=padding):
+                    depthwise = DepthwiseConv(3, stride, depth_multiplier, padding=padding)
+                    grouped = Conv(3, stride, 3 * depth_multiplier, padding=padding, groups=3)
+                    depthwise.init((9, 9, 3))
+                    grouped.init((9, 9, 3))
+                    self.assertEqual(depthwise.w.shape, grouped.w.shape)
+                    grouped.w[...] = depthwise.w
+                    depthwise.b[...] = grouped.b[...] = self.rng.standard_normal(grouped.b.shape)
+
+                    a_prev = self.rng.standard_normal((4, 9, 9, 3))
+                    z = depthwise.forward(a_prev, training=True)
+                    np.testing.assert_allclose(z, grouped.forward(a_prev, training=True), rtol=1e-10, atol=1e-10)
+
+                    dz = self.rng.standard_normal(z.shape)
+                    for actual, expected in zip(depthwise.backward(dz), grouped.backward(dz)):
+                        np.testing.assert_allclose(actual, expected, rtol=1e-10, atol=1e-10)
+
+    def test_gradients_match_finite_differences(self):
+        cases = {
+            "grouped": [Conv(3, 1, 4, padding="same", activation=relu, groups=2)],
+            "depthwise": [DepthwiseConv(3, 1, 2, padding="same", activation=sigmoid)],
+            "separable": [SeparableConv(3, 2, 4, depth_multiplier=2, activation=relu)],
+        }
+        x, y = make_data(3, (6, 6, 4), 3)
+        for name, layers in cases.items():
+            with self.subTest(layer=name):
+                model = build_model((6, 6, 4), [*layers, Flatten(), Dense(3, softmax)], l2_lambda=0.1)
+                model.compute_gradients(x, y)
+                np.testing.assert_allclose(model.arena.grads, numerical_gradients(model, x, y), rtol=1e-5, atol=1e-7)
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+
+from mini_keras import Conv
+from mini_keras.utils.conv_algorithms import ALGORITHMS, clear_tuned_algorithms, convolve, supported_algorithms, tuned_algorithms
+
+
+class ConvAlgorithmsTest(unittest.TestCase):
+    def setUp(self):
+        clear_tuned_algorithms()
+        self.addCleanup(clear_tuned_algorithms)
+        self.rng = np.random.default_rng(0)
+
+    def test_algorithms_agree(self):
+        for kernel_size, stride in ((1, 1), (3, 1), (3, 2), (5, 1)):
+            x = self.rng.standard_normal((3, 11, 11, 4)).astype(np.float32)
+            w = self.rng.standard_normal((kernel_size, kernel_size, 4, 6)).astype(np.float32)
+            n_h = (11 - kernel_size) // stride + 1
+            expected = convolve(x, w, stride, np.empty((3, n_h, n_h, 6), dtype=np.float32), "im2col")
+
+            for algorithm in supported_algorithms(kernel_size, stride):
+                with self.subTest(algorithm=algorithm, kernel_size=kernel_size, stride=stride):
+                    out = convolve(x, w, stride, np.empty_like(expected), algorithm)
+                    np.testing.assert_allclose(out, expected, rtol=1e-3, atol=1e-3)
+
+        self.assertEqual(set(supported_algorithms(3, 1)), set(ALGORITHMS))
+
+    def test_im2col_is_the_default(self):
+        conv = Conv(3, 1, 4, padding="same")
+        conv.init((8, 8, 2))
+        self.assertEqual(conv.algorithm, "im2col")
+        conv.forward(self.rng.standard_normal((4, 8, 8, 2)).astype(np.float32), True)
+        self.assertEqual(tuned_algorithms(), {})
+
+    def test_autotuning_ignores_the_batch_size(self):
+        conv = Conv(3, 1, 4, padding="same", algorithm="auto")
+        conv.init((8, 8, 2))
+        for batch_size in (8, 3, 8, 1):
+            conv.forward(self.rng.standard_normal((batch_size, 8, 8, 2)).astype(np.float32), False)
+
+        tuned = tuned_algorithms()
+        self.assertEqual(len(tuned), 1)
+        self.assertIn(next(iter(tuned.values())), supported_algorithms(3, 1))
+
+    def test_unsupported_algorithm(self):
+        with self.assertRaises(ValueError):
+            Conv(3, 2, 4, algorithm="winograd_f23")
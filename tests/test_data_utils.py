@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from mini_keras.utils.data_utils import DataLoader, load_memmap_dataset, save_memmap_dataset
+
+
+class DataLoaderTest(unittest.TestCase):
+    def setUp(self):
+        self.x = np.arange(20, dtype=np.float32).reshape(10, 2)
+        self.y = np.arange(10).reshape(10, 1)
+
+    def test_batches_cover_every_sample(self):
+        loader = DataLoader(self.x, self.y, 4)
+        batches = [(x.copy(), y.copy()) for x, y in loader]
+        self.assertEqual([x.shape[0] for x, _ in batches], [4, 4, 2])
+        self.assertEqual(len(loader), 3)
+
+        x = np.concatenate([x for x, _ in batches])
+        y = np.concatenate([y for _, y in batches])
+        np.testing.assert_array_equal(x[np.argsort(y[:, 0])], self.x)
+
+    def test_prefetch_matches(self):
+        np.random.seed(0)
+        expected = [x.copy() for x, _ in DataLoader(self.x, self.y, 3)]
+        np.random.seed(0)
+        actual = [x.copy() for x, _ in DataLoader(self.x, self.y, 3, prefetch=2)]
+        for a, b in zip(actual, expected):
+            np.testing.assert_array_equal(a, b)
+
+    def test_drop_last(self):
+        loader = DataLoader(self.x, self.y, 4, drop_last=True)
+        self.assertEqual(len(loader), 2)
+        self.assertEqual(len(list(loader)), 2)
+
+    def test_no_batch_size_is_the_whole_dataset(self):
+        loader = DataLoader(self.x, self.y, None, shuffle=False)
+        self.assertEqual(loader.batch_size, 10)
+        (x, y), = list(loader)
+        np.testing.assert_array_equal(x, self.x)
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            DataLoader(self.x, self.y, 0)
+        with self.assertRaises(ValueError):
+            DataLoader(self.x, self.y[:5], 2)
+
+
+class MemmapDatasetTest(unittest.TestCase):
+    def test_round_trip(self):
+        arrays = {"x": np.random.randint(0, 255, (7, 3, 3), dtype=np.uint8), "y": np.arange(7)}
+        with tempfile.TemporaryDirectory() as directory:
+            save_memmap_dataset(os.path.join(directory, "data"), arrays, chunk_size=3)
+            loaded = load_memmap_dataset(os.path.join(directory, "data"))
+            for name, array in arrays.items():
+                self.assertIsInstance(loaded[name], np.memmap)
+                np.testing.assert_array_equal(loaded[name], array)
+            del loaded
@@ -0,0 +1,78 @@
+import unittest
+
+import numpy as np
+
+import mini_keras
+from mini_keras import BatchNorm, Conv, Dense, DepthwiseConv, Dropout, Flatten, SeparableConv, adam, one_hot_encoder, relu, sigmoid, softmax
+from mini_keras.backend import cast_to_floatx
+from mini_keras.layers.pool import Pool
+from . import build_model
+
+
+def build_conv_model():
+    layers = [
+        Conv(3, 1, 4, padding="same", activation=relu),
+        BatchNorm(),
+        Pool(2, 2),
+        DepthwiseConv(3, 1, activation=relu),
+        SeparableConv(1, 1, 6, activation=sigmoid),
+        Flatten(),
+        Dropout(0.5, seed=0),
+        Dense(5, softmax),
+    ]
+    return build_model((8, 8, 3), layers, optimizer=adam)
+
+
+class FloatxTest(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        self.x = np.random.randn(4, 8, 8, 3).astype(np.float32)
+        self.y = one_hot_encoder(np.random.randint(0, 5, (4, 1)), 5)
+
+    def tearDown(self):
+        mini_keras.set_floatx("float32")
+
+    def test_cast_does_not_copy(self):
+        self.assertIs(cast_to_floatx(self.x), self.x)
+        self.assertEqual(cast_to_floatx(self.x.astype(np.float64)).dtype, np.float32)
+        self.assertEqual(self.y.dtype, np.float32)
+
+    def test_layers_do_not_upcast(self):
+        model = build_conv_model()
+        a = model.forward_prop(self.x)
+        self.assertEqual(a.dtype, np.float32)
+        # The input reaches the first layer as is
+        self.assertIs(model.layers[0].cache["a_prev"], self.x)
+
+        da = np.ones_like(a)
+        for layer in reversed(model.layers):
+            da, dw, db = layer.backward(da)
+            for grad in (da, dw, db):
+                if grad is not None:
+                    self.assertEqual(grad.dtype, np.float32, type(layer).__name__)
+
+    def test_parameters_live_in_the_arena(self):
+        model = build_conv_model()
+        arena = model.arena
+        self.assertEqual(arena.params.dtype, np.float32)
+        for layer in model.trainable_layers:
+            w, b = layer.get_params()
+            self.assertEqual((w.dtype, b.dtype), (np.float32, np.float32))
+            self.assertTrue(np.shares_memory(w, arena.params))
+            self.assertTrue(np.shares_memory(b, arena.params))
+
+        model.train_step(self.x, self.y, 0.01, 1)
+        self.assertEqual(arena.params.dtype, np.float32)
+        for buffer in model.optimizer.get_state().values():
+            self.assertEqual(buffer.dtype, np.float32)
+
+    def test_float64_policy(self):
+        mini_keras.set_floatx("float64")
+        model = build_conv_model()
+        self.assertEqual(model.arena.params.dtype, np.float64)
+        self.assertEqual(model.forward_prop(self.x).dtype, np.float64)
+        self.assertEqual(one_hot_encoder(np.zeros((2, 1), dtype=int), 3).dtype, np.float64)
+
+    def test_unknown_floatx(self):
+        with self.assertRaises(ValueError):
+            mini_keras.set_floatx("int32")
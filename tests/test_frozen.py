@@ -0,0 +1,60 @@
+import tracemalloc
+import unittest
+
+import numpy as np
+
+from mini_keras import Conv, Dense, DepthwiseConv, Dropout, Flatten, SeparableConv, relu, softmax
+from mini_keras.layers.pool import Pool
+from . import build_model, make_data
+
+
+def build_conv_model():
+    layers = [
+        Conv(3, 1, 8, padding="same", activation=relu),
+        Pool(2, 2),
+        SeparableConv(3, 1, 8, padding="same", activation=relu),
+        DepthwiseConv(3, 1, depth_multiplier=2, activation=relu),
+        Pool(2, 2, "average"),
+        Pool(mode="global_average"),
+        Flatten(),
+        Dropout(0.5),
+        Dense(3, softmax),
+    ]
+    return build_model((16, 16, 3), layers)
+
+
+class FrozenModelTest(unittest.TestCase):
+    def setUp(self):
+        self.model = build_conv_model()
+        self.x, _ = make_data(64, (16, 16, 3))
+
+    def test_matches_predict(self):
+        frozen = self.model.freeze(64)
+        np.testing.assert_allclose(frozen(self.x), self.model.predict(self.x), rtol=1e-5, atol=1e-6)
+
+    def test_partial_batches(self):
+        frozen = self.model.freeze(64)
+        for batch_size in (1, 5, 64, 17):
+            with self.subTest(batch_size=batch_size):
+                x = self.x[:batch_size]
+                a = frozen(x)
+                self.assertEqual(a.shape, (batch_size, 3))
+                np.testing.assert_allclose(a, self.model.predict(x), rtol=1e-5, atol=1e-6)
+
+    def test_batch_above_the_frozen_size(self):
+        frozen = self.model.freeze(8)
+        with self.assertRaises(ValueError):
+            frozen(self.x[:9])
+
+    def test_steady_state_does_not_allocate(self):
+        frozen = self.model.freeze(64)
+        frozen(self.x)
+        tracemalloc.start()
+        try:
+            frozen(self.x)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # The first layer's output alone takes 512 KiB, NumPy's iterator buffers are a few tens
+        self.assertLess(peak, 128 * 1024)
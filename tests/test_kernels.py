@@ -0,0 +1,149 @@
+import os
+import subprocess
+import sys
+import textwrap
+import unittest
+from itertools import product
+
+import numpy as np
+
+from mini_keras.activations import identity, relu, sigmoid, softmax
+from mini_keras.kernels import available_kernel_backends, kernel_backend, numpy_kernels, set_kernel_backend
+
+RTOL, ATOL = 1e-4, 1e-5
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ConformanceTest(unittest.TestCase):
+    """Checks every available kernel backend against the NumPy reference kernels."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.initial = kernel_backend().name
+
+    def tearDown(self):
+        set_kernel_backend(self.initial)
+
+    def backends(self):
+        for name in available_kernel_backends():
+            set_kernel_backend(name)
+            with self.subTest(backend=name):
+                yield kernel_backend()
+
+    def test_conv2d(self):
+        for kernels in self.backends():
+            for batch_size, size, n_c_prev, kernel_size, stride in product((1, 8), (7, 12), (1, 3), (1, 3, 5), (1, 2)):
+                n_h = (size - kernel_size) // stride + 1
+                x = self.rng.standard_normal((batch_size, size, size, n_c_prev)).astype(np.float32)
+                w = self.rng.standard_normal((kernel_size, kernel_size, n_c_prev, 4)).astype(np.float32)
+
+                expected = numpy_kernels.conv2d(x, w, stride, np.empty((batch_size, n_h, n_h, 4), dtype=np.float32))
+                out = kernels.conv2d(x, w, stride, np.full((batch_size, n_h, n_h, 4), np.nan, dtype=np.float32))
+                np.testing.assert_allclose(out, expected, rtol=RTOL, atol=ATOL, err_msg=f"{x.shape} {w.shape} {stride}")
+
+    def test_bias_activation(self):
+        for kernels in self.backends():
+            for shape, activation, in_place in product(((32, 10), (4, 6, 6, 8)), (identity, relu, sigmoid, softmax), (False, True)):
+                if activation is softmax and len(shape) != 2:
+                    continue
+                z = self.rng.standard_normal(shape).astype(np.float32) * 8
+                b = self.rng.standard_normal((1,) * (len(shape) - 1) + shape[-1:]).astype(np.float32)
+
+                z_expected = z.copy()
+                expected = numpy_kernels.bias_activation(z_expected, b, activation)
+                z_out = z.copy()
+                out = kernels.bias_activation(z_out, b, activation, out=z_out if in_place else None)
+
+                message = f"{type(activation).__name__} {shape}"
+                np.testing.assert_allclose(out, expected, rtol=RTOL, atol=ATOL, err_msg=message)
+                if not in_place:
+                    # The pre-activation output is kept, the fused costs and the backward pass need it
+                    np.testing.assert_allclose(z_out, z_expected, rtol=RTOL, atol=ATOL, err_msg=message)
+
+    def test_max_pool(self):
+        for kernels in self.backends():
+            for batch_size, size, n_c, pool_size, stride in product((1, 8), (6, 9), (1, 5), (2, 3), (1, 2, 3)):
+                n_h = (size - pool_size) // stride + 1
+                # Rounded values give ties, the first maximum of each window must be kept
+                x = np.round(self.rng.standard_normal((batch_size, size, size, n_c)), 1).astype(np.float32)
+                shape = (batch_size, n_h, n_h, n_c)
+                index_type = np.min_scalar_type(pool_size ** 2 - 1)
+
+                expected, expected_idx = np.empty(shape, dtype=np.float32), np.empty(shape, dtype=index_type)
+                numpy_kernels.max_pool(x, pool_size, stride, expected, expected_idx)
+                out, idx = np.empty(shape, dtype=np.float32), np.empty(shape, dtype=index_type)
+                kernels.max_pool(x, pool_size, stride, out, idx)
+
+                message = f"{x.shape} {pool_size} {stride}"
+                np.testing.assert_array_equal(out, expected, err_msg=message)
+                np.testing.assert_array_equal(idx, expected_idx, err_msg=message)
+                np.testing.assert_array_equal(kernels.max_pool(x, pool_size, stride, np.empty(shape, dtype=np.float32)), expected)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            set_kernel_backend("cuda")
+
+
+class ForkTest(unittest.TestCase):
+    def test_data_parallel_after_running_kernels(self):
+        # Run in a fresh interpreter, a process that forked after launching unsafe threads hangs at exit
+        script = textwrap.dedent("""
+            import numpy as np
+            from mini_keras import Conv, Dense, Flatten, Sequential, kernel_backend, relu, softmax, softmax_cross_entropy
+            from mini_keras.models.parallel import DataParallel
+
+            model = Sequential((6, 6, 2), [Conv(3, 1, 4, activation=relu), Flatten(), Dense(3, softmax)], softmax_cross_entropy)
+            x = np.random.randn(8, 6, 6, 2).astype(np.float32)
+            y = np.eye(3, dtype=np.float32)[np.random.randint(0, 3, 8)]
+            model.forward_prop(x)
+            with DataParallel(model, 2) as trainer:
+                trainer.train_step(x, y, 0.1, 1)
+            print(kernel_backend().name)
+        """)
+        for name in available_kernel_backends():
+            with self.subTest(backend=name):
+                env = dict(os.environ, MINI_KERAS_KERNELS=name, PYTHONPATH=ROOT)
+                result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, timeout=120)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertEqual(result.stdout.strip(), name)
+
+
+@unittest.skipUnless("numba" in available_kernel_backends(), "Numba is not installed")
+class NumbaThreadingTest(unittest.TestCase):
+    def test_workqueue_with_intra_op_threads(self):
+        # The workqueue layer aborts the process when parallel kernels run from several threads at once
+        script = textwrap.dedent("""
+            import numpy as np
+            import numba
+            from mini_keras import Conv, set_num_threads
+            from mini_keras.layers.pool import Pool
+
+            set_num_threads(4)
+            x = np.random.rand(64, 16, 16, 8).astype(np.float32)
+            for layer in (Pool(2, 2, "max"), Conv(3, 1, 4, algorithm="direct")):
+                layer.init((16, 16, 8))
+                for _ in range(5):
+                    layer.forward(x, True)
+                    layer.forward(x, False)
+                    layer.freeze(64)(x)
+            print(numba.threading_layer())
+        """)
+        env = dict(os.environ, MINI_KERAS_KERNELS="numba", NUMBA_THREADING_LAYER="workqueue", PYTHONPATH=ROOT)
+        result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "workqueue")
+
+    def test_import_keeps_threading_layer_priority(self):
+        script = textwrap.dedent("""
+            from numba import config
+            priority = list(config.THREADING_LAYER_PRIORITY)
+            from mini_keras.kernels import numba_kernels, set_kernel_backend
+            assert config.THREADING_LAYER_PRIORITY == priority
+            set_kernel_backend("numba")
+            print(config.THREADING_LAYER_PRIORITY[0])
+        """)
+        env = dict(os.environ, MINI_KERAS_KERNELS="numpy", PYTHONPATH=ROOT)
+        env.pop("NUMBA_THREADING_LAYER", None)
+        result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "omp")
@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+
+from mini_keras import Dense, relu, sigmoid, sigmoid_cross_entropy, softmax, softmax_cross_entropy
+from . import build_model, make_data
+
+
+class LogitsTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.z = rng.standard_normal((16, 5)) * 3
+        self.y = np.eye(5)[rng.integers(0, 5, 16)]
+
+    def test_matches_the_activations(self):
+        for cost_function, activation in ((softmax_cross_entropy, softmax), (sigmoid_cross_entropy, sigmoid)):
+            with self.subTest(cost_function=type(cost_function).__name__):
+                self.assertAlmostEqual(cost_function.f_logits(self.z, self.y), cost_function.f(activation.f(self.z), self.y), places=10)
+                a = activation.f(self.z)
+                np.testing.assert_allclose(cost_function.grad_logits(a, self.y), a - self.y)
+
+    def test_large_logits_stay_finite(self):
+        z = self.z * 1e3 / np.abs(self.z).max()
+        for cost_function in (softmax_cross_entropy, sigmoid_cross_entropy):
+            with self.subTest(cost_function=type(cost_function).__name__):
+                cost = cost_function.f_logits(z, self.y)
+                self.assertTrue(np.isfinite(cost))
+                # Only the wrong labels with the largest margins contribute, about |z| each
+                self.assertGreater(cost, 1)
+
+        # A confident, right prediction costs nothing
+        self.assertEqual(softmax_cross_entropy.f_logits(self.y * 1e3, self.y), 0)
+
+    def test_fused_backward_matches(self):
+        x, y = make_data(16)
+        for cost_function, activation in ((softmax_cross_entropy, softmax), (sigmoid_cross_entropy, sigmoid)):
+            with self.subTest(cost_function=type(cost_function).__name__):
+                model = build_model(layers=[Dense(8, relu), Dense(3, activation)], cost_function=cost_function)
+                self.assertTrue(model.fused_cost)
+                cost = model.compute_gradients(x, y)
+                grads = model.arena.grads.copy()
+
+                model.fused_cost = False
+                expected_cost = model.compute_gradients(x, y)
+                np.testing.assert_allclose(model.arena.grads, grads, rtol=1e-4, atol=1e-6)
+                self.assertAlmostEqual(float(cost), float(expected_cost), places=5)
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from mini_keras import BatchNorm, Dense, Dropout, Sequential, relu, softmax
+from mini_keras.models.parallel import DataParallel
+from . import build_model, make_data
+
+
+def build_regularized_model(*layers):
+    return build_model(layers=[Dense(16, relu), *layers, Dense(3, softmax)], l2_lambda=0.01)
+
+
+class DataParallelTest(unittest.TestCase):
+    def setUp(self):
+        self.x, self.y = make_data(12)
+
+    def test_matches_single_process(self):
+        expected, model = build_regularized_model(), build_regularized_model()
+        with DataParallel(model, 3) as trainer:
+            for step in range(1, 4):
+                expected_cost = expected.train_step(self.x, self.y, 0.1, step)
+                cost = trainer.train_step(self.x, self.y, 0.1, step)
+                self.assertAlmostEqual(cost, float(expected_cost), places=5)
+
+        np.testing.assert_allclose(model.arena.params, expected.arena.params, rtol=1e-5, atol=1e-6)
+
+    def test_batch_norm_matches_single_process(self):
+        # The last batch has fewer samples than workers
+        for x, y in ((self.x, self.y), (self.x[:2], self.y[:2])):
+            with self.subTest(batch_size=len(x)):
+                expected, model = build_regularized_model(BatchNorm()), build_regularized_model(BatchNorm())
+                with DataParallel(model, 3) as trainer:
+                    for step in range(1, 4):
+                        expected_cost = expected.train_step(x, y, 0.1, step)
+                        cost = trainer.train_step(x, y, 0.1, step)
+                        self.assertAlmostEqual(cost, float(expected_cost), places=5)
+
+                np.testing.assert_allclose(model.arena.params, expected.arena.params, rtol=1e-5, atol=1e-6)
+                for name, buffer in expected.layers[1].get_state().items():
+                    np.testing.assert_allclose(model.layers[1].get_state()[name], buffer, rtol=1e-5, atol=1e-6, err_msg=name)
+
+    def test_workers_draw_different_dropout_masks(self):
+        model = build_regularized_model(Dropout(0.5))
+        dropout = model.layers[1]
+        state = dropout.rng.bit_generator.state
+        # Every shard gets the same samples, only the masks can tell their gradients apart
+        x, y = np.repeat(self.x[:1], 4, axis=0), np.repeat(self.y[:1], 4, axis=0)
+
+        with DataParallel(model, 2) as trainer:
+            trainer.train_step(x, y, 0.1, 1)
+            self.assertFalse(np.allclose(trainer.grads[0], trainer.grads[1]))
+
+        self.assertNotEqual(dropout.rng.bit_generator.state, state)
+
+    def test_resume_after_parallel_training(self):
+        model = build_regularized_model(Dropout(0.5))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "model.mk")
+            with DataParallel(model, 2) as trainer:
+                trainer.train_step(self.x, self.y, 0.1, 1)
+                model.save(path)
+                trainer.train_step(self.x, self.y, 0.1, 2)
+
+            resumed = Sequential.load(path, mmap=False)
+            with DataParallel(resumed, 2) as trainer:
+                trainer.train_step(self.x, self.y, 0.1, 2)
+
+        np.testing.assert_array_equal(resumed.arena.params, model.arena.params)
@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from mini_keras.layers.pool import Pool
+
+
+def loop_pool(a_prev, da, pool_size, stride, mode):
+    """
+    The sliding window forward and backward passes `Pool` had before vectorizing, returning a and da_prev.
+    """
+    batch_size, n_h_prev, n_w_prev, n_c = a_prev.shape
+    n_h, n_w = (n_h_prev - pool_size) // stride + 1, (n_w_prev - pool_size) // stride + 1
+    a = np.zeros((batch_size, n_h, n_w, n_c), dtype=a_prev.dtype)
+    da_prev = np.zeros_like(a_prev)
+
+    for i in range(n_h):
+        v_start = i * stride
+        v_end = v_start + pool_size
+
+        for j in range(n_w):
+            h_start = j * stride
+            h_end = h_start + pool_size
+            a_prev_slice = a_prev[:, v_start:v_end, h_start:h_end, :]
+
+            if mode == "max":
+                a[:, i, j, :] = np.max(a_prev_slice, axis=(1, 2))
+                mask = a_prev_slice == a[:, i: i + 1, j: j + 1, :]
+                da_prev[:, v_start:v_end, h_start:h_end, :] += da[:, i: i + 1, j: j + 1, :] * mask
+            else:
+                a[:, i, j, :] = np.mean(a_prev_slice, axis=(1, 2))
+                da_prev[:, v_start:v_end, h_start:h_end, :] += da[:, i: i + 1, j: j + 1, :] / pool_size ** 2
+
+    return a, da_prev
+
+
+class PoolTest(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def check(self, layer, pool_size, stride, in_dim=(9, 9, 3)):
+        layer.init(in_dim)
+        a_prev = self.rng.standard_normal((4, *in_dim)).astype(np.float32)
+        a = layer.forward(a_prev, training=True)
+        da = self.rng.standard_normal(a.shape).astype(np.float32)
+        da_prev, _, _ = layer.backward(da)
+
+        expected_a, expected_da_prev = loop_pool(a_prev, da, pool_size, stride, layer.mode.replace("global_", ""))
+        np.testing.assert_allclose(a, expected_a, rtol=1e-6, atol=1e-6)
+        np.testing.assert_allclose(da_prev, expected_da_prev, rtol=1e-5, atol=1e-6)
+        np.testing.assert_array_equal(layer.forward(a_prev, training=False), a)
+
+    def test_matches_the_loops(self):
+        # Tiling, tiling and leaving out the last row and column, overlapping and strided windows
+        for pool_size, stride in ((3, 3), (2, 2), (3, 1), (2, 3)):
+            for mode in ("max", "average"):
+                with self.subTest(pool_size=pool_size, stride=stride, mode=mode):
+                    self.check(Pool(pool_size, stride, mode), pool_size, stride)
+
+    def test_global_modes(self):
+        for mode in ("global_max", "global_average"):
+            with self.subTest(mode=mode):
+                layer = Pool(mode=mode)
+                self.check(layer, 9, 1)
+                self.assertEqual(layer.get_output_dim(), (1, 1, 3))
+
+    def test_argmax_is_compact(self):
+        for layer, in_dim, dtype in (
+            (Pool(2, 2), (8, 8, 2), np.uint8),
+            (Pool(mode="global_max"), (8, 8, 2), np.uint8),
+            (Pool(mode="global_max"), (20, 20, 2), np.uint16),
+        ):
+            with self.subTest(mode=layer.mode, in_dim=in_dim):
+                layer.init(in_dim)
+                layer.forward(self.rng.standard_normal((2, *in_dim)).astype(np.float32), training=True)
+                self.assertEqual(layer.cache["idx"].dtype, dtype)
+
+    def test_invalid_mode(self):
+        with self.assertRaises(NotImplementedError):
+            Pool(2, 2, "min")
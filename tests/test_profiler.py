@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import mini_keras
+from mini_keras import Conv, Dense, Flatten, adam, profiler, relu, softmax
+from . import build_model, make_data
+
+
+class ProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.model = build_model((6, 6, 2), [Conv(3, 1, 4, activation=relu), Flatten(), Dense(3, softmax)], optimizer=adam)
+        self.x, self.y = make_data(8, (6, 6, 2))
+
+    def train(self, **kwargs):
+        with mini_keras.profile(**kwargs) as result:
+            for step in (1, 2, 3):
+                self.model.train_step(self.x, self.y, 0.01, step)
+        return result
+
+    def test_records_the_operations(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trace_file = os.path.join(directory, "trace.json")
+            result = self.train(trace_file=trace_file)
+            with open(trace_file) as f:
+                trace = json.load(f)
+
+        names = ["conv_0.forward", "flatten_1.forward", "dense_2.forward", "conv_0.backward", "flatten_1.backward", "dense_2.backward"]
+        self.assertEqual(set(result.stats), {*names, "adam.update", "softmaxcrossentropy.cost"})
+        for name, (calls, total, allocated) in result.stats.items():
+            self.assertEqual(calls, 3, name)
+            self.assertGreaterEqual(total, 0)
+            self.assertGreaterEqual(allocated, 0)
+        self.assertGreater(result.stats["conv_0.forward"][2], 0)
+
+        events = trace["traceEvents"]
+        self.assertEqual(len(events), 3 * len(result.stats))
+        for event in events:
+            self.assertEqual(event["ph"], "X")
+            self.assertIn(event["name"], result.stats)
+            self.assertGreaterEqual(event["dur"], 0)
+        self.assertIn("conv_0.forward", result.summary())
+
+    def test_without_resetting_the_peak(self):
+        with mock.patch.object(profiler, "CAN_RESET_PEAK", False), mock.patch.object(profiler.tracemalloc, "reset_peak", None):
+            result = self.train()
+        self.assertEqual(result.stats["dense_2.forward"][0], 3)
+
+    def test_without_memory(self):
+        result = self.train(memory=False)
+        self.assertTrue(all(allocated == 0 for _, _, allocated in result.stats.values()))
+        self.assertIsNone(profiler.current)
+
+    def test_nested_profiles(self):
+        with mini_keras.profile():
+            with self.assertRaises(RuntimeError):
+                with mini_keras.profile():
+                    pass
+        self.assertIsNone(profiler.current)
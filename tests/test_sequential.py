@@ -0,0 +1,91 @@
+import unittest
+
+import numpy as np
+
+from mini_keras import BatchNorm, Conv, Dense, Dropout, Flatten, one_hot_encoder, relu, softmax
+from mini_keras.layers.pool import Pool
+from mini_keras.models.sequential import DEFAULT_MEMORY_BUDGET
+from mini_keras.utils.data_utils import DataLoader
+from . import build_model, make_data
+
+
+def preprocess(x, y):
+    return x.astype(np.float32) / 255, one_hot_encoder(y, 3)
+
+
+class TransformTest(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(1)
+        self.x = np.random.randint(0, 256, (30, 4), dtype=np.uint8)
+        self.y = np.random.randint(0, 3, (30, 1))
+
+    def test_evaluate_applies_the_transform(self):
+        model = build_model()
+        expected = model.evaluate(*preprocess(self.x, self.y), batch_size=7)
+        actual = model.evaluate(self.x, self.y, batch_size=7, transform=preprocess)
+        self.assertAlmostEqual(actual["loss"], expected["loss"], places=5)
+        self.assertEqual(actual["accuracy"], expected["accuracy"])
+
+    def test_train_validates_on_transformed_data(self):
+        for make_input in (
+            lambda: {"x_train": self.x, "y_train": self.y, "mini_batch_size": 10, "transform": preprocess},
+            lambda: {"x_train": DataLoader(self.x, self.y, 10, transform=preprocess)},
+        ):
+            model = build_model()
+            stats = model.train(**make_input(), num_epochs=2, validation_data=(self.x, self.y), verbose=False)
+            expected = model.evaluate(self.x, self.y, metrics=("accuracy",), transform=preprocess)["accuracy"]
+            self.assertEqual(stats["test_acc"][-1], expected)
+
+
+class ChunksTest(unittest.TestCase):
+    def test_default_chunks_are_bounded(self):
+        model = build_model()
+        chunks = model.chunks(10 ** 7)
+        self.assertGreater(len(chunks), 1)
+        start, stop = chunks[0]
+        self.assertLessEqual((stop - start) * model.sample_memory(), DEFAULT_MEMORY_BUDGET)
+        self.assertEqual(chunks[-1][1], 10 ** 7)
+
+    def test_predict_matches_a_single_pass(self):
+        model = build_model()
+        x = np.random.randn(50, 4).astype(np.float32)
+        expected = model.forward_prop(x, training=False).copy()
+        np.testing.assert_allclose(model.predict(x, batch_size=7), expected, rtol=1e-6)
+        np.testing.assert_allclose(model.predict(x, memory_budget=model.sample_memory() * 3), expected, rtol=1e-6)
+
+
+class CheckpointingTest(unittest.TestCase):
+    def build_model(self):
+        layers = [
+            Conv(3, 1, 4, padding="same", activation=relu),
+            BatchNorm(),
+            Dropout(0.3, seed=1),
+            Conv(3, 1, 4, activation=relu),
+            Pool(2, 2),
+            Flatten(),
+            Dense(16, relu),
+            BatchNorm(),
+            Dropout(0.5, seed=2),
+            Dense(3, softmax),
+        ]
+        return build_model((8, 8, 2), layers)
+
+    def test_matches_the_plain_training(self):
+        x, y = make_data(16, (8, 8, 2))
+        expected = self.build_model()
+        for step in (1, 2):
+            expected.train_step(x, y, 0.1, step)
+
+        num_layers = len(expected.layers)
+        for boundaries in (None, [2], [1, 3, 7], range(num_layers), [num_layers - 1]):
+            with self.subTest(boundaries=boundaries):
+                model = self.build_model()
+                model.enable_checkpointing(boundaries)
+                for step in (1, 2):
+                    model.train_step(x, y, 0.1, step)
+
+                np.testing.assert_array_equal(model.arena.grads, expected.arena.grads)
+                np.testing.assert_array_equal(model.arena.params, expected.arena.params)
+                for layer, expected_layer in zip(model.layers, expected.layers):
+                    for name, buffer in expected_layer.get_state().items():
+                        np.testing.assert_array_equal(layer.get_state()[name], buffer, err_msg=name)
@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+
+from mini_keras import BatchNorm, Conv, Dense, Dropout, Flatten, identity, relu, softmax
+from mini_keras.layers.pool import Pool
+from mini_keras.utils.workspace import Workspace
+from . import build_model, make_data
+
+
+def build_conv_model(algorithm="im2col", depth=1):
+    layers = [Conv(3, 1, 4, padding="same", activation=relu, algorithm=algorithm) for _ in range(depth)]
+    return build_model((8, 8, 2), [*layers, Flatten(), Dense(3, softmax)])
+
+
+class WorkspaceTest(unittest.TestCase):
+    def test_buffers_are_reused(self):
+        workspace = Workspace()
+        buffer = workspace.get("x", (8, 3), np.float32)
+        self.assertTrue(np.shares_memory(workspace.get("x", (5, 3), np.float32), buffer))
+        self.assertFalse(np.shares_memory(workspace.get("x", (5, 3), np.float32, avoid=(buffer[2:],)), buffer))
+        self.assertEqual(workspace.get("x", (16, 3), np.float32).shape, (16, 3))
+        self.assertEqual(workspace.get("x", (4, 3), np.float64).dtype, np.float64)
+        self.assertEqual(len(workspace.buffers), 2)
+
+        workspace.clear()
+        self.assertEqual(workspace.nbytes, 0)
+
+    def test_padded_buffers_keep_their_borders(self):
+        workspace = Workspace()
+        x, y = np.ones((2, 4, 4, 1)), np.ones((2, 2, 2, 1))
+        np.testing.assert_array_equal(workspace.pad("x", x, 1), np.pad(x, ((0, 0), (1, 1), (1, 1), (0, 0))))
+        # Same padded shape, another padding size
+        np.testing.assert_array_equal(workspace.pad("x", y, 2), np.pad(y, ((0, 0), (2, 2), (2, 2), (0, 0))))
+        np.testing.assert_array_equal(workspace.pad("x", x, 1), np.pad(x, ((0, 0), (1, 1), (1, 1), (0, 0))))
+
+    def test_memory_does_not_grow_with_depth(self):
+        x, y = make_data(8, (8, 8, 2))
+        nbytes = []
+        for depth in (2, 6):
+            model = build_conv_model(depth=depth)
+            model.train_step(x, y, 0.1, 1)
+            nbytes.append(model.workspace.nbytes)
+
+        self.assertEqual(nbytes[0], nbytes[1])
+
+    def test_gradients_match_private_buffers(self):
+        # Layers of the same shape, without activations so that gradients flow straight between their buffers
+        layers = [
+            Conv(3, 1, 4, padding="same"),
+            Conv(3, 1, 4, padding="same"),
+            BatchNorm(),
+            Conv(3, 1, 4, padding="same", activation=relu),
+            Pool(3, 1),
+            Pool(1, 1, "average"),
+            Flatten(),
+            Dense(16, identity),
+            Dense(16, identity),
+            Dropout(0.5, seed=0),
+            Dense(16, identity),
+            BatchNorm(),
+            Dense(3, softmax),
+        ]
+        model = build_model((8, 8, 4), layers)
+        x, y = make_data(8, (8, 8, 4))
+        states = [layer.get_state() for layer in model.layers]
+
+        model.compute_gradients(x, y)
+        grads = model.arena.grads.copy()
+
+        for layer, state in zip(model.layers, states):
+            layer.set_state(state)
+            layer.workspace = Workspace()
+        model.compute_gradients(x, y)
+        np.testing.assert_array_equal(model.arena.grads, grads)
+
+    def test_inference_keeps_the_training_buffers(self):
+        model = build_conv_model()
+        x, y = make_data(64, (8, 8, 2))
+        model.train_step(x[:8], y[:8], 0.1, 1)
+        buffers = {key: list(buffers) for key, buffers in model.workspace.buffers.items()}
+
+        model.predict(x)
+        model.evaluate(x, y)
+        self.assertEqual(model.workspace.buffers, buffers)
+        for layer in model.layers:
+            self.assertIs(layer.workspace, model.workspace)
+
+    def test_cols_are_only_allocated_for_im2col(self):
+        x = np.random.randn(4, 8, 8, 2).astype(np.float32)
+        for algorithm, allocated in (("im2col", True), ("fft", False), ("direct", False), ("winograd_f23", False)):
+            with self.subTest(algorithm=algorithm):
+                model = build_conv_model(algorithm)
+                model.layers[0].forward(x, False)
+                self.assertEqual(any(name == "cols" for name, _, _ in model.workspace.buffers), allocated)